@@ -7,16 +7,20 @@ Solo incluye: Dashboard Público, Gestión Convocatorias, Análisis Compatibilid
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, stream_with_context
 from functools import wraps
 import os
+import io
+import csv
 import json
-from datetime import datetime
+import hashlib
+from datetime import datetime, timezone
 import logging
 import traceback
 
 # Importar utilidades necesarias
 from utils import financing_dashboard
+from utils.financing_cache import ResultCache, clave_consulta, comprimir, CODIFICACIONES
 from utils import pdf_processor
 from utils.convocatoria_extractor_updated import ConvocatoriaExtractor
 from utils.bdns_scraper import BDNSScraper
@@ -29,6 +33,14 @@ from config import Config
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Almacén de programas: JSON o SQLite según la extensión de DATABASE_PATH
+financing_dashboard.configurar_almacenamiento(app.config['DATABASE_PATH'],
+                                              app.config['CATALOG_BINARY_SNAPSHOT'],
+                                              app.config['CATALOG_ENGINE'])
+
+# Respuestas ya serializadas de la API de programas (una caché por worker)
+cache_programas = ResultCache(app.config['API_CACHE_ENTRIES'], app.config['API_CACHE_MAX_BYTES'])
+
 # ============================================================================
 # FILTROS PERSONALIZADOS DE JINJA2
 # ============================================================================
@@ -95,6 +107,95 @@ def login_required(f):
     return decorated_function
 
 
+def _huella_despliegue():
+    """
+    Huella del código desplegado: plantillas, estáticos y módulos de Python
+
+    Sale del contenido de los ficheros, así que es la misma en todos los
+    workers y tras reiniciar, y cambia con cualquier despliegue que pueda
+    cambiar el HTML o el JSON de las respuestas.
+
+    Returns:
+        (huella, fecha de modificación del fichero más reciente)
+    """
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    rutas = [os.path.join(raiz, 'app.py'), os.path.join(raiz, 'config.py')]
+    for carpeta in ('templates', 'static', 'utils'):
+        for directorio, subdirectorios, ficheros in os.walk(os.path.join(raiz, carpeta)):
+            subdirectorios[:] = [d for d in subdirectorios if d != '__pycache__']
+            rutas.extend(os.path.join(directorio, f) for f in ficheros if not f.endswith('.pyc'))
+    huella = hashlib.sha1()
+    modificado = None
+    for ruta in sorted(rutas):
+        try:
+            with open(ruta, 'rb') as f:
+                contenido = f.read()
+            mtime = os.path.getmtime(ruta)
+        except OSError:
+            continue
+        modificado = mtime if modificado is None else max(modificado, mtime)
+        huella.update(os.path.relpath(ruta, raiz).encode('utf-8'))
+        huella.update(hashlib.sha1(contenido).digest())
+    return huella.hexdigest()[:12], (datetime.fromtimestamp(modificado) if modificado is not None else None)
+
+HUELLA_DESPLIEGUE, FECHA_DESPLIEGUE = _huella_despliegue()
+
+
+def condicional(privado=False):
+    """
+    Decorador de GET condicional para las rutas que solo dependen del catálogo
+
+    El ETag sale de la versión del catálogo (igual en todos los workers), la
+    huella del despliegue (una versión nueva de plantillas o JS invalida las
+    copias de los navegadores), la ruta con su query string y, en las
+    privadas, la sesión de administrador (cambia el menú), y Last-Modified de
+    la ultima_actualizacion del almacén, del último cambio de estado por
+    fecha o del despliegue (lo más reciente). Si el navegador o nginx ya tienen esa versión se responde 304 sin
+    ejecutar la vista.
+
+    Args:
+        privado: Respuesta que no deben guardar cachés compartidas
+    """
+    def decorador(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Con mensajes flash pendientes la página no es la que tiene el navegador
+            if privado and session.get('_flashes'):
+                return f(*args, **kwargs)
+
+            etiqueta, modificado = financing_dashboard.validadores_catalogo()
+            # Solo las respuestas privadas dependen de la sesión (no añadir Vary: Cookie a las públicas)
+            admin = bool(session.get('admin_logged_in')) if privado else None
+            etag = hashlib.sha1(f"{etiqueta}|{HUELLA_DESPLIEGUE}|{request.full_path}|{admin}".encode('utf-8')).hexdigest()[:32]
+            modificado = max((m for m in (modificado, FECHA_DESPLIEGUE) if m is not None), default=None)
+            if modificado is not None:
+                # Last-Modified tiene resolución de segundos (y va en UTC)
+                modificado = modificado.replace(microsecond=0).astimezone(timezone.utc)
+            cache_control = 'private, no-cache' if privado else 'no-cache'
+
+            # If-None-Match tiene prioridad sobre If-Modified-Since
+            if request.if_none_match:
+                no_modificado = request.if_none_match.contains_weak(etag)
+            else:
+                no_modificado = (modificado is not None and request.if_modified_since is not None and
+                                 modificado <= request.if_modified_since)
+            if no_modificado:
+                response = app.response_class(status=304)
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            # Débil: el mismo ETag vale para la respuesta con y sin comprimir
+            response.set_etag(etag, weak=True)
+            if modificado is not None:
+                response.last_modified = modificado
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return decorated_function
+    return decorador
+
+
 # ============================================================================
 # RUTAS DE AUTENTICACIÓN
 # ============================================================================
@@ -133,23 +234,24 @@ def admin_logout():
 
 @app.route('/')
 @app.route('/financiacion/dashboard')
+@condicional(privado=True)
 def dashboard():
     """Dashboard público de programas de financiación"""
     try:
-        # Obtener estadísticas
-        stats = financing_dashboard.get_financing_stats()
-        
-        # Obtener opciones para filtros
-        filter_options = financing_dashboard.get_financing_filter_options()
-        
-        # Obtener todos los programas inicialmente
-        programas = financing_dashboard.load_all_financing_programs()
-        
+        # Estadísticas, opciones de filtros y primera página en una pasada
+        # (guardada por versión del catálogo). Solo la primera página va en el
+        # HTML; el resto lo pide el dashboard a /api/programas-financiacion
+        resumen = financing_dashboard.catalog_summary(app.config['DASHBOARD_PAGE_SIZE'])
+
         return render_template(
             'financiacion_dashboard.html',
-            stats=stats,
-            filter_options=filter_options,
-            programas=programas
+            stats=resumen['stats'],
+            kpis=resumen['kpis'],
+            recuento_estados=resumen['recuento_estados'],
+            filter_options=resumen['filter_options'],
+            programas_iniciales=resumen['programas'],
+            total_programas=resumen['total'],
+            page_size=resumen['page_size']
         )
     except Exception as e:
         logger.error(f"Error en dashboard: {str(e)}")
@@ -158,43 +260,138 @@ def dashboard():
         return jsonify({'error': str(e)}), 500
 
 
+def _filtros_programas(args):
+    """Filtros de load_financing_programs a partir de los parámetros de la petición"""
+    return {
+        'organismo': args.get('organismo'),
+        'tipo_ayuda': args.get('tipo_ayuda'),
+        'ambito': args.get('ambito'),
+        'beneficiario': args.get('beneficiario'),
+        'sector': args.get('sector'),
+        'tipo_proyecto': args.get('tipo_proyecto'),
+        'fondos_europeos': args.get('fondos_europeos'),
+        'origen_fondos': args.get('origen_fondos'),  # Compatibilidad hacia atrás
+        'estado': args.get('estado'),
+        'search_term': args.get('search'),
+        'bdns': args.get('bdns'),
+        # Rangos: importes en euros, fechas YYYY-MM-DD
+        'presupuesto_min': args.get('presupuesto_min', type=float),
+        'presupuesto_max': args.get('presupuesto_max', type=float),
+        'importe_min': args.get('importe_min', type=float),
+        'importe_max': args.get('importe_max', type=float),
+        'cierre_desde': args.get('cierre_desde'),
+        'cierre_hasta': args.get('cierre_hasta'),
+        'apertura_desde': args.get('apertura_desde'),
+        'apertura_hasta': args.get('apertura_hasta')
+    }
+
+
+def _respuesta_cacheada(consulta, calcular):
+    """
+    Respuesta JSON servida desde cache_programas
+
+    La clave es la versión del catálogo, la consulta canónica y la
+    codificación que admite el cliente (Accept-Encoding): un acierto devuelve
+    los bytes ya serializados y comprimidos tal cual.
+
+    Args:
+        consulta: Identificador hashable de la consulta (ruta + parámetros)
+        calcular: Función sin argumentos que devuelve (diccionario de la
+            respuesta, versión del catálogo con la que se calculó)
+    """
+    # La versión cambia con cualquier modificación del catálogo
+    version = financing_dashboard.version_catalogo()
+    codificacion = request.accept_encodings.best_match(CODIFICACIONES) or 'identity'
+    entrada = cache_programas.obtener((version, consulta, codificacion))
+    estado_cache = 'HIT'
+
+    if entrada is None:
+        estado_cache = 'MISS'
+        cachear = True
+        base = None
+        if codificacion != 'identity':
+            base = cache_programas.obtener((version, consulta, 'identity'), contar=False)
+        if base is not None:
+            cuerpo = base[1]
+        else:
+            respuesta, version_resultado = calcular()
+            cuerpo = app.json.dumps(respuesta).encode('utf-8')
+            # Si el catálogo cambió mientras tanto, la respuesta no corresponde a la clave
+            cachear = version_resultado == version
+            if cachear:
+                cache_programas.guardar((version, consulta, 'identity'), cuerpo)
+        entrada = comprimir(cuerpo, codificacion, app.config['API_COMPRESSION_MIN_BYTES'])
+        if cachear and codificacion != 'identity':
+            cache_programas.guardar((version, consulta, codificacion), entrada[1], entrada[0])
+
+    codificacion, cuerpo = entrada
+    response = app.response_class(cuerpo, mimetype='application/json')
+    if codificacion != 'identity':
+        response.headers['Content-Encoding'] = codificacion
+    response.vary.add('Accept-Encoding')
+    response.headers['X-Cache'] = estado_cache
+    return response
+
+
 @app.route('/api/programas-financiacion', methods=['GET'])
+@condicional()
 def get_programas():
-    """API para obtener programas con filtros"""
+    """
+    API para obtener programas con filtros
+
+    Además de los filtros admite:
+        sort: fecha_cierre, nombre, presupuesto o estado ('-' delante = descendente)
+            o relevance (por relevancia con la búsqueda de search)
+        page, page_size: paginación (sin page_size se devuelven todos)
+        fields: campos a devolver separados por comas (p. ej. id,nombre,convocatoria.fecha_cierre)
+        facets=1: añade 'facets' con el número de programas por valor de organismo,
+            tipo_ayuda, sector, beneficiario, tipo_proyecto, fondos_europeos y estado
+        open_first=1: con sort por columna, las convocatorias no cerradas primero
+    """
     try:
-        # Obtener parámetros de filtro
-        organismo = request.args.get('organismo')
-        tipo_ayuda = request.args.get('tipo_ayuda')
-        ambito = request.args.get('ambito')
-        beneficiario = request.args.get('beneficiario')
-        sector = request.args.get('sector')
-        tipo_proyecto = request.args.get('tipo_proyecto')
-        fondos_europeos = request.args.get('fondos_europeos')
-        origen_fondos = request.args.get('origen_fondos')  # Compatibilidad hacia atrás
-        estado = request.args.get('estado')
-        search_term = request.args.get('search')
-        bdns = request.args.get('bdns')
-
-        # Cargar programas con filtros
-        programas = financing_dashboard.load_financing_programs(
-            organismo=organismo,
-            tipo_ayuda=tipo_ayuda,
-            ambito=ambito,
-            beneficiario=beneficiario,
-            sector=sector,
-            tipo_proyecto=tipo_proyecto,
-            fondos_europeos=fondos_europeos,
-            origen_fondos=origen_fondos,
-            estado=estado,
-            search_term=search_term,
-            bdns=bdns
-        )
-        
-        return jsonify({
-            'success': True,
-            'programas': programas,
-            'total': len(programas)
-        })
+        page = max(request.args.get('page', 1, type=int), 1)
+        page_size = request.args.get('page_size', type=int)
+        if page_size is not None:
+            page_size = min(max(page_size, 1), app.config['API_MAX_PAGE_SIZE'])
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+        if fields and 'id' not in fields:
+            fields.insert(0, 'id')
+        filtros = _filtros_programas(request.args)
+        sort = request.args.get('sort')
+        facets = request.args.get('facets', '').lower() in ('1', 'true')
+        open_first = request.args.get('open_first', '').lower() in ('1', 'true')
+
+        def calcular():
+            resultado = financing_dashboard.buscar_programas(
+                filtros,
+                sort=sort,
+                page=page,
+                page_size=page_size,
+                fields=fields or None,
+                facets=facets,
+                abiertas_primero=open_first
+            )
+
+            respuesta = {
+                'success': True,
+                'programas': resultado['programas'],
+                'total': resultado['total']
+            }
+            if page_size is not None:
+                respuesta.update({
+                    'page': page,
+                    'page_size': page_size,
+                    'pages': (resultado['total'] + page_size - 1) // page_size
+                })
+            if facets:
+                respuesta['facets'] = resultado['facetas']
+            if 'busqueda_corregida' in resultado:
+                respuesta['busqueda_corregida'] = resultado['busqueda_corregida']
+            return respuesta, resultado['version']
+
+        return _respuesta_cacheada(('programas', clave_consulta(
+            filtros, sort=sort, page=page, page_size=page_size, fields=fields, facets=facets,
+            open_first=open_first)), calcular)
         
     except Exception as e:
         logger.error(f"Error al obtener programas: {str(e)}")
@@ -203,7 +400,117 @@ def get_programas():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# Formatos de /api/programas-financiacion/export -> tipo MIME
+FORMATOS_EXPORTACION = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+@app.route('/api/programas-financiacion/export', methods=['GET'])
+@condicional()
+def export_programas():
+    """
+    Exportación completa de los programas filtrados, enviada en streaming
+
+    Admite los mismos filtros que /api/programas-financiacion y:
+        format: ndjson (un programa JSON por línea, por defecto) o csv (campos
+            anidados aplanados con punto: convocatoria.fecha_cierre)
+        sort: como en /api/programas-financiacion
+        fields: campos a exportar separados por comas (en CSV, las columnas)
+    """
+    try:
+        formato = request.args.get('format', 'ndjson').lower()
+        if formato not in FORMATOS_EXPORTACION:
+            return jsonify({'success': False, 'error': f'Formato no soportado: {formato}'}), 400
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+
+        total, programas = financing_dashboard.exportar_programas(
+            _filtros_programas(request.args),
+            sort=request.args.get('sort'),
+            fields=fields if formato == 'ndjson' else None
+        )
+
+        if formato == 'ndjson':
+            def generar():
+                for programa in programas:
+                    yield app.json.dumps(programa) + '\n'
+        else:
+            columnas = fields or financing_dashboard.COLUMNAS_CSV
+
+            def generar():
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columnas)
+                yield buffer.getvalue()
+                for programa in programas:
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerow(financing_dashboard.fila_csv(programa, columnas))
+                    yield buffer.getvalue()
+
+        response = app.response_class(stream_with_context(generar()),
+                                      mimetype=FORMATOS_EXPORTACION[formato])
+        response.headers['Content-Disposition'] = f'attachment; filename=programas-financiacion.{formato}'
+        response.headers['X-Total-Count'] = str(total)
+        return response
+
+    except Exception as e:
+        logger.error(f"Error al exportar programas: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/dashboard-bootstrap', methods=['GET'])
+@condicional()
+def dashboard_bootstrap():
+    """
+    Datos de arranque del dashboard en una sola petición
+
+    Devuelve 'stats', 'filter_options', las tarjetas ('kpis',
+    'recuento_estados') y la primera página de programas ('programas',
+    'total', 'page_size') calculados por catalog_summary.
+    """
+    try:
+        def calcular():
+            resumen = financing_dashboard.catalog_summary(app.config['DASHBOARD_PAGE_SIZE'])
+            respuesta = {'success': True}
+            respuesta.update((k, v) for k, v in resumen.items() if k != 'version')
+            return respuesta, resumen['version']
+
+        return _respuesta_cacheada(('bootstrap', app.config['DASHBOARD_PAGE_SIZE']), calcular)
+
+    except Exception as e:
+        logger.error(f"Error al obtener datos de arranque del dashboard: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/programas-financiacion/suggest', methods=['GET'])
+def suggest_programas():
+    """
+    Autocompletado del buscador: nombres, organismos, etiquetas y códigos BDNS
+    que empiezan por q (o con alguna palabra que empieza por q)
+
+    Parámetros: q (texto escrito), limit (número de sugerencias)
+    """
+    try:
+        q = request.args.get('q', '').strip()
+        limite = request.args.get('limit', app.config['API_SUGGEST_LIMIT'], type=int)
+        limite = min(max(limite, 1), app.config['API_SUGGEST_MAX_LIMIT'])
+        return jsonify({
+            'success': True,
+            'sugerencias': financing_dashboard.sugerir(q, limite) if q else []
+        })
+    except Exception as e:
+        logger.error(f"Error al obtener sugerencias: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/financiacion/programa/<programa_id>')
+@condicional(privado=True)
 def detalle_programa(programa_id):
     """Vista de detalle de un programa de financiación"""
     try:
@@ -448,6 +755,20 @@ def extraer_desde_pdf_bdns():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _error_validacion(data):
+    """Mensaje de error si al programa le falta algún campo obligatorio (None si es válido)"""
+    # Validar datos requeridos (con compatibilidad para nombre_coloquial)
+    if not data.get('nombre_coloquial') and not data.get('nombre'):
+        return 'Falta el campo: nombre_coloquial o nombre'
+    if not data.get('organismo'):
+        return 'Falta el campo: organismo'
+    # tipo_ayuda puede ser array o string
+    tipo_ayuda = data.get('tipo_ayuda')
+    if not tipo_ayuda or (isinstance(tipo_ayuda, list) and len(tipo_ayuda) == 0):
+        return 'Falta el campo: tipo_ayuda'
+    return None
+
+
 @app.route('/api/guardar-programa', methods=['POST'])
 @login_required
 def guardar_programa():
@@ -455,15 +776,9 @@ def guardar_programa():
     try:
         data = request.get_json()
         
-        # Validar datos requeridos (con compatibilidad para nombre_coloquial)
-        if not data.get('nombre_coloquial') and not data.get('nombre'):
-            return jsonify({'success': False, 'error': 'Falta el campo: nombre_coloquial o nombre'}), 400
-        if not data.get('organismo'):
-            return jsonify({'success': False, 'error': 'Falta el campo: organismo'}), 400
-        # tipo_ayuda puede ser array o string
-        tipo_ayuda = data.get('tipo_ayuda')
-        if not tipo_ayuda or (isinstance(tipo_ayuda, list) and len(tipo_ayuda) == 0):
-            return jsonify({'success': False, 'error': 'Falta el campo: tipo_ayuda'}), 400
+        error = _error_validacion(data)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
         # Guardar en base de datos
         programa_id = financing_dashboard.agregar_programa(data)
@@ -484,8 +799,150 @@ def guardar_programa():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _leer_lote():
+    """
+    Programas del cuerpo de /api/programas/bulk
+
+    Admite un array JSON (o {'programas': [...]}) o NDJSON (un programa por
+    línea, Content-Type application/x-ndjson), que se lee línea a línea.
+
+    Returns:
+        Lista de (programa, error): el programa es None si su línea no es JSON válido
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        elementos = []
+        for linea in request.stream:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                elementos.append((json.loads(linea), None))
+            except ValueError as e:
+                elementos.append((None, f'JSON no válido: {e}'))
+        return elementos
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('programas')
+    if not isinstance(data, list):
+        raise ValueError('El cuerpo debe ser un array JSON de programas o NDJSON')
+    return [(programa, None) for programa in data]
+
+
+def _resumen_duplicado(duplicado, indices_lote):
+    """
+    Datos de un posible duplicado para la respuesta (sin el programa completo)
+
+    Si el duplicado es otro programa del mismo lote (aún sin ID), se indica
+    su posición en 'index'.
+    """
+    programa = duplicado['programa']
+    resumen = {
+        'id': programa.get('id'),
+        'nombre': programa.get('nombre_coloquial') or programa.get('nombre'),
+        'confianza': duplicado['confianza'],
+        'motivo': duplicado['motivo'],
+        'puntuacion': duplicado['puntuacion'],
+        'tipo': duplicado['tipo']
+    }
+    if id(programa) in indices_lote:
+        resumen['index'] = indices_lote[id(programa)]
+    return resumen
+
+
+@app.route('/api/programas/bulk', methods=['POST'])
+@login_required
+def guardar_programas_lote():
+    """
+    Guardar varios programas de una vez
+
+    Cuerpo: array JSON de programas o NDJSON. Cada programa se valida como en
+    /api/guardar-programa y se comprueba con verificar_duplicados frente a los
+    candidatos del índice del catálogo (y frente a los anteriores del lote).
+    Los válidos se guardan con una sola escritura.
+
+    Parámetros:
+        upsert: 1 (por defecto) para que un programa que trae el ID de uno
+            existente lo sustituya; 0 para añadirlo siempre con un ID nuevo.
+            Los programas sin ID siempre se añaden con un ID nuevo
+        on_duplicate: skip (por defecto) no guarda los programas con un
+            duplicado de confianza 'Muy Alta'; import los guarda igualmente
+
+    Devuelve un resultado por programa (status created, updated, skipped o
+    error) con sus posibles duplicados.
+    """
+    try:
+        upsert = request.args.get('upsert', '1').lower() not in ('0', 'false')
+        omitir_duplicados = request.args.get('on_duplicate', 'skip').lower() != 'import'
+        try:
+            elementos = _leer_lote()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if len(elementos) > app.config['API_BULK_MAX_ITEMS']:
+            return jsonify({
+                'success': False,
+                'error': f"Máximo {app.config['API_BULK_MAX_ITEMS']} programas por lote"
+            }), 400
+
+        resultados = []
+        aceptados = []      # (posición en resultados, programa)
+        indices_lote = {}   # id() de cada programa aceptado -> posición en el lote
+        for indice, (programa, error) in enumerate(elementos):
+            resultado = {'index': indice}
+            resultados.append(resultado)
+            if error is None and not isinstance(programa, dict):
+                error = 'Cada programa debe ser un objeto JSON'
+            if error is None:
+                error = _error_validacion(programa)
+            if error:
+                resultado.update(status='error', error=error)
+                continue
+
+            try:
+                candidatos = financing_dashboard.candidatos_duplicado(programa)
+                candidatos += [p for _, p in aceptados]
+                duplicados = convocatoria_extractor.verificar_duplicados(programa, candidatos)
+            except Exception as e:
+                logger.warning(f"Error al verificar duplicados: {str(e)}")
+                duplicados = []
+            # Con upsert, el propio programa que se sustituye no es un duplicado
+            if upsert and programa.get('id'):
+                duplicados = [d for d in duplicados if d['programa'].get('id') != programa['id']]
+            resultado['duplicados'] = [_resumen_duplicado(d, indices_lote) for d in duplicados]
+
+            if omitir_duplicados and any(d['confianza'] == 'Muy Alta' for d in duplicados):
+                resultado['status'] = 'skipped'
+                continue
+            aceptados.append((indice, programa))
+            indices_lote[id(programa)] = indice
+
+        if aceptados:
+            guardados = financing_dashboard.agregar_programas([p for _, p in aceptados], reemplazar=upsert)
+            if guardados is None:
+                return jsonify({'success': False, 'error': 'Error interno al guardar los programas. Revisa los logs.'}), 500
+            for (indice, _), (programa_id, creado) in zip(aceptados, guardados):
+                resultados[indice].update(status='created' if creado else 'updated', id=programa_id)
+
+        resumen = {estado: sum(1 for r in resultados if r['status'] == estado)
+                   for estado in ('created', 'updated', 'skipped', 'error')}
+        logger.info(f"Lote de programas guardado: {resumen}")
+        return jsonify({
+            'success': True,
+            'total': len(resultados),
+            **resumen,
+            'results': resultados
+        })
+
+    except Exception as e:
+        logger.error(f"Error al guardar programas en lote: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/programa/<programa_id>', methods=['GET'])
 @login_required
+@condicional(privado=True)
 def obtener_programa(programa_id):
     """Obtener datos de un programa específico"""
     try:
@@ -511,15 +968,9 @@ def actualizar_programa(programa_id):
     try:
         data = request.get_json()
         
-        # Validar datos requeridos (con compatibilidad para nombre_coloquial)
-        if not data.get('nombre_coloquial') and not data.get('nombre'):
-            return jsonify({'success': False, 'error': 'Falta el campo: nombre_coloquial o nombre'}), 400
-        if not data.get('organismo'):
-            return jsonify({'success': False, 'error': 'Falta el campo: organismo'}), 400
-        # tipo_ayuda puede ser array o string
-        tipo_ayuda = data.get('tipo_ayuda')
-        if not tipo_ayuda or (isinstance(tipo_ayuda, list) and len(tipo_ayuda) == 0):
-            return jsonify({'success': False, 'error': 'Falta el campo: tipo_ayuda'}), 400
+        error = _error_validacion(data)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
         # Actualizar en base de datos
         success = financing_dashboard.actualizar_programa(programa_id, data)
@@ -914,32 +1365,13 @@ def _leer_logs(n=200, nivel='ALL'):
 def _stats_db():
     """Estadísticas de la base de datos de programas."""
     try:
-        programas = financing_dashboard.load_all_financing_programs()
-        hoy = datetime.now().date()
-        abiertos = cerrados = proximos = 0
-        for p in programas:
-            conv = p.get('convocatoria') or {}
-            estado = (conv.get('estado') or '').lower()
-            fc_raw = conv.get('fecha_cierre')
-            if fc_raw and fc_raw not in ('null', None):
-                try:
-                    from datetime import date
-                    fc = datetime.fromisoformat(str(fc_raw).split('T')[0]).date()
-                    if fc >= hoy:
-                        abiertos += 1
-                    else:
-                        cerrados += 1
-                    continue
-                except Exception:
-                    pass
-            if 'cerrada' in estado:
-                cerrados += 1
-            elif 'abierta' in estado or 'cierre' in estado:
-                abiertos += 1
-            else:
-                proximos += 1
-        return {'total': len(programas), 'abiertos': abiertos,
-                'cerrados': cerrados, 'proximos': proximos}
+        # Los estados ya vienen calculados por el catálogo (sin parsear fechas aquí)
+        stats = financing_dashboard.get_financing_stats()
+        estados = stats['estados']
+        abiertos = estados.get('Abierta', 0) + estados.get('Cierre próximo', 0)
+        cerrados = estados.get('Cerrada', 0)
+        return {'total': stats['total'], 'abiertos': abiertos,
+                'cerrados': cerrados, 'proximos': stats['total'] - abiertos - cerrados}
     except Exception as e:
         return {'total': 0, 'abiertos': 0, 'cerrados': 0, 'proximos': 0, 'error': str(e)}
 
@@ -958,6 +1390,7 @@ def panel_stats_api():
     return jsonify({
         'sistema':  _leer_sistema(),
         'db':       _stats_db(),
+        'cache':    cache_programas.estadisticas(),
         'logs':     _leer_logs(n_logs, nivel),
         'timestamp': datetime.now().strftime('%H:%M:%S'),
     })
@@ -13,9 +13,15 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     PERMANENT_SESSION_LIFETIME = timedelta(hours=12)
     
-    # Base de datos (JSON file)
+    # Base de datos: archivo JSON, o SQLite si la ruta termina en .db/.sqlite/.sqlite3
+    # (importación inicial: python -m utils.financing_storage importar <json> <db>)
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     DATABASE_PATH = os.environ.get('DATABASE_PATH') or os.path.join(BASE_DIR, 'data', 'programas_financiacion.json')
+    # Copia binaria (marshal) del JSON para acelerar el arranque de los workers
+    CATALOG_BINARY_SNAPSHOT = os.environ.get('CATALOG_BINARY_SNAPSHOT', '1') == '1'
+    # Motor de filtrado del catálogo: 'bitset' o 'numpy' (columnar, para catálogos
+    # históricos grandes; necesita NumPy, si no está instalado se usa 'bitset')
+    CATALOG_ENGINE = os.environ.get('CATALOG_ENGINE', 'bitset')
     
     # Google Gemini AI
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
@@ -37,6 +43,21 @@ class Config:
     
     # URLs
     BDNS_BASE_URL = 'https://www.infosubvenciones.es/bdnstrans/'
+    
+    # API pública de programas: tamaño máximo de página (page_size)
+    API_MAX_PAGE_SIZE = 100
+    # Caché LRU (por worker) de respuestas de /api/programas-financiacion
+    API_CACHE_ENTRIES = int(os.environ.get('API_CACHE_ENTRIES', 256))
+    API_CACHE_MAX_BYTES = int(os.environ.get('API_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # Las respuestas más pequeñas se envían sin comprimir
+    API_COMPRESSION_MIN_BYTES = 1024
+    # Autocompletado (/api/programas-financiacion/suggest): sugerencias por defecto y máximo
+    API_SUGGEST_LIMIT = 8
+    API_SUGGEST_MAX_LIMIT = 20
+    # Dashboard: tarjetas por página (la primera va en el HTML, el resto por scroll)
+    DASHBOARD_PAGE_SIZE = 24
+    # Programas por petición en /api/programas/bulk
+    API_BULK_MAX_ITEMS = 1000
 
 
 class DevelopmentConfig(Config):
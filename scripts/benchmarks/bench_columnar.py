@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los motores de filtrado: bitsets (FacetIndex) frente a NumPy (ColumnarIndex)
+
+Para 10k, 50k y 100k programas mide la construcción del índice, un filtro
+combinado (categorías + rango de importe + rango de fechas) con una página
+ordenada por fecha de cierre, y los recuentos de las estadísticas.
+
+Necesita NumPy. Uso: python scripts/benchmarks/bench_columnar.py [tamaño ...]
+"""
+import sys
+from datetime import datetime, timedelta
+
+from comun import generar_programas, medir
+
+from utils.financing_dashboard import (COLUMNAS_FACETAS, COLUMNAS_RANGO, _procesar_programa,
+                                       _actualizar_estado_convocatoria, _seleccionar)
+from utils.financing_columnar import ColumnarIndex, NUMPY_AVAILABLE
+from utils.financing_index import FacetIndex
+from utils.financing_record import ProgramRecord
+
+TAMANOS_COLUMNAR = (10000, 50000, 100000)
+
+
+def consulta(indice, ahora):
+    """Filtro combinado y primera página ordenada por fecha de cierre"""
+    seleccion = _seleccionar(indice, sector='TIC', estado='abierta', importe_min=30000.0,
+                             cierre_desde=ahora, cierre_hasta=ahora + timedelta(days=90))
+    return indice.contar(seleccion), indice.registros_ordenados(seleccion, 'fecha_cierre', limite=20)
+
+
+def estadisticas(indice):
+    """Recuentos por valor de las columnas de las estadísticas"""
+    return [indice.valores(c) for c in ('estado', 'tipo_ayuda_grupo', 'ambito', 'organismo_grupo')]
+
+
+def main():
+    if not NUMPY_AVAILABLE:
+        print("NumPy no está instalado")
+        return
+    tamanos = [int(t) for t in sys.argv[1:]] or TAMANOS_COLUMNAR
+    print(f"{'programas':>10} {'motor':>8} {'construir':>10} {'consulta':>10} {'estadísticas':>13}")
+
+    for n in tamanos:
+        ahora = datetime.now()
+        programas = generar_programas(n)
+        for programa in programas:
+            _procesar_programa(programa)
+            _actualizar_estado_convocatoria(programa, ahora)
+        elementos = [(p['id'], ProgramRecord(p)) for p in programas]
+
+        resultados = []
+        for motor, clase in (('bitset', FacetIndex), ('numpy', ColumnarIndex)):
+            indice = clase(COLUMNAS_FACETAS, COLUMNAS_RANGO)
+            # La compilación a arrays del motor columnar se hace en la primera consulta
+            t_construir = medir(lambda: (indice.reconstruir(elementos), indice.contar(indice.todos()),
+                                         indice.bits('estado', None)), repeticiones=1)
+            t_consulta = medir(lambda: consulta(indice, ahora))
+            t_estadisticas = medir(lambda: estadisticas(indice))
+            total, pagina = consulta(indice, ahora)
+            resultados.append((total, [r.id for r in pagina], estadisticas(indice)))
+            print(f"{n:>10} {motor:>8} {t_construir:>8.1f}ms {t_consulta:>8.2f}ms {t_estadisticas:>11.2f}ms")
+        assert resultados[0] == resultados[1]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la corrección de erratas: recorrido completo frente a trigramas
+
+Para 1k, 10k y 50k programas compara el tiempo de encontrar la palabra más
+parecida a cada consulta comparándola con todas las palabras de los nombres y
+organismos (difflib, como las funciones de similitud del extractor) con el
+índice de trigramas, que solo puntúa las palabras con trigramas en común.
+
+Uso: python scripts/benchmarks/bench_erratas.py [tamaño ...]
+"""
+import sys
+from datetime import datetime
+from difflib import SequenceMatcher
+
+from comun import TAMANOS, generar_programas, medir
+
+from utils.financing_dashboard import CAMPOS_TRIGRAMAS, _procesar_programa, _actualizar_estado_convocatoria
+from utils.financing_record import ProgramRecord
+from utils.financing_trigram import TrigramIndex
+
+CONSULTAS = ['neotek', 'cheqe inovacion', 'indsutria', 'digitalisacion pymes']
+
+
+def corregir_recorriendo(vocabulario, texto):
+    """Corrección comparando cada palabra con todo el vocabulario"""
+    return ' '.join(palabra if palabra in vocabulario else
+                    max(vocabulario, key=lambda v: SequenceMatcher(None, palabra, v).ratio())
+                    for palabra in texto.split())
+
+
+def main():
+    tamanos = [int(t) for t in sys.argv[1:]] or TAMANOS
+    print(f"{'programas':>10} {'vocabulario':>12} {'construir':>10} {'recorrido':>10} {'trigramas':>10}")
+
+    for n in tamanos:
+        ahora = datetime.now()
+        programas = generar_programas(n)
+        for programa in programas:
+            _procesar_programa(programa)
+            _actualizar_estado_convocatoria(programa, ahora)
+        elementos = [(p['id'], ProgramRecord(p)) for p in programas]
+
+        indice = TrigramIndex(CAMPOS_TRIGRAMAS)
+        t_construir = medir(lambda: indice.reconstruir(elementos), repeticiones=1)
+        vocabulario = set(indice._programas)
+
+        t_recorrido = medir(lambda: [corregir_recorriendo(vocabulario, q) for q in CONSULTAS], repeticiones=1)
+        t_trigramas = medir(lambda: [indice.corregir(q) for q in CONSULTAS])
+        print(f"{n:>10} {len(vocabulario):>12} {t_construir:>8.1f}ms "
+              f"{t_recorrido / len(CONSULTAS):>8.2f}ms {t_trigramas / len(CONSULTAS):>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark de filtrado por facetas: listas por comprensión frente a bitsets
+
+Compara, para 1k, 10k y 100k programas y 1, 4 y 7 filtros activos, el
+filtrado anterior (una lista por comprensión por filtro sobre diccionarios)
+con el índice de facetas (AND/OR de bitsets y materializar una página de 20).
+
+Uso: python scripts/benchmarks/bench_facetas.py [tamaño ...]
+"""
+import sys
+from datetime import datetime
+
+from comun import generar_programas, medir
+
+from utils.financing_dashboard import COLUMNAS_FACETAS, _procesar_programa, _actualizar_estado_convocatoria
+from utils.financing_index import FacetIndex
+from utils.financing_record import ProgramRecord
+
+TAMANOS_FACETAS = (1000, 10000, 100000)
+
+# (filtro, valor) en el orden en que se activan
+FILTROS = [
+    ('sector', 'TIC'),
+    ('estado', 'abierta'),
+    ('organismo', 'CDTI'),
+    ('beneficiario', 'PYMES'),
+    ('tipo_ayuda', 'Subvención'),
+    ('fondos_europeos', 'FEDER'),
+    ('tipo_proyecto', 'I+D+i'),
+]
+
+
+def filtrar_listas(programas, filtros):
+    """Filtrado anterior: una lista nueva por cada filtro"""
+    for filtro, valor in filtros:
+        if filtro == 'organismo':
+            programas = [p for p in programas if p.get('organismo') == valor or p.get('organismo_grupo') == valor]
+        elif filtro == 'tipo_ayuda':
+            programas = [p for p in programas if p.get('tipo_ayuda') == valor or p.get('tipo_ayuda_grupo') == valor]
+        elif filtro == 'beneficiario':
+            programas = [p for p in programas if
+                         (isinstance(p.get('beneficiarios'), list) and valor in p['beneficiarios']) or
+                         valor in p.get('beneficiarios_grupos', [])]
+        elif filtro == 'sector':
+            programas = [p for p in programas if
+                         (isinstance(p.get('sectores'), list) and valor in p['sectores']) or
+                         valor in p.get('sectores_grupos', [])]
+        elif filtro == 'tipo_proyecto':
+            programas = [p for p in programas if
+                         (isinstance(p.get('tipo_proyecto'), list) and valor in p['tipo_proyecto']) or
+                         (isinstance(p.get('tipo_proyecto'), str) and valor.lower() in p['tipo_proyecto'].lower())]
+        elif filtro == 'fondos_europeos':
+            programas = [p for p in programas if
+                         isinstance(p.get('fondos_europeos'), list) and valor in p['fondos_europeos']]
+        elif filtro == 'estado':
+            programas = [p for p in programas if 'convocatoria' in p and p['convocatoria'].get('estado') and
+                         valor in p['convocatoria']['estado'].lower()]
+    return programas[:20], len(programas)
+
+
+def filtrar_bitsets(indice, filtros):
+    """Filtrado con el índice de facetas"""
+    seleccion = indice.todos()
+    for filtro, valor in filtros:
+        if filtro == 'organismo':
+            seleccion &= indice.bits('organismo', valor) | indice.bits('organismo_grupo', valor)
+        elif filtro == 'tipo_ayuda':
+            seleccion &= indice.bits('tipo_ayuda', valor) | indice.bits('tipo_ayuda_grupo', valor)
+        elif filtro == 'beneficiario':
+            seleccion &= indice.bits('beneficiarios', valor) | indice.bits('beneficiarios_grupos', valor)
+        elif filtro == 'sector':
+            seleccion &= indice.bits('sectores', valor) | indice.bits('sectores_grupos', valor)
+        elif filtro == 'tipo_proyecto':
+            seleccion &= (indice.bits('tipo_proyecto_lista', valor) |
+                          indice.bits_donde('tipo_proyecto_texto', lambda v: valor.lower() in v.lower()))
+        elif filtro == 'fondos_europeos':
+            seleccion &= indice.bits('fondos_europeos', valor)
+        elif filtro == 'estado':
+            seleccion &= indice.bits_donde('estado', lambda v: valor in v.lower())
+    return indice.registros(seleccion, 0, 20), indice.contar(seleccion)
+
+
+def main():
+    tamanos = [int(t) for t in sys.argv[1:]] or TAMANOS_FACETAS
+    activos = (1, 4, 7)
+    cabecera = ''.join(f" {f'{n} filtro(s)':>22}" for n in activos)
+    print(f"{'programas':>10} {'construir':>10}{cabecera}")
+    print(f"{'':>10} {'':>10}" + ''.join(f" {'listas':>10} {'bitsets':>11}" for _ in activos))
+
+    for n in tamanos:
+        ahora = datetime.now()
+        programas = generar_programas(n)
+        for programa in programas:
+            _procesar_programa(programa)
+            _actualizar_estado_convocatoria(programa, ahora)
+        elementos = [(p['id'], ProgramRecord(p)) for p in programas]
+
+        indice = FacetIndex(COLUMNAS_FACETAS)
+        t_construir = medir(lambda: indice.reconstruir(elementos), repeticiones=1)
+
+        fila = f"{n:>10} {t_construir:>8.1f}ms"
+        for k in activos:
+            filtros = FILTROS[:k]
+            assert filtrar_listas(programas, filtros)[1] == filtrar_bitsets(indice, filtros)[1]
+            t_listas = medir(lambda: filtrar_listas(programas, filtros))
+            t_bitsets = medir(lambda: filtrar_bitsets(indice, filtros))
+            fila += f" {t_listas:>8.2f}ms {t_bitsets:>9.2f}ms"
+        print(fila)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío del catálogo: JSON frente a instantánea marshal
+
+Para 1k, 10k y 50k programas mide json.load del archivo completo, marshal.load
+de la copia binaria y JsonStorage.cargar() con y sin instantánea binaria (lo
+que paga cada worker de gunicorn al arrancar).
+
+Uso: python scripts/benchmarks/bench_instantanea.py [tamaño ...]
+"""
+import os
+import sys
+import json
+import marshal
+import tempfile
+
+from comun import TAMANOS, generar_programas, escribir_catalogo, medir
+
+from utils.financing_storage import JsonStorage
+
+
+def main():
+    tamanos = [int(t) for t in sys.argv[1:]] or TAMANOS
+    print(f"{'programas':>10} {'MB json':>8} {'MB bin':>7} {'json.load':>10} {'marshal':>9} "
+          f"{'cargar json':>12} {'cargar bin':>11} {'mejora':>7}")
+
+    for n in tamanos:
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'programas_financiacion.json')
+            escribir_catalogo(ruta, generar_programas(n))
+
+            almacen_json = JsonStorage(ruta, instantanea_binaria=False)
+            almacen_bin = JsonStorage(ruta, instantanea_binaria=True)
+            almacen_bin.cargar()  # genera la copia .bin
+            ruta_bin = almacen_bin.ruta_binaria
+
+            def leer_json():
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    json.load(f)
+
+            def leer_marshal():
+                with open(ruta_bin, 'rb') as f:
+                    marshal.loads(f.read())
+
+            t_json = medir(leer_json)
+            t_marshal = medir(leer_marshal)
+            t_cargar_json = medir(almacen_json.cargar)
+            t_cargar_bin = medir(almacen_bin.cargar)
+
+            print(f"{n:>10} {os.path.getsize(ruta) / 1e6:>8.1f} {os.path.getsize(ruta_bin) / 1e6:>7.1f} "
+                  f"{t_json:>8.1f}ms {t_marshal:>7.1f}ms {t_cargar_json:>10.1f}ms {t_cargar_bin:>9.1f}ms "
+                  f"{t_cargar_json / t_cargar_bin:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
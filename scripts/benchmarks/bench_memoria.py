@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria: programas como diccionarios frente a ProgramRecord
+
+Para 1k, 10k y 50k programas mide con tracemalloc lo que ocupa el catálogo de
+un worker con la representación anterior (diccionarios anidados ya
+procesados) y con ProgramRecord, y el tiempo de un filtro típico sobre cada una.
+
+Uso: python scripts/benchmarks/bench_memoria.py [tamaño ...]
+"""
+import sys
+import json
+import gc
+import tracemalloc
+
+from comun import TAMANOS, generar_programas, medir
+
+from utils.financing_dashboard import _procesar_programa, _actualizar_estado_convocatoria
+from utils.financing_record import ProgramRecord
+
+
+def cargar_diccionarios(texto):
+    """Reproduce la carga anterior: JSON parseado, procesado y con estado"""
+    programas = json.loads(texto)
+    for programa in programas:
+        _procesar_programa(programa)
+        _actualizar_estado_convocatoria(programa)
+    return programas
+
+
+def memoria(construir):
+    """Devuelve (objeto, MB retenidos) al construir el objeto"""
+    gc.collect()
+    tracemalloc.start()
+    objeto = construir()
+    gc.collect()
+    ocupado = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objeto, ocupado / 1e6
+
+
+def main():
+    tamanos = [int(t) for t in sys.argv[1:]] or TAMANOS
+    print(f"{'programas':>10} {'MB dict':>8} {'MB registro':>12} {'ahorro':>7} "
+          f"{'filtro dict':>12} {'filtro registro':>16}")
+
+    for n in tamanos:
+        texto = json.dumps(generar_programas(n), ensure_ascii=False)
+
+        diccionarios, mb_dict = memoria(lambda: cargar_diccionarios(texto))
+        registros, mb_registro = memoria(
+            lambda: [ProgramRecord(p) for p in cargar_diccionarios(texto)])
+
+        # Filtro equivalente a ?sector=TIC&estado=abierta
+        def filtrar_dict():
+            return [p for p in diccionarios
+                    if ((isinstance(p.get('sectores'), list) and 'TIC' in p['sectores']) or
+                        'TIC' in p.get('sectores_grupos', [])) and
+                    'convocatoria' in p and p['convocatoria'].get('estado') and
+                    'abierta' in p['convocatoria']['estado'].lower()]
+
+        def filtrar_registro():
+            return [r for r in registros
+                    if ((r.sectores is not None and 'TIC' in r.sectores) or 'TIC' in r.sectores_grupos) and
+                    r.estado and 'abierta' in r.estado.lower()]
+
+        assert len(filtrar_dict()) == len(filtrar_registro())
+        t_dict = medir(filtrar_dict)
+        t_registro = medir(filtrar_registro)
+
+        print(f"{n:>10} {mb_dict:>8.1f} {mb_registro:>12.1f} {1 - mb_registro / mb_dict:>6.0%} "
+              f"{t_dict:>10.2f}ms {t_registro:>14.2f}ms")
+        del diccionarios, registros
+
+
+if __name__ == '__main__':
+    main()
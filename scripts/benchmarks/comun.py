@@ -0,0 +1,98 @@
+"""
+Utilidades compartidas por los benchmarks del catálogo de financiación
+
+Genera catálogos sintéticos con la misma forma que data/programas_financiacion.json
+(mezcla de formatos de fecha, importes como texto o número, listas o cadenas...)
+para medir sin depender de los datos reales.
+"""
+import os
+import sys
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+# Permite ejecutar los scripts directamente: python scripts/benchmarks/<script>.py
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+TAMANOS = (1000, 10000, 50000)
+
+ORGANISMOS = ['CDTI', 'Ministerio de Ciencia, Innovación y Universidades', 'IDEPA',
+              'Ayuntamiento de Gijón', 'ENISA', 'Red.es', 'Principado de Asturias', 'ICO']
+TIPOS_AYUDA = ['Subvención', 'Préstamo participativo', 'Capital Riesgo', 'Aval',
+               'Ayuda en especie (Asesoramiento)', 'Otro']
+SECTORES = ['TIC', 'General', 'Industrial', 'Salud Digital', 'Turismo', 'Pesca', 'Aeroespacial']
+BENEFICIARIOS = ['PYMES', 'Startups', 'Autónomos', 'Grandes Empresas', 'Emprendedores',
+                 'Cooperativas', 'Ayuntamientos']
+TIPOS_PROYECTO = ['I+D+i', 'Digitalización', 'Contratación', 'Internacionalización', 'General']
+FONDOS = ['FEDER', 'FEMPA', 'Next Generation', 'Otros']
+AMBITOS = ['Europeo', 'Nacional', 'Autonómico', 'Local']
+PALABRAS = ('subvención digitalización pyme innovación industria energía neotec cheque '
+            'tecnológica empresas proyectos ayudas financiación investigación desarrollo '
+            'sostenibilidad exportación contratación jóvenes').split()
+
+
+def generar_programa(i, rnd, ahora=None):
+    """Devuelve un programa sintético con ID prog-<i>"""
+    ahora = ahora or datetime.now()
+    apertura = ahora + timedelta(days=rnd.randint(-200, 60))
+    cierre = apertura + timedelta(days=rnd.randint(5, 120))
+    formato = rnd.choice(['%Y-%m-%d', '%Y-%m-%d %H:%M:%S'])
+    convocatoria = {'estado': rnd.choice(['Abierta', 'Pendiente', 'Cerrada'])}
+    if rnd.random() < 0.9:
+        convocatoria['fecha_apertura'] = apertura.strftime(formato)
+        convocatoria['fecha_cierre'] = cierre.strftime(formato)
+
+    return {
+        'id': f'prog-{i}',
+        'nombre': ' '.join(rnd.sample(PALABRAS, 5)) + f' {i}',
+        'nombre_coloquial': rnd.choice(PALABRAS).title() + f' {i}',
+        'organismo': rnd.choice(ORGANISMOS),
+        'tipo_ayuda': rnd.choice([rnd.choice(TIPOS_AYUDA), [rnd.choice(TIPOS_AYUDA)]]),
+        'ambito': rnd.choice(AMBITOS),
+        'beneficiarios': rnd.sample(BENEFICIARIOS, 2),
+        'sectores': rnd.sample(SECTORES, 2),
+        'tipo_proyecto': rnd.choice([rnd.sample(TIPOS_PROYECTO, 2), rnd.choice(TIPOS_PROYECTO)]),
+        'fondos_europeos': rnd.sample(FONDOS, 1),
+        'codigo_bdns': rnd.choice([str(700000 + i), 700000 + i, None]),
+        'resumen_breve': ' '.join(rnd.choices(PALABRAS, k=12)),
+        'descripcion_detallada': ' '.join(rnd.choices(PALABRAS, k=80)),
+        'requisitos': [' '.join(rnd.choices(PALABRAS, k=6)) for _ in range(3)],
+        'tags': rnd.sample(PALABRAS, 3),
+        'convocatoria': convocatoria,
+        'financiacion': {
+            'presupuesto_minimo': rnd.choice([str(rnd.randint(1, 100) * 1000), rnd.randint(1, 100) * 1000, None]),
+            'presupuesto_maximo': rnd.choice([str(rnd.randint(100, 900) * 1000), None]),
+            'importe_maximo': rnd.randint(1, 9) * 10000,
+        },
+    }
+
+
+def generar_programas(n, semilla=1):
+    """Devuelve una lista de n programas sintéticos reproducibles"""
+    rnd = random.Random(semilla)
+    ahora = datetime.now()
+    return [generar_programa(i, rnd, ahora) for i in range(n)]
+
+
+def escribir_catalogo(ruta, programas):
+    """Escribe los programas con el mismo formato que el JSON de la aplicación"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({
+            'programas': programas,
+            'ultima_actualizacion': datetime.now().isoformat(),
+            'total_programas': len(programas),
+        }, f, ensure_ascii=False, indent=4)
+
+
+def medir(funcion, repeticiones=5):
+    """Ejecuta funcion varias veces y devuelve el mejor tiempo en milisegundos"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        transcurrido = (time.perf_counter() - inicio) * 1000
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
@@ -0,0 +1,79 @@
+"""
+Pruebas de /api/programas/bulk
+
+Se saltan si no están instaladas todas las dependencias de app.py.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+app_module = pytest.importorskip('app')
+
+from utils import financing_dashboard
+from utils.financing_storage import crear_almacen
+
+
+def _programa(nombre, organismo, **datos):
+    return {'nombre': nombre, 'organismo': organismo, 'tipo_ayuda': 'Subvención', **datos}
+
+
+@pytest.fixture
+def cliente(tmp_path):
+    ruta = str(tmp_path / 'programas.json')
+    crear_almacen(ruta).agregar_varios([
+        (_programa('Cheque Digital', 'IDEPA', nombre_oficial='Cheques de digitalización IDEPA'),
+         'cheque-digital', True),
+    ])
+    financing_dashboard.configurar_almacenamiento(ruta)
+
+    cliente = app_module.app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['admin_logged_in'] = True
+    return cliente
+
+
+def test_bulk_sin_id_nunca_sustituye(cliente):
+    respuesta = cliente.post('/api/programas/bulk?on_duplicate=import', json=[
+        _programa('Cheque Digital', 'Ayuntamiento de Gijón', nombre_oficial='Bono digital Gijón'),
+        _programa('Neotec', 'CDTI'),
+        _programa('Neotec', 'CDTI'),
+    ])
+    data = respuesta.get_json()
+
+    assert respuesta.status_code == 200
+    assert [(r['status'], r['id']) for r in data['results']] == [
+        ('created', 'cheque-digital-1'),
+        ('created', 'neotec'),
+        ('created', 'neotec-1'),
+    ]
+    assert financing_dashboard.get_programa_by_id('cheque-digital')['organismo'] == 'IDEPA'
+    assert financing_dashboard.get_programa_by_id('cheque-digital-1')['organismo'] == 'Ayuntamiento de Gijón'
+
+
+def test_bulk_con_id_sustituye(cliente):
+    respuesta = cliente.post('/api/programas/bulk', json=[
+        _programa('Cheque Digital 2027', 'IDEPA', id='cheque-digital'),
+    ])
+    data = respuesta.get_json()
+
+    assert (data['updated'], data['created']) == (1, 0)
+    assert data['results'][0]['id'] == 'cheque-digital'
+    assert financing_dashboard.get_programa_by_id('cheque-digital')['nombre'] == 'Cheque Digital 2027'
+
+
+def test_bulk_sin_upsert_anade(cliente):
+    respuesta = cliente.post('/api/programas/bulk?upsert=0&on_duplicate=import', json=[
+        _programa('Cheque Digital 2027', 'IDEPA', id='cheque-digital'),
+    ])
+    data = respuesta.get_json()
+
+    assert data['results'][0]['status'] == 'created'
+    assert data['results'][0]['id'] != 'cheque-digital'
+    assert financing_dashboard.get_programa_by_id('cheque-digital')['nombre'] == 'Cheque Digital'
+
+
+def test_bulk_cuerpo_no_valido(cliente):
+    assert cliente.post('/api/programas/bulk', json={'a': 1}).status_code == 400
@@ -0,0 +1,83 @@
+"""
+Pruebas de exportar_programas
+
+En el orden del almacén los registros se leen por lotes mientras se itera;
+con una ordenación, la selección se resuelve al llamar.
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'scripts', 'benchmarks'))
+
+from comun import generar_programa
+
+from utils import financing_dashboard as fd
+from utils.financing_columnar import NUMPY_AVAILABLE, ColumnarIndex
+from utils.financing_index import FacetIndex
+
+
+@pytest.fixture(params=['bitset', pytest.param('numpy', marks=pytest.mark.skipif(
+    not NUMPY_AVAILABLE, reason='NumPy no está instalado'))])
+def catalogo(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(fd, 'LOTE_EXPORTACION', 10)
+    rnd = random.Random(3)
+    programas = [generar_programa(i, rnd) for i in range(45)]
+    ruta = tmp_path / 'programas.json'
+    ruta.write_text(json.dumps({'programas': programas}, ensure_ascii=False), encoding='utf-8')
+    fd.configurar_almacenamiento(str(ruta), False, request.param)
+    return fd.get_catalogo()
+
+
+def _ids(programas):
+    return [p['id'] for p in programas]
+
+
+def test_orden_del_almacen(catalogo):
+    total, programas = fd.exportar_programas({'estado': 'Cerrada'})
+    esperados = fd.buscar_programas({'estado': 'Cerrada'})
+
+    assert total == esperados['total']
+    assert _ids(programas) == _ids(esperados['programas'])
+
+
+def test_orden_del_almacen_con_cambios_entre_lotes(catalogo):
+    total, programas = fd.exportar_programas()
+    primeros = [next(programas) for _ in range(15)]
+
+    programa = fd.get_programa_by_id('prog-20')
+    programa['nombre'] = 'Cambiado durante la exportación'
+    fd.actualizar_programa('prog-20', programa)
+    fd.eliminar_programa('prog-30')
+    resto = list(programas)
+
+    assert total == 45
+    assert _ids(primeros + resto) == [f'prog-{i}' for i in range(45) if i != 30]
+    assert resto[5]['nombre'] == 'Cambiado durante la exportación'
+
+
+def test_orden_del_almacen_falla_si_se_reconstruye_el_indice(catalogo, monkeypatch):
+    monkeypatch.setattr(FacetIndex, 'MINIMO_HUECOS_COMPACTAR', 1)
+    if NUMPY_AVAILABLE:
+        monkeypatch.setattr(ColumnarIndex, 'MINIMO_HUECOS_COMPACTAR', 1)
+    _, programas = fd.exportar_programas()
+    next(programas)
+
+    for i in range(30):
+        fd.eliminar_programa(f'prog-{i}')
+
+    with pytest.raises(RuntimeError):
+        list(programas)
+
+
+def test_ordenado(catalogo):
+    total, programas = fd.exportar_programas(sort='-presupuesto', fields=['id'])
+    esperados = fd.buscar_programas(sort='-presupuesto', fields=['id'])
+
+    assert total == 45
+    assert list(programas) == esperados['programas']
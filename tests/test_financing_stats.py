@@ -0,0 +1,142 @@
+"""
+Pruebas de las estadísticas y opciones de filtro del dashboard
+
+Deben coincidir con los de la implementación anterior, que recorría los
+programas uno a uno (incluida la clave None de 'ambitos').
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'scripts', 'benchmarks'))
+
+from comun import generar_programa
+
+from utils import financing_dashboard as fd
+from utils.financing_columnar import NUMPY_AVAILABLE
+
+
+def _stats_anteriores(programas):
+    """get_financing_stats recorriendo los programas"""
+    estados = {'Abierta': 0, 'Cerrada': 0, 'Próxima apertura': 0, 'Cierre próximo': 0}
+    for p in programas:
+        if 'convocatoria' in p and 'estado' in p['convocatoria']:
+            estado = p['convocatoria']['estado']
+            if estado == 'Cierre próximo':
+                estados['Cierre próximo'] += 1
+            elif estado == 'Próxima apertura':
+                estados['Próxima apertura'] += 1
+            elif 'Abierta' in estado:
+                estados['Abierta'] += 1
+            elif 'Cerrada' in estado:
+                estados['Cerrada'] += 1
+
+    tipos_ayuda, ambitos, organismos = {}, {}, {}
+    for p in programas:
+        grupo = p.get('tipo_ayuda_grupo', 'Otros')
+        tipos_ayuda[grupo] = tipos_ayuda.get(grupo, 0) + 1
+        if 'ambito' in p:
+            ambitos[p['ambito']] = ambitos.get(p['ambito'], 0) + 1
+        grupo = p.get('organismo_grupo', 'Otros')
+        organismos[grupo] = organismos.get(grupo, 0) + 1
+
+    return {'total': len(programas), 'estados': estados, 'tipos_ayuda': tipos_ayuda,
+            'ambitos': ambitos, 'organismos': organismos}
+
+
+def _opciones_anteriores(programas):
+    """get_financing_filter_options recorriendo los programas"""
+    organismos, tipos_ayuda, ambitos, beneficiarios = set(), set(), set(), set()
+    sectores, tipos_proyecto, origenes_fondos, estados = set(), set(), set(), set()
+    for p in programas:
+        if p.get('organismo'):
+            organismos.add(p['organismo'])
+        elif 'organismo_grupo' in p:
+            organismos.add(p['organismo_grupo'])
+        if p.get('tipo_ayuda'):
+            if isinstance(p['tipo_ayuda'], list):
+                tipos_ayuda.update(t for t in p['tipo_ayuda'] if t)
+            else:
+                tipos_ayuda.add(p['tipo_ayuda'])
+        elif 'tipo_ayuda_grupo' in p:
+            tipos_ayuda.add(p['tipo_ayuda_grupo'])
+        if p.get('ambito'):
+            ambitos.add(p['ambito'])
+        if isinstance(p.get('beneficiarios'), list):
+            beneficiarios.update(b for b in p['beneficiarios'] if b)
+        elif 'beneficiarios_grupos' in p:
+            beneficiarios.update(p['beneficiarios_grupos'])
+        if isinstance(p.get('sectores'), list):
+            sectores.update(s for s in p['sectores'] if s)
+        elif 'sectores_grupos' in p:
+            sectores.update(p['sectores_grupos'])
+        if isinstance(p.get('tipo_proyecto'), list):
+            tipos_proyecto.update(t for t in p['tipo_proyecto'] if t)
+        elif p.get('tipo_proyecto'):
+            tipos_proyecto.add(p['tipo_proyecto'])
+        if isinstance(p.get('fondos_europeos'), list):
+            origenes_fondos.update(f for f in p['fondos_europeos'] if f)
+        elif p.get('origen_fondos'):
+            origenes_fondos.add(p['origen_fondos'])
+        if 'convocatoria' in p and 'estado' in p['convocatoria']:
+            estados.add(p['convocatoria']['estado'])
+
+    def con_otros_al_final(valores):
+        return sorted(v for v in valores if v != 'Otros') + (['Otros'] if 'Otros' in valores else [])
+
+    return {
+        'organismos': con_otros_al_final(organismos),
+        'tipos_ayuda': con_otros_al_final(tipos_ayuda),
+        'ambitos': sorted(ambitos),
+        'beneficiarios': con_otros_al_final(beneficiarios),
+        'sectores': con_otros_al_final(sectores),
+        'tipos_proyecto': con_otros_al_final(tipos_proyecto),
+        'origenes_fondos': con_otros_al_final(origenes_fondos),
+        'estados': sorted(estados),
+    }
+
+
+@pytest.fixture(params=['bitset', pytest.param('numpy', marks=pytest.mark.skipif(
+    not NUMPY_AVAILABLE, reason='NumPy no está instalado'))])
+def catalogo(request, tmp_path):
+    rnd = random.Random(5)
+    programas = [generar_programa(i, rnd) for i in range(300)]
+    # Casos límite: ámbito null, sin ámbito, sin organismo, sin convocatoria
+    programas[0]['ambito'] = None
+    programas[1]['ambito'] = None
+    del programas[2]['ambito']
+    programas[3]['organismo'] = ''
+    del programas[4]['convocatoria']
+    programas[5]['origen_fondos'] = 'FEDER'
+    del programas[5]['fondos_europeos']
+
+    ruta = tmp_path / 'programas.json'
+    ruta.write_text(json.dumps({'programas': programas}, ensure_ascii=False), encoding='utf-8')
+    fd.configurar_almacenamiento(str(ruta), False, request.param)
+    return fd.get_catalogo()
+
+
+def test_stats_iguales_a_recorrer_programas(catalogo):
+    stats = fd.get_financing_stats()
+
+    assert stats == _stats_anteriores(fd.load_all_financing_programs())
+    assert stats['ambitos'][None] == 2
+    assert sum(stats['ambitos'].values()) == stats['total'] - 1
+
+
+def test_opciones_iguales_a_recorrer_programas(catalogo):
+    assert fd.get_financing_filter_options() == _opciones_anteriores(fd.load_all_financing_programs())
+
+
+def test_stats_tras_un_cambio(catalogo):
+    fd.get_financing_stats()
+    programa = fd.get_programa_by_id('prog-10')
+    programa['ambito'] = None
+    fd.actualizar_programa('prog-10', programa)
+
+    assert fd.get_financing_stats() == _stats_anteriores(fd.load_all_financing_programs())
@@ -0,0 +1,76 @@
+"""
+Pruebas de los almacenes de programas (utils/financing_storage.py)
+
+Los dos almacenes deben asignar los mismos IDs a un mismo lote: las altas
+siempre con un ID nuevo y las sustituciones sobre el ID indicado.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.financing_storage import crear_almacen
+
+
+def _lote():
+    """
+    Lote como el que arma agregar_programas: dos altas sin ID con el mismo
+    nombre, una sustitución de un ID existente, un alta sin ID que coincide
+    con él y un ID nuevo
+    """
+    return [
+        ({'nombre': 'Cheque Innovación'}, 'cheque-innovacion', False),
+        ({'nombre': 'Cheque Innovación'}, 'cheque-innovacion', False),
+        ({'nombre': 'Programa existente (nueva versión)'}, 'existente', True),
+        ({'nombre': 'Existente'}, 'existente', False),
+        ({'nombre': 'Neotec'}, 'neotec', True),
+    ]
+
+
+@pytest.fixture(params=['programas.json', 'programas.db'])
+def almacen(request, tmp_path):
+    almacen = crear_almacen(str(tmp_path / request.param))
+    almacen.agregar_varios([({'nombre': 'Programa existente'}, 'existente', True)])
+    return almacen
+
+
+def test_agregar_varios_asigna_ids(almacen):
+    resultado = almacen.agregar_varios(_lote())
+
+    assert resultado == [
+        ('cheque-innovacion', True),
+        ('cheque-innovacion-1', True),
+        ('existente', False),
+        ('existente-1', True),
+        ('neotec', True),
+    ]
+    programas = {p['id']: p['nombre'] for p in almacen.cargar()[0]}
+    assert programas == {
+        'existente': 'Programa existente (nueva versión)',
+        'cheque-innovacion': 'Cheque Innovación',
+        'cheque-innovacion-1': 'Cheque Innovación',
+        'existente-1': 'Existente',
+        'neotec': 'Neotec',
+    }
+
+
+def test_agregar_varios_sustituye_id_repetido(almacen):
+    resultado = almacen.agregar_varios([
+        ({'nombre': 'Neotec'}, 'neotec', True),
+        ({'nombre': 'Neotec 2027'}, 'neotec', True),
+    ])
+
+    assert resultado == [('neotec', True), ('neotec', False)]
+    assert {p['id']: p['nombre'] for p in almacen.cargar()[0]}['neotec'] == 'Neotec 2027'
+
+
+def test_agregar_varios_igual_en_json_y_sqlite(tmp_path):
+    resultados = []
+    for nombre in ('programas.json', 'programas.db'):
+        almacen = crear_almacen(str(tmp_path / nombre))
+        almacen.agregar_varios([({'nombre': 'Programa existente'}, 'existente', True)])
+        resultados.append((almacen.agregar_varios(_lote()),
+                           sorted((p['id'], p['nombre']) for p in almacen.cargar()[0])))
+    assert resultados[0] == resultados[1]
@@ -0,0 +1,68 @@
+"""
+Pruebas de equivalencia de normalizar_organismo y compañía
+
+Las funciones normalizar_* (NormalizadorGrupos: expresión regular
+precompilada) deben devolver el mismo grupo que la implementación anterior,
+que recorría todos los alias haciendo .lower() en cada comparación.
+"""
+import os
+import random
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'scripts', 'benchmarks'))
+
+from comun import generar_programas
+
+from utils import financing_dashboard as fd
+
+
+def _anterior(grupos, texto, inverso):
+    """Implementación anterior de las funciones normalizar_*"""
+    texto_lower = texto.lower()
+    for grupo, valores in grupos.items():
+        for valor in valores:
+            if valor.lower() in texto_lower or (inverso and texto_lower in valor.lower()):
+                return grupo
+    return 'Otros'
+
+
+def _textos_de_prueba(grupos, campo, rnd):
+    """Alias, fragmentos, mayúsculas, combinaciones de alias y textos de programas"""
+    alias = [v for valores in grupos.values() for v in valores]
+    textos = list(alias)
+    for a in alias:
+        textos.append(a.upper())
+        textos.append(f"Programa de {a} 2025")
+        if len(a) > 3:
+            inicio = rnd.randrange(len(a) - 2)
+            textos.append(a[inicio:inicio + rnd.randint(2, len(a) - inicio)])
+    for _ in range(2000):
+        textos.append(' y '.join(rnd.sample(alias, rnd.randint(2, 3))))
+    textos += ['x', 'Otros', 'Fundación sin grupo', 'de', ' ', 'ñ', 'I+D']
+
+    for p in generar_programas(2000):
+        valor = p.get(campo)
+        textos.extend(valor if isinstance(valor, list) else [valor])
+    return [t for t in textos if t and isinstance(t, str)]
+
+
+@pytest.mark.parametrize('funcion, grupos, inverso, campo', [
+    (fd.normalizar_organismo, fd.ORGANISMO_GRUPOS, False, 'organismo'),
+    (fd.normalizar_tipo_ayuda, fd.TIPO_AYUDA_GRUPOS, False, 'tipo_ayuda'),
+    (fd.normalizar_sector, fd.SECTOR_GRUPOS, True, 'sectores'),
+    (fd.normalizar_beneficiario, fd.BENEFICIARIO_GRUPOS, True, 'beneficiarios'),
+], ids=['organismo', 'tipo_ayuda', 'sector', 'beneficiario'])
+def test_igual_que_recorrer_los_alias(funcion, grupos, inverso, campo):
+    for texto in _textos_de_prueba(grupos, campo, random.Random(7)):
+        assert funcion(texto) == _anterior(grupos, texto, inverso), texto
+
+
+@pytest.mark.parametrize('funcion', [fd.normalizar_organismo, fd.normalizar_tipo_ayuda,
+                                     fd.normalizar_sector, fd.normalizar_beneficiario])
+def test_sin_texto_es_otros(funcion):
+    assert funcion(None) == 'Otros'
+    assert funcion('') == 'Otros'
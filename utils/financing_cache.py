@@ -0,0 +1,133 @@
+"""
+Caché LRU de respuestas de la API de programas
+
+Las consultas del dashboard se repiten mucho (la carga inicial, los filtros
+más usados...). Cada worker guarda el cuerpo JSON ya serializado de las
+últimas respuestas, indexado por la versión del catálogo y la consulta
+canónica: cualquier cambio en el catálogo (alta, edición, transición de
+estado) cambia la versión, así que las entradas antiguas dejan de usarse y
+acaban saliendo por LRU sin necesidad de invalidarlas.
+
+Junto al cuerpo sin comprimir se guardan sus versiones gzip (y brotli, si el
+paquete está instalado), así que una respuesta repetida se sirve comprimida
+sin volver a serializar ni a comprimir.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Codificaciones que se ofrecen, por orden de preferencia
+CODIFICACIONES = ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+
+def clave_consulta(filtros, **opciones):
+    """
+    Clave canónica de una consulta: tupla ordenada de los parámetros con valor
+
+    Dos consultas con los mismos filtros en distinto orden, o con parámetros
+    vacíos de más, producen la misma clave.
+    """
+    partes = []
+    for nombre, valor in list(filtros.items()) + list(opciones.items()):
+        if valor is None or valor == '' or valor == []:
+            continue
+        if isinstance(valor, list):
+            valor = tuple(valor)
+        partes.append((nombre, valor))
+    return tuple(sorted(partes))
+
+
+def comprimir(cuerpo, codificacion, minimo=1024):
+    """
+    Comprime un cuerpo con la codificación indicada ('br', 'gzip' o 'identity')
+
+    Returns:
+        (codificación aplicada, cuerpo): los cuerpos de menos de minimo bytes
+        se devuelven sin comprimir ('identity')
+    """
+    if len(cuerpo) < minimo:
+        return 'identity', cuerpo
+    if codificacion == 'br' and BROTLI_AVAILABLE:
+        return 'br', brotli.compress(cuerpo, quality=5)
+    if codificacion == 'gzip':
+        # mtime=0: mismo resultado en todos los workers
+        return 'gzip', gzip.compress(cuerpo, compresslevel=6, mtime=0)
+    return 'identity', cuerpo
+
+
+class ResultCache:
+    """LRU de cuerpos de respuesta serializados, con contadores de aciertos y fallos"""
+
+    def __init__(self, capacidad=256, max_bytes=32 * 1024 * 1024):
+        """
+        Args:
+            capacidad: Número máximo de respuestas guardadas
+            max_bytes: Tamaño total máximo de las respuestas guardadas
+        """
+        self.capacidad = capacidad
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, contar=True):
+        """
+        Devuelve (codificación, cuerpo) guardado para la clave, o None
+
+        Args:
+            contar: Contar la consulta como acierto o fallo (no se cuentan
+                las consultas auxiliares, p. ej. buscar el cuerpo sin
+                comprimir para comprimirlo)
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                if contar:
+                    self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            if contar:
+                self.aciertos += 1
+            return entrada
+
+    def guardar(self, clave, cuerpo, codificacion='identity'):
+        """Guarda un cuerpo (bytes), expulsando los menos usados si se supera algún límite"""
+        if len(cuerpo) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior[1])
+            self._entradas[clave] = (codificacion, cuerpo)
+            self._bytes += len(cuerpo)
+            while len(self._entradas) > self.capacidad or self._bytes > self.max_bytes:
+                _, (_, expulsado) = self._entradas.popitem(last=False)
+                self._bytes -= len(expulsado)
+
+    def vaciar(self):
+        """Elimina todas las entradas (los contadores se mantienen)"""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        """Tamaño y contadores de la caché de este proceso"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'capacidad': self.capacidad,
+                'bytes': self._bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 3) if consultas else 0.0
+            }
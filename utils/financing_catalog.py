@@ -0,0 +1,278 @@
+"""
+Catálogo en memoria de programas de financiación
+
+Mantiene una copia por proceso (una por worker de gunicorn) de los programas ya
+procesados. En cada acceso solo se pregunta al almacén qué ha cambiado desde el
+último cursor leído (un os.stat() del diario JSON o una consulta a SQLite) y se
+parchean en memoria únicamente los programas modificados, ya sea por este
+worker o por cualquier otro. El catálogo completo solo se vuelve a leer al
+arrancar o cuando el almacén no puede dar los cambios (p. ej. tras compactar).
+
+El estado de cada convocatoria (Abierta, Cierre próximo...) depende de la
+fecha actual, pero solo cambia en instantes conocidos (apertura, 15 días antes
+del cierre, cierre). El catálogo guarda esos instantes en un montículo y solo
+recalcula el estado de un programa cuando el reloj cruza el suyo, de modo que
+las lecturas no hacen ningún trabajo con fechas.
+
+Cada programa se guarda como ProgramRecord (utils/financing_record.py): los
+campos de filtrado en __slots__ y el diccionario completo serializado. Los
+registros no se modifican una vez creados; un cambio de estado crea una copia.
+Los índices opcionales (p. ej. FacetIndex) se actualizan con cada cambio.
+"""
+import heapq
+import hashlib
+import itertools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from .financing_record import ProgramRecord, estado_de
+
+# Marca de catálogo sin cargar o invalidado
+_SIN_CARGAR = object()
+
+
+class ProgramCatalog:
+    """Caché por proceso de los programas de financiación"""
+
+    def __init__(self, almacen, procesar_programa, actualizar_estado=None, indices=None,
+                 ultima_transicion=None):
+        """
+        Args:
+            almacen: JsonStorage o SqliteStorage (ver utils/financing_storage.py)
+            procesar_programa: Función que normaliza un programa recién leído
+                (campos *_grupo, importes, código BDNS...). Se ejecuta una sola
+                vez por programa y carga.
+            actualizar_estado: Función opcional (programa, ahora) que recalcula
+                los campos que dependen de la fecha y devuelve el próximo
+                instante en que pueden cambiar (None si ya no cambiarán).
+            indices: Diccionario nombre -> índice con los métodos
+                reconstruir(elementos), agregar(programa_id, registro) y
+                eliminar(programa_id). Se consultan con indice(nombre) dentro
+                de lectura().
+            ultima_transicion: Función opcional (programa, ahora) que devuelve
+                el último instante anterior a ahora en que cambió el estado del
+                programa (None si nunca). Sirve para que Last-Modified dependa
+                de los datos y no de cuándo cargó el catálogo cada worker.
+        """
+        self.almacen = almacen
+        self._indices = indices or {}
+        self._procesar_programa = procesar_programa
+        self._actualizar_estado = actualizar_estado
+        self._ultima_transicion = ultima_transicion
+        self._lock = threading.RLock()
+        self._cursor = _SIN_CARGAR
+        # ID -> ProgramRecord, en el orden del almacén
+        self._programas = {}
+        self._lista = None
+        # Montículo de (instante, desempate, programa_id, registro)
+        self._transiciones = []
+        self._desempate = itertools.count()
+        self.version = 0
+        # Último cambio de estado por fecha aplicado (validadores HTTP) y
+        # ultima_actualizacion del almacén para el cursor actual
+        self._estados_desde = None
+        self._ultima_actualizacion = (None, None)
+
+    def _registrar(self, programa_id, programa, ahora):
+        """Procesa un programa leído del almacén y lo guarda como ProgramRecord"""
+        programa = self._procesar_programa(programa)
+        instante = self._actualizar_estado(programa, ahora) if self._actualizar_estado else None
+        if self._ultima_transicion:
+            self._marcar_estados(self._ultima_transicion(programa, ahora))
+        registro = ProgramRecord(programa)
+        self._programas[programa_id] = registro
+        self._programar_transicion(programa_id, registro, instante)
+        return registro
+
+    def _programar_transicion(self, programa_id, registro, instante):
+        """Añade al montículo el próximo instante en que cambia el estado del programa"""
+        if instante is not None:
+            heapq.heappush(self._transiciones, (instante, next(self._desempate), programa_id, registro))
+
+    def _marcar_estados(self, instante):
+        """Adelanta el último cambio de estado por fecha aplicado (validadores HTTP)"""
+        if instante is not None and (self._estados_desde is None or instante > self._estados_desde):
+            self._estados_desde = instante
+
+    def _avanzar_estados(self):
+        """Recalcula el estado de los programas cuyo instante de transición ya ha pasado"""
+        if not self._transiciones or self._transiciones[0][0] > datetime.now():
+            return
+        ahora = datetime.now()
+        while self._transiciones and self._transiciones[0][0] <= ahora:
+            instante_aplicado, _, programa_id, registro = heapq.heappop(self._transiciones)
+            # Entradas de programas ya reemplazados o eliminados
+            if self._programas.get(programa_id) is not registro:
+                continue
+            programa = registro.datos
+            instante = self._actualizar_estado(programa, ahora)
+            registro = registro.con_estado(estado_de(programa))
+            self._programas[programa_id] = registro
+            for indice in self._indices.values():
+                indice.agregar(programa_id, registro)
+            self._programar_transicion(programa_id, registro, instante)
+            self._marcar_estados(instante_aplicado)
+        self._lista = None
+        self.version += 1
+
+    def _recargar(self):
+        """Lee todos los programas del almacén y reconstruye el catálogo"""
+        lista, cursor = self.almacen.cargar()
+        self._programas = {}
+        self._lista = None
+        self._cursor = cursor
+        self._transiciones = []
+        ahora = datetime.now()
+        # Los estados se calculan ahora: pueden haber cambiado desde la última
+        # escritura. Sin ultima_transicion solo se sabe que valen desde la carga
+        self._estados_desde = None if self._ultima_transicion else ahora
+        for i, programa in enumerate(lista):
+            self._registrar(programa.get('id') or f"__sin_id_{i}", programa, ahora)
+        for indice in self._indices.values():
+            indice.reconstruir(self._programas.items())
+        self.version += 1
+
+    def _sincronizar(self):
+        """Aplica los cambios hechos en el almacén desde la última lectura"""
+        if self._cursor is _SIN_CARGAR:
+            self._recargar()
+            return
+
+        cambios, cursor = self.almacen.cambios_desde(self._cursor)
+        if cambios is None:
+            self._recargar()
+            return
+
+        ahora = datetime.now()
+        for programa_id, programa in cambios:
+            if programa is None:
+                self._programas.pop(programa_id, None)
+                for indice in self._indices.values():
+                    indice.eliminar(programa_id)
+            else:
+                registro = self._registrar(programa_id, programa, ahora)
+                for indice in self._indices.values():
+                    indice.agregar(programa_id, registro)
+        if cambios:
+            self._lista = None
+            self.version += 1
+        self._cursor = cursor
+
+    def registros(self):
+        """
+        Devuelve la lista de ProgramRecord (en el orden del almacén)
+
+        Los registros son compartidos entre peticiones y deben tratarse como
+        de solo lectura. La lista sí es una copia nueva.
+        """
+        with self._lock:
+            self._sincronizar()
+            self._avanzar_estados()
+            if self._lista is None:
+                self._lista = list(self._programas.values())
+            return list(self._lista)
+
+    @contextmanager
+    def lectura(self):
+        """
+        Sincroniza el catálogo y lo mantiene bloqueado durante el bloque with
+
+        Los índices solo son coherentes con los registros mientras se tiene el
+        bloqueo, así que toda consulta a indice() debe hacerse dentro.
+        """
+        with self._lock:
+            self._sincronizar()
+            self._avanzar_estados()
+            yield self
+
+    def version_actual(self):
+        """Sincroniza el catálogo y devuelve su versión (cambia con cualquier modificación)"""
+        with self._lock:
+            self._sincronizar()
+            self._avanzar_estados()
+            return self.version
+
+    def validadores(self):
+        """
+        Validadores HTTP del contenido del catálogo: (etiqueta, modificado)
+
+        La etiqueta sale del cursor del almacén y del próximo cambio de estado
+        por fecha, que son iguales en todos los workers con los mismos datos,
+        así que un ETag generado por un worker vale para los demás.
+        modificado es la ultima_actualizacion del almacén o, si es posterior,
+        el último cambio de estado por fecha que ha cruzado algún programa
+        (sin ultima_transicion, la carga del catálogo cuenta como tal); nunca
+        es anterior al último cambio real.
+        """
+        with self._lock:
+            self._sincronizar()
+            self._avanzar_estados()
+            # Descartar entradas del montículo de programas ya reemplazados
+            while self._transiciones and self._programas.get(self._transiciones[0][2]) is not self._transiciones[0][3]:
+                heapq.heappop(self._transiciones)
+            proximo = self._transiciones[0][0].isoformat() if self._transiciones else ''
+            etiqueta = hashlib.sha1(repr((self._cursor, proximo)).encode('utf-8')).hexdigest()[:20]
+
+            cursor, ultima = self._ultima_actualizacion
+            if cursor != self._cursor:
+                try:
+                    ultima = datetime.fromisoformat(self.almacen.metadatos()['ultima_actualizacion'])
+                except (TypeError, ValueError):
+                    ultima = None
+                self._ultima_actualizacion = (self._cursor, ultima)
+            modificado = max((m for m in (ultima, self._estados_desde) if m is not None), default=None)
+            return etiqueta, modificado
+
+    def indice(self, nombre):
+        """Devuelve uno de los índices del catálogo (usar dentro de lectura())"""
+        return self._indices[nombre]
+
+    def programas(self):
+        """Devuelve todos los programas como diccionarios nuevos (en el orden del almacén)"""
+        return [registro.datos for registro in self.registros()]
+
+    def obtener_registro(self, programa_id):
+        """Devuelve el ProgramRecord de un programa o None (acceso O(1))"""
+        with self._lock:
+            self._sincronizar()
+            self._avanzar_estados()
+            return self._programas.get(programa_id)
+
+    def obtener(self, programa_id):
+        """Devuelve un programa como diccionario nuevo o None"""
+        registro = self.obtener_registro(programa_id)
+        return registro.datos if registro is not None else None
+
+    def agregar(self, programa, id_base):
+        """Guarda un programa nuevo y devuelve el ID único asignado"""
+        with self._lock:
+            programa_id = self.almacen.agregar(programa, id_base)
+            self._sincronizar()
+            return programa_id
+
+    def agregar_varios(self, elementos):
+        """Guarda varios programas de una vez (ver agregar_varios del almacén)"""
+        with self._lock:
+            resultado = self.almacen.agregar_varios(elementos)
+            self._sincronizar()
+            return resultado
+
+    def actualizar(self, programa_id, programa):
+        """Reemplaza un programa existente; False si no existe"""
+        with self._lock:
+            resultado = self.almacen.actualizar(programa_id, programa)
+            self._sincronizar()
+            return resultado
+
+    def eliminar(self, programa_id):
+        """Elimina un programa; False si no existe"""
+        with self._lock:
+            resultado = self.almacen.eliminar(programa_id)
+            self._sincronizar()
+            return resultado
+
+    def invalidar(self):
+        """Fuerza una recarga completa en el siguiente acceso"""
+        with self._lock:
+            self._cursor = _SIN_CARGAR
@@ -0,0 +1,296 @@
+"""
+Motor columnar con NumPy para catálogos grandes (opcional)
+
+Alternativa a FacetIndex para cargar decenas de miles de convocatorias
+históricas. Ofrece la misma interfaz de consulta (bits, bits_donde,
+bits_prefijo, bits_rango, registros, registros_ordenados, valores...), pero
+las selecciones son máscaras booleanas de NumPy en lugar de bitsets:
+
+- Columnas categóricas: pares (fila, código) en dos arrays; la máscara de un
+  valor se obtiene comparando el array de códigos.
+- Columnas de rango: un array float64 por columna (NaN = sin valor; las
+  fechas como timestamp), así que un rango es una comparación vectorizada y
+  la ordenación un argsort estable.
+- Recuentos por valor (estadísticas): np.bincount sobre los códigos.
+
+Cada columna guarda además los valores por fila en listas de Python; un
+cambio solo marca como pendientes las columnas que cambian, que se vuelven a
+compilar a arrays en la siguiente consulta (una transición de estado solo
+recompila la columna estado).
+
+Si NumPy no está instalado, NUMPY_AVAILABLE es False y el catálogo usa
+FacetIndex (ver configurar_almacenamiento).
+"""
+from bisect import bisect_left
+from datetime import datetime
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def _a_numero(valor):
+    """Valor de una columna de rango como float (fechas como timestamp)"""
+    if isinstance(valor, datetime):
+        return valor.timestamp()
+    return float(valor)
+
+
+class ColumnarIndex:
+    """Índice de facetas y rangos sobre arrays de NumPy (misma interfaz que FacetIndex)"""
+
+    # Huecos (programas eliminados) a partir de los cuales se reordenan las filas
+    MINIMO_HUECOS_COMPACTAR = 1000
+
+    def __init__(self, columnas, rangos=None):
+        """
+        Args:
+            columnas, rangos: Como en FacetIndex
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("ColumnarIndex necesita NumPy")
+        self._columnas = columnas
+        self._rangos = rangos or {}
+        # Aumenta en cada reconstrucción: las filas de antes dejan de valer
+        self.generacion = 0
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vacía el índice"""
+        self._filas = {}        # programa_id -> fila
+        self._registros = []    # fila -> registro (None si se eliminó)
+        self._huecos = 0
+        self._vivos = np.zeros(0, dtype=bool)
+        # Por columna: valores de cada fila (tupla de valores distintos) y
+        # diccionario de códigos; por columna de rango: valor de cada fila
+        self._celdas = {nombre: [] for nombre in self._columnas}
+        self._codigos = {nombre: {} for nombre in self._columnas}
+        self._valores = {nombre: [] for nombre in self._columnas}
+        self._celdas_rango = {nombre: [] for nombre in self._rangos}
+        # Arrays compilados y columnas pendientes de compilar
+        self._pares = {}        # nombre -> (array de filas, array de códigos)
+        self._arrays = {}       # nombre -> array float64 de la columna de rango
+        self._textos = {}       # nombre -> valores de texto ordenados (columnas de rango de texto)
+        self._ordenados = {}    # nombre -> valores de texto ordenados (bits_prefijo)
+        self._pendientes = set(self._columnas)
+        self._pendientes_rango = set(self._rangos)
+
+    @staticmethod
+    def _celda(valor):
+        """Valores distintos y hashables de una celda, como tupla"""
+        if valor is None:
+            return ()
+        distintos = {}
+        for v in (valor if isinstance(valor, tuple) else (valor,)):
+            try:
+                distintos[v] = None
+            except TypeError:
+                pass
+        return tuple(distintos)
+
+    def _escribir(self, fila, registro):
+        """Guarda los valores de un registro en su fila y marca las columnas que cambian"""
+        for nombre, extraer in self._columnas.items():
+            celda = self._celda(extraer(registro))
+            celdas = self._celdas[nombre]
+            if fila == len(celdas):
+                celdas.append(celda)
+                if not celda:
+                    continue
+            elif celdas[fila] != celda:
+                celdas[fila] = celda
+            else:
+                continue
+            self._pendientes.add(nombre)
+        for nombre, extraer in self._rangos.items():
+            valor = extraer(registro)
+            celdas = self._celdas_rango[nombre]
+            if fila == len(celdas):
+                celdas.append(valor)
+            elif celdas[fila] != valor:
+                celdas[fila] = valor
+            else:
+                continue
+            self._pendientes_rango.add(nombre)
+
+    def reconstruir(self, elementos):
+        """Indexa de una vez una secuencia de (programa_id, registro)"""
+        self.reiniciar()
+        self.generacion += 1
+        for fila, (programa_id, registro) in enumerate(elementos):
+            self._filas[programa_id] = fila
+            self._registros.append(registro)
+            self._escribir(fila, registro)
+        self._vivos = np.ones(len(self._registros), dtype=bool)
+
+    def agregar(self, programa_id, registro):
+        """Indexa un programa nuevo o reemplaza el registro de uno existente (misma fila)"""
+        fila = self._filas.get(programa_id)
+        if fila is None:
+            fila = self._filas[programa_id] = len(self._registros)
+            self._registros.append(registro)
+            self._vivos = np.append(self._vivos, True)
+            # Los arrays de rango tienen una fila por programa
+            self._pendientes_rango.update(self._rangos)
+        else:
+            self._registros[fila] = registro
+        self._escribir(fila, registro)
+
+    def eliminar(self, programa_id):
+        """Quita un programa del índice (su fila queda como hueco)"""
+        fila = self._filas.pop(programa_id, None)
+        if fila is None:
+            return
+        self._registros[fila] = None
+        self._vivos[fila] = False
+        self._huecos += 1
+        if self._huecos >= self.MINIMO_HUECOS_COMPACTAR and self._huecos * 2 > len(self._registros):
+            self.reconstruir([(pid, self._registros[fila])
+                              for pid, fila in sorted(self._filas.items(), key=lambda x: x[1])])
+
+    def _compilar(self):
+        """Convierte a arrays las columnas pendientes"""
+        for nombre in self._pendientes:
+            self._compilar_columna(nombre)
+        for nombre in self._pendientes_rango:
+            self._compilar_rango(nombre)
+        self._pendientes.clear()
+        self._pendientes_rango.clear()
+
+    def _compilar_columna(self, nombre):
+        codigos = self._codigos[nombre]
+        valores = self._valores[nombre]
+        filas, lista_codigos = [], []
+        for fila, celda in enumerate(self._celdas[nombre]):
+            for valor in celda:
+                codigo = codigos.get(valor)
+                if codigo is None:
+                    codigo = codigos[valor] = len(valores)
+                    valores.append(valor)
+                filas.append(fila)
+                lista_codigos.append(codigo)
+        self._pares[nombre] = (np.array(filas, dtype=np.int64), np.array(lista_codigos, dtype=np.int64))
+        self._ordenados.pop(nombre, None)
+
+    def _compilar_rango(self, nombre):
+        celdas = self._celdas_rango[nombre]
+        textos = sorted({v for v in celdas if isinstance(v, str)})
+        if textos:
+            # Columna de texto (p. ej. nombre): se guarda la posición en el orden alfabético
+            orden = {texto: i for i, texto in enumerate(textos)}
+            self._textos[nombre] = textos
+            numeros = [float('nan') if v is None else float(orden[v]) for v in celdas]
+        else:
+            self._textos.pop(nombre, None)
+            numeros = [float('nan') if v is None else _a_numero(v) for v in celdas]
+        self._arrays[nombre] = np.array(numeros, dtype=np.float64)
+
+    def _mascara(self, nombre, codigos):
+        """Máscara de los programas vivos con alguno de los códigos en la columna"""
+        self._compilar()
+        mascara = np.zeros(len(self._registros), dtype=bool)
+        if codigos:
+            filas, codigos_filas = self._pares[nombre]
+            if len(codigos) == 1:
+                mascara[filas[codigos_filas == codigos[0]]] = True
+            else:
+                mascara[filas[np.isin(codigos_filas, codigos)]] = True
+        return mascara & self._vivos
+
+    def todos(self):
+        """Máscara con todos los programas indexados (copia: se puede modificar)"""
+        return self._vivos.copy()
+
+    def ninguno(self):
+        """Máscara vacía"""
+        return np.zeros(len(self._registros), dtype=bool)
+
+    def bits(self, nombre, valor):
+        """Máscara de los programas cuyo valor en la columna es exactamente valor"""
+        self._compilar()
+        try:
+            codigo = self._codigos[nombre].get(valor)
+        except TypeError:
+            codigo = None
+        return self._mascara(nombre, [] if codigo is None else [codigo])
+
+    def bits_donde(self, nombre, condicion):
+        """Máscara de los programas con algún valor de texto de la columna que cumple condicion(valor)"""
+        self._compilar()
+        return self._mascara(nombre, [codigo for codigo, valor in enumerate(self._valores[nombre])
+                                      if isinstance(valor, str) and condicion(valor)])
+
+    def bits_prefijo(self, nombre, prefijo):
+        """Máscara de los programas con algún valor de texto de la columna que empieza por prefijo"""
+        self._compilar()
+        ordenados = self._ordenados.get(nombre)
+        if ordenados is None:
+            ordenados = self._ordenados[nombre] = sorted(
+                v for v in self._valores[nombre] if isinstance(v, str))
+        codigos = self._codigos[nombre]
+        seleccion = []
+        for i in range(bisect_left(ordenados, prefijo), len(ordenados)):
+            if not ordenados[i].startswith(prefijo):
+                break
+            seleccion.append(codigos[ordenados[i]])
+        return self._mascara(nombre, seleccion)
+
+    def _limite(self, nombre, valor, superior):
+        """Límite de un rango en las unidades del array de la columna"""
+        textos = self._textos.get(nombre)
+        if textos is None:
+            return _a_numero(valor)
+        # Columna de texto: posición en el orden alfabético
+        i = bisect_left(textos, valor)
+        if superior and (i == len(textos) or textos[i] != valor):
+            i -= 1
+        return float(i)
+
+    def bits_rango(self, nombre, desde=None, hasta=None):
+        """Máscara de los programas con valor de la columna de rango entre desde y hasta (inclusive)"""
+        self._compilar()
+        valores = self._arrays[nombre]
+        mascara = ~np.isnan(valores) & self._vivos
+        if desde is not None:
+            mascara &= valores >= self._limite(nombre, desde, False)
+        if hasta is not None:
+            mascara &= valores <= self._limite(nombre, hasta, True)
+        return mascara
+
+    def registros_ordenados(self, bitset, nombre, descendente=False, inicio=0, limite=None):
+        """
+        Registros de la máscara ordenados por una columna de rango
+
+        Los programas sin valor en la columna van al final, en el orden del
+        catálogo. A igual valor se mantiene también el orden del catálogo.
+        """
+        if limite == 0:
+            return []
+        self._compilar()
+        valores = self._arrays[nombre]
+        con_valor = np.flatnonzero(bitset & ~np.isnan(valores))
+        claves = -valores[con_valor] if descendente else valores[con_valor]
+        filas = np.concatenate([con_valor[np.argsort(claves, kind='stable')],
+                                np.flatnonzero(bitset & np.isnan(valores))])
+        fin = None if limite is None else inicio + limite
+        return [self._registros[f] for f in filas[inicio:fin]]
+
+    def valores(self, nombre):
+        """Diccionario valor -> número de programas con ese valor en la columna"""
+        self._compilar()
+        filas, codigos = self._pares[nombre]
+        conteos = np.bincount(codigos[self._vivos[filas]], minlength=len(self._valores[nombre]))
+        return {self._valores[nombre][codigo]: int(n) for codigo, n in enumerate(conteos) if n}
+
+    def registros(self, bitset, inicio=0, limite=None):
+        """Registros de la máscara (en el orden del catálogo)"""
+        fin = None if limite is None else inicio + limite
+        return [self._registros[f] for f in np.flatnonzero(bitset)[inicio:fin]]
+
+    @staticmethod
+    def contar(bitset):
+        """Número de programas de una máscara"""
+        return int(np.count_nonzero(bitset))
@@ -3,8 +3,21 @@ Utilidades mejoradas para el dashboard de financiación
 Incluye mejoras en el buscador y simplificación de filtros
 """
 import os
+import re
+import copy
 import json
-from datetime import datetime
+import hashlib
+import heapq
+from functools import lru_cache, partial
+from datetime import datetime, timedelta
+
+from .financing_catalog import ProgramCatalog
+from .financing_index import FacetIndex, plegar_texto, terminos
+from .financing_ranking import RelevanceIndex
+from .financing_trigram import TrigramIndex
+from .financing_suggest import SuggestIndex
+from .financing_columnar import ColumnarIndex, NUMPY_AVAILABLE
+from .financing_storage import crear_almacen
 
 # Mapeos para simplificar los filtros
 ORGANISMO_GRUPOS = {
@@ -191,16 +204,66 @@ FONDOS_EUROPEOS_VALORES = [
     'Otros'
 ]
 
+class NormalizadorGrupos:
+    """
+    Asigna a un texto el grupo de una tabla *_GRUPOS
+
+    Gana el primer alias de la tabla (en orden de grupos y de valores)
+    contenido en el texto, sin distinguir mayúsculas. Con inverso=True
+    también vale que el texto esté contenido en el alias (sectores y
+    beneficiarios).
+
+    Todos los alias se compilan una sola vez en una expresión regular con
+    alternativas en el orden de la tabla dentro de una búsqueda anticipada:
+    en cada posición del texto se obtiene el primer alias que empieza ahí, y
+    el de menor índice entre todas las posiciones es el que habría
+    encontrado el recorrido alias por alias. Los resultados se memorizan
+    por texto.
+    """
+
+    def __init__(self, grupos, inverso=False):
+        self._alias = []     # (alias en minúsculas, grupo) en el orden de la tabla
+        self._indices = {}   # alias -> primer índice en el que aparece
+        for grupo, valores in grupos.items():
+            for valor in valores:
+                alias = valor.lower()
+                self._indices.setdefault(alias, len(self._alias))
+                self._alias.append((alias, grupo))
+        self._inverso = inverso
+        alternativas = '|'.join(re.escape(a) for a in sorted(self._indices, key=self._indices.get))
+        self._patron = re.compile(f'(?=({alternativas}))') if self._indices else None
+        self.grupo = lru_cache(maxsize=8192)(self._grupo)
+
+    def _grupo(self, texto):
+        """Grupo de un texto no vacío ('Otros' si no coincide ningún alias)"""
+        texto = texto.lower()
+        mejor = None
+        if self._patron is not None:
+            for coincidencia in self._patron.finditer(texto):
+                indice = self._indices[coincidencia.group(1)]
+                if mejor is None or indice < mejor:
+                    mejor = indice
+                    if mejor == 0:
+                        break
+        if self._inverso:
+            # Alias que contienen el texto, solo si van antes del mejor encontrado
+            limite = len(self._alias) if mejor is None else mejor
+            for indice in range(limite):
+                if texto in self._alias[indice][0]:
+                    mejor = indice
+                    break
+        return 'Otros' if mejor is None else self._alias[mejor][1]
+
+_NORMALIZADOR_ORGANISMO = NormalizadorGrupos(ORGANISMO_GRUPOS)
+_NORMALIZADOR_TIPO_AYUDA = NormalizadorGrupos(TIPO_AYUDA_GRUPOS)
+_NORMALIZADOR_SECTOR = NormalizadorGrupos(SECTOR_GRUPOS, inverso=True)
+_NORMALIZADOR_BENEFICIARIO = NormalizadorGrupos(BENEFICIARIO_GRUPOS, inverso=True)
+
 def normalizar_organismo(organismo):
     """Normaliza un organismo a su grupo simplificado"""
     if not organismo:
         return 'Otros'
-    
-    for grupo, valores in ORGANISMO_GRUPOS.items():
-        for valor in valores:
-            if valor.lower() in organismo.lower():
-                return grupo
-    return 'Otros'
+    return _NORMALIZADOR_ORGANISMO.grupo(organismo)
 
 def normalizar_tipo_ayuda(tipo_ayuda):
     """Normaliza un tipo de ayuda a su grupo simplificado"""
@@ -210,11 +273,7 @@ def normalizar_tipo_ayuda(tipo_ayuda):
         tipo_ayuda = tipo_ayuda[0] if tipo_ayuda else ''
     if not tipo_ayuda:
         return 'Otros'
-    for grupo, valores in TIPO_AYUDA_GRUPOS.items():
-        for valor in valores:
-            if valor.lower() in tipo_ayuda.lower():
-                return grupo
-    return 'Otros'
+    return _NORMALIZADOR_TIPO_AYUDA.grupo(tipo_ayuda)
 
 def normalizar_sector(sector):
     """Normaliza un sector a su macro-sector"""
@@ -224,13 +283,7 @@ def normalizar_sector(sector):
         sector = sector[0] if sector else ''
     if not sector:
         return 'Otros'
-    sector_lower = sector.lower()
-
-    for grupo, valores in SECTOR_GRUPOS.items():
-        for valor in valores:
-            if valor.lower() in sector_lower or sector_lower in valor.lower():
-                return grupo
-    return 'Otros'
+    return _NORMALIZADOR_SECTOR.grupo(sector)
 
 def normalizar_beneficiario(beneficiario):
     """Normaliza un beneficiario a su grupo simplificado"""
@@ -240,233 +293,782 @@ def normalizar_beneficiario(beneficiario):
         beneficiario = beneficiario[0] if beneficiario else ''
     if not beneficiario:
         return 'Otros'
-    beneficiario_lower = beneficiario.lower()
+    return _NORMALIZADOR_BENEFICIARIO.grupo(beneficiario)
 
-    for grupo, valores in BENEFICIARIO_GRUPOS.items():
-        for valor in valores:
-            if valor.lower() in beneficiario_lower or beneficiario_lower in valor.lower():
-                return grupo
-    return 'Otros'
+# Campos que entran en la búsqueda de texto (search)
+CAMPOS_BUSQUEDA_TEXTO = ['nombre_coloquial', 'nombre', 'organismo', 'tipo_proyecto', 'resumen_breve', 'descripcion_detallada']
+CAMPOS_BUSQUEDA_LISTA = ['beneficiarios', 'sectores', 'requisitos', 'tags']
+
+# Peso de cada campo en la ordenación por relevancia (sort=relevance)
+CAMPOS_RELEVANCIA = {
+    'nombre_coloquial': 3.0,
+    'nombre': 3.0,
+    'tags': 2.0,
+    'resumen_breve': 1.5,
+    'organismo': 1.0,
+    'tipo_proyecto': 1.0,
+    'sectores': 1.0,
+    'beneficiarios': 1.0,
+    'descripcion_detallada': 0.75,
+    'requisitos': 0.5,
+}
+
+def terminos_programa(programa):
+    """
+    Términos de búsqueda de un programa (palabras sin tildes, en minúsculas)
+
+    Incluye los campos de texto, las listas y el código BDNS. Es lo que
+    indexa la columna 'terminos' del índice de facetas.
+    """
+    partes = []
+    for campo in CAMPOS_BUSQUEDA_TEXTO:
+        if programa.get(campo):
+            partes.append(str(programa[campo]))
+    for campo in CAMPOS_BUSQUEDA_LISTA:
+        if isinstance(programa.get(campo), list):
+            partes.extend(str(item) for item in programa[campo])
+    if programa.get('codigo_bdns'):
+        partes.append(str(programa['codigo_bdns']))
+    return tuple(set(terminos(' '.join(partes))))
 
 def buscar_en_programa(programa, search_term):
     """
     Busca un término en todos los campos relevantes de un programa
     
+    Cada palabra de la búsqueda debe ser el comienzo de alguna palabra del
+    programa, sin distinguir tildes ni mayúsculas ("subvencion digit"
+    encuentra "Subvención para digitalización"). Es la misma regla que aplica
+    load_financing_programs con el índice.
+    
     Args:
         programa: Diccionario con los datos del programa
-        search_term: Término a buscar (en minúsculas)
+        search_term: Término a buscar
     
     Returns:
         True si se encuentra el término, False en caso contrario
     """
-    search_term = search_term.lower()
-    
-    # Buscar en campos de texto principales
-    campos_texto = ['nombre_coloquial', 'nombre', 'organismo', 'tipo_proyecto', 'resumen_breve', 'descripcion_detallada']
-    for campo in campos_texto:
-        if campo in programa and programa[campo] and search_term in str(programa[campo]).lower():
-            return True
+    consulta = terminos(search_term)
+    if not consulta:
+        return False
+    propios = terminos_programa(programa)
+    return all(any(t.startswith(q) for t in propios) for q in consulta)
+
+def _ruta_datos():
+    """Ruta por defecto del almacén de programas (misma lógica que Config.DATABASE_PATH)"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.environ.get('DATABASE_PATH') or os.path.join(base_dir, 'data', 'programas_financiacion.json')
+
+def _parsear_fecha(fecha):
+    """Convierte una fecha 'YYYY-MM-DD[ HH:MM:SS]' a datetime (None si no es válida)"""
+    if not fecha:
+        return None
+    try:
+        return datetime.strptime(fecha, '%Y-%m-%d %H:%M:%S')
+    except (ValueError, TypeError):
+        try:
+            return datetime.strptime(fecha, '%Y-%m-%d')
+        except (ValueError, TypeError):
+            return None
+
+def _actualizar_estado_convocatoria(programa, ahora=None):
+    """
+    Recalcula el estado de la convocatoria según sus fechas y la fecha actual
+
+    Returns:
+        Próximo instante en que el estado puede cambiar (apertura, 15 días
+        antes del cierre o cierre), o None si ya no cambiará
+    """
+    if 'convocatoria' not in programa:
+        return None
+
+    # Si no hay fechas, establecer estado basado en el campo 'estado'
+    if not programa['convocatoria'].get('fecha_apertura') and not programa['convocatoria'].get('fecha_cierre'):
+        # Cambiar "Pendiente" por "Próxima apertura" si existe
+        if programa['convocatoria'].get('estado') == 'Pendiente':
+            programa['convocatoria']['estado'] = 'Próxima apertura'
+        return None
+
+    fecha_apertura_dt = _parsear_fecha(programa['convocatoria'].get('fecha_apertura'))
+    fecha_cierre_dt = _parsear_fecha(programa['convocatoria'].get('fecha_cierre'))
+
+    now = ahora or datetime.now()
+
+    if fecha_cierre_dt and fecha_cierre_dt < now:
+        programa['convocatoria']['estado'] = 'Cerrada'
+    elif fecha_apertura_dt and fecha_apertura_dt > now:
+        programa['convocatoria']['estado'] = 'Próxima apertura'
+    elif fecha_cierre_dt and fecha_cierre_dt >= now:
+        # Calcular días hasta el cierre
+        dias_hasta_cierre = (fecha_cierre_dt - now).days
+        if dias_hasta_cierre <= 15:
+            programa['convocatoria']['estado'] = 'Cierre próximo'
+        else:
+            programa['convocatoria']['estado'] = 'Abierta'
+    else:
+        programa['convocatoria']['estado'] = 'Abierta'
+
+    futuras = [t for t in _transiciones_convocatoria(fecha_apertura_dt, fecha_cierre_dt) if t > now]
+    return min(futuras) if futuras else None
+
+def _transiciones_convocatoria(fecha_apertura_dt, fecha_cierre_dt):
+    """Instantes en los que cambia alguna de las condiciones del estado de una convocatoria"""
+    transiciones = []
+    if fecha_apertura_dt:
+        transiciones.append(fecha_apertura_dt)
+    if fecha_cierre_dt:
+        transiciones.append(fecha_cierre_dt - timedelta(days=16) + timedelta(microseconds=1))
+        transiciones.append(fecha_cierre_dt + timedelta(microseconds=1))
+    return transiciones
+
+def _ultima_transicion_convocatoria(programa, ahora=None):
+    """Último instante anterior a ahora en que pudo cambiar el estado de la convocatoria (o None)"""
+    convocatoria = programa.get('convocatoria')
+    if not isinstance(convocatoria, dict):
+        return None
+    now = ahora or datetime.now()
+    pasadas = [t for t in _transiciones_convocatoria(_parsear_fecha(convocatoria.get('fecha_apertura')),
+                                                     _parsear_fecha(convocatoria.get('fecha_cierre')))
+               if t <= now]
+    return max(pasadas) if pasadas else None
+
+# Huella de las tablas de normalización. El almacén anota la versión con la
+# que están calculados los campos derivados de todos sus programas; si no es
+# esta, se recalculan al leer (y con el comando recalcular)
+VERSION_NORMALIZACION = hashlib.sha1(json.dumps(
+    [ORGANISMO_GRUPOS, TIPO_AYUDA_GRUPOS, SECTOR_GRUPOS, BENEFICIARIO_GRUPOS],
+    sort_keys=True, ensure_ascii=False
+).encode('utf-8')).hexdigest()[:12]
+
+def enriquecer_programa(programa):
+    """
+    Calcula y guarda en el programa sus campos derivados
+
+    Se ejecuta al guardar (agregar/actualizar) para que los campos *_grupo,
+    los importes numéricos y el código BDNS normalizado queden persistidos y la
+    lectura no tenga que recalcularlos.
+
+    Args:
+        programa: Diccionario con los datos del programa (se modifica)
+
+    Returns:
+        El mismo programa
+    """
+    # Añadir campos normalizados para los filtros
+    programa['organismo_grupo'] = normalizar_organismo(programa.get('organismo'))
+    programa['tipo_ayuda_grupo'] = normalizar_tipo_ayuda(programa.get('tipo_ayuda'))
     
-    # Buscar en listas (arrays)
-    campos_lista = ['beneficiarios', 'sectores', 'requisitos', 'tags']
-    for campo in campos_lista:
-        if campo in programa and isinstance(programa[campo], list):
-            for item in programa[campo]:
-                if search_term in str(item).lower():
-                    return True
+    if 'sectores' in programa:
+        programa['sectores_grupos'] = list(set([normalizar_sector(s) for s in programa['sectores']]))
+    else:
+        programa['sectores_grupos'] = []
     
-    # Buscar en BDNS si es numérico
-    if 'codigo_bdns' in programa and programa['codigo_bdns']:
-        bdns_str = str(programa['codigo_bdns']).lower()
-        if search_term in bdns_str or bdns_str.startswith(search_term):
-            return True
+    if 'beneficiarios' in programa:
+        programa['beneficiarios_grupos'] = list(set([normalizar_beneficiario(b) for b in programa['beneficiarios']]))
+    else:
+        programa['beneficiarios_grupos'] = []
+            
+    for key in ['presupuesto_minimo', 'presupuesto_maximo', 'importe_maximo']:
+        if key in programa.get('financiacion', {}) and programa['financiacion'][key] not in [None, '', 'nan', 'No especificado']:
+            try:
+                programa['financiacion'][key] = float(programa['financiacion'][key])
+            except (ValueError, TypeError):
+                programa['financiacion'][key] = None
     
-    return False
+    if 'codigo_bdns' in programa and programa['codigo_bdns'] not in [None, '', 'nan', 'No especificado']:
+        try:
+            if isinstance(programa['codigo_bdns'], (int, float)):
+                programa['codigo_bdns'] = int(programa['codigo_bdns'])
+            elif isinstance(programa['codigo_bdns'], str) and '.' in programa['codigo_bdns']:
+                programa['codigo_bdns'] = int(float(programa['codigo_bdns']))
+        except (ValueError, TypeError):
+            pass
+
+    # Marca por programa de versiones anteriores (la versión ahora la guarda el almacén)
+    programa.pop('version_normalizacion', None)
+    return programa
+
+def _procesar_programa(programa, almacen=None):
+    """
+    Prepara un programa leído del almacén
+
+    Solo lo enriquece si el almacén no tiene anotada la versión actual de las
+    tablas de normalización (ver recalcular_campos_derivados).
+    """
+    if almacen is None or almacen.version_normalizacion != VERSION_NORMALIZACION:
+        enriquecer_programa(programa)
+    return programa
+
+def columnas_indexadas(programa):
+    """Columnas indexadas que el almacén SQLite guarda junto a cada programa"""
+    convocatoria = programa.get('convocatoria') or {}
+    return {
+        'organismo_grupo': programa.get('organismo_grupo') or normalizar_organismo(programa.get('organismo')),
+        'estado': convocatoria.get('estado'),
+        'fecha_cierre': convocatoria.get('fecha_cierre'),
+        'ambito': programa.get('ambito')
+    }
+
+def generar_id_base(datos_programa):
+    """Genera el ID base de un programa a partir de su nombre (nombre_coloquial tiene prioridad)"""
+    nombre = datos_programa.get('nombre_coloquial') or datos_programa.get('nombre') or 'programa'
+    programa_id = nombre.lower().replace(' ', '-').replace('/', '-').replace('(', '').replace(')', '')
+    return programa_id[:50]  # Limitar longitud
+
+# Catálogo en memoria, uno por proceso (ver utils/financing_catalog.py)
+_catalogo = None
+
+def _solo_texto(valor):
+    """Valor si es una cadena (los filtros de igualdad no aplican a listas)"""
+    return valor if isinstance(valor, str) else None
+
+# Columnas del índice de facetas (ver utils/financing_index.py). Las tuplas
+# son columnas multivalor; tipo_proyecto se separa según sea lista o texto
+# porque se filtra de forma distinta en cada caso.
+COLUMNAS_FACETAS = {
+    'organismo': lambda r: r.organismo,
+    'organismo_grupo': lambda r: r.organismo_grupo,
+    'tipo_ayuda': lambda r: _solo_texto(r.tipo_ayuda),
+    'tipo_ayuda_grupo': lambda r: r.tipo_ayuda_grupo,
+    'ambito': lambda r: r.ambito,
+    # Solo para el recuento de get_financing_stats
+    'ambito_nulo': lambda r: True if r.ambito_nulo else None,
+    'beneficiarios': lambda r: r.beneficiarios,
+    'beneficiarios_grupos': lambda r: r.beneficiarios_grupos,
+    'sectores': lambda r: r.sectores,
+    'sectores_grupos': lambda r: r.sectores_grupos,
+    'tipo_proyecto_lista': lambda r: r.tipo_proyecto if isinstance(r.tipo_proyecto, tuple) else None,
+    'tipo_proyecto_texto': lambda r: _solo_texto(r.tipo_proyecto),
+    'fondos_europeos': lambda r: r.fondos_europeos,
+    'origen_fondos': lambda r: r.origen_fondos,
+    'estado': lambda r: r.estado,
+    # Se consulta por prefijo (filtro bdns)
+    'codigo_bdns': lambda r: str(r.codigo_bdns).lower() if r.codigo_bdns else None,
+    # Búsqueda de texto: se consulta por prefijo con bits_prefijo()
+    'terminos': lambda r: terminos_programa(r.datos),
+}
+
+def _numero(valor):
+    """Convierte un importe a float (None si no es un número válido)"""
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return None if numero != numero else numero  # descarta NaN
+
+# Orden de los estados al ordenar por estado (el resto van después)
+ORDEN_ESTADOS = {'Abierta': 0, 'Cierre próximo': 1, 'Próxima apertura': 2, 'Cerrada': 3}
+
+# Columnas de rango del índice: filtros por importe/fecha y ordenación
+COLUMNAS_RANGO = {
+    'presupuesto_minimo': lambda r: _numero(r.presupuesto_minimo),
+    'presupuesto_maximo': lambda r: _numero(r.presupuesto_maximo),
+    'importe_maximo': lambda r: _numero(r.importe_maximo),
+    'fecha_cierre': lambda r: _parsear_fecha(r.fecha_cierre),
+    'fecha_apertura': lambda r: _parsear_fecha(r.fecha_apertura),
+    'nombre': lambda r: plegar_texto(r.nombre) if isinstance(r.nombre, str) else None,
+    'organismo': lambda r: plegar_texto(r.organismo) if isinstance(r.organismo, str) else None,
+    # Fecha ISO como texto: el orden alfabético es el cronológico
+    'fecha_publicacion_bdns': lambda r: r.fecha_publicacion_bdns if isinstance(r.fecha_publicacion_bdns, str) else None,
+    'estado': lambda r: ORDEN_ESTADOS.get(r.estado, len(ORDEN_ESTADOS)) if r.estado else None,
+}
+
+def _limite_fecha(fecha, fin_del_dia=False):
+    """
+    Convierte un límite de fecha de un filtro ('YYYY-MM-DD[ HH:MM:SS]' o datetime)
+
+    Con fin_del_dia, una fecha sin hora incluye el día completo.
+    """
+    if fecha is None or isinstance(fecha, datetime):
+        return fecha
+    limite = _parsear_fecha(fecha)
+    if limite is not None and fin_del_dia and len(fecha.strip()) <= 10:
+        limite += timedelta(days=1) - timedelta(microseconds=1)
+    return limite
+
+def configurar_almacenamiento(ruta, instantanea_binaria=True, motor='bitset'):
+    """
+    Selecciona el almacén de programas (normalmente Config.DATABASE_PATH)
+
+    Las rutas terminadas en .db, .sqlite o .sqlite3 usan SQLite; el resto, JSON.
+    Con JSON, instantanea_binaria mantiene una copia marshal del archivo para
+    que los workers arranquen sin parsear el JSON.
+
+    motor='numpy' usa el índice columnar de NumPy (catálogos históricos
+    grandes) en lugar de los bitsets; sin NumPy instalado se usan los bitsets.
+    """
+    global _catalogo
+    if motor == 'numpy' and NUMPY_AVAILABLE:
+        facetas = ColumnarIndex(COLUMNAS_FACETAS, COLUMNAS_RANGO)
+    else:
+        if motor == 'numpy':
+            print("WARNING: NumPy no está instalado. Se usa el índice de bitsets.")
+        facetas = FacetIndex(COLUMNAS_FACETAS, COLUMNAS_RANGO)
+    almacen = crear_almacen(ruta, columnas_indexadas, instantanea_binaria)
+    _catalogo = ProgramCatalog(almacen, partial(_procesar_programa, almacen=almacen),
+                               _actualizar_estado_convocatoria,
+                               indices={'facetas': facetas,
+                                        'relevancia': RelevanceIndex(CAMPOS_RELEVANCIA),
+                                        'trigramas': TrigramIndex(CAMPOS_TRIGRAMAS),
+                                        'sugerencias': SuggestIndex(CAMPOS_SUGERENCIAS)},
+                               ultima_transicion=_ultima_transicion_convocatoria)
+    return _catalogo
+
+def get_catalogo():
+    """Devuelve el catálogo en memoria de este proceso, creándolo si no existe"""
+    if _catalogo is None:
+        configurar_almacenamiento(_ruta_datos())
+    return _catalogo
 
 def load_all_financing_programs():
-    """Carga todos los programas de financiación desde el archivo JSON"""
+    """
+    Carga todos los programas de financiación
+
+    Los programas se sirven desde el catálogo en memoria, que solo aplica los
+    cambios hechos en el almacén desde la última petición. Cada llamada
+    devuelve diccionarios nuevos.
+    """
     try:
-        # Obtener la ruta al archivo JSON
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        json_path = os.path.join(base_dir, 'data', 'programas_financiacion.json')
-        
-        # Verificar que el archivo existe
-        if not os.path.exists(json_path):
-            print(f"ERROR: El archivo de programas de financiación no existe en la ruta: {json_path}")
-            return []
-            
-        # Cargar el JSON
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            
-        # Verificar la estructura del JSON
-        if 'programas' not in data:
-            print("ERROR: El archivo JSON no contiene la clave 'programas'")
-            return []
-            
-        programas = data['programas']
-        
-        # Procesar fechas para cada programa
-        for programa in programas:
-            # Procesar estado de convocatoria
-            if 'convocatoria' in programa:
-                # Si no hay fechas, establecer estado basado en el campo 'estado'
-                if not programa['convocatoria'].get('fecha_apertura') and not programa['convocatoria'].get('fecha_cierre'):
-                    # Cambiar "Pendiente" por "Próxima apertura" si existe
-                    if programa['convocatoria'].get('estado') == 'Pendiente':
-                        programa['convocatoria']['estado'] = 'Próxima apertura'
-                else:
-                    fecha_apertura = programa['convocatoria'].get('fecha_apertura')
-                    fecha_cierre = programa['convocatoria'].get('fecha_cierre')
-
-                    fecha_apertura_dt = None
-                    fecha_cierre_dt = None
-
-                    if fecha_apertura:
-                        try:
-                            fecha_apertura_dt = datetime.strptime(fecha_apertura, '%Y-%m-%d %H:%M:%S')
-                        except (ValueError, TypeError):
-                            try:
-                                fecha_apertura_dt = datetime.strptime(fecha_apertura, '%Y-%m-%d')
-                            except (ValueError, TypeError):
-                                fecha_apertura_dt = None
-
-                    if fecha_cierre:
-                        try:
-                            fecha_cierre_dt = datetime.strptime(fecha_cierre, '%Y-%m-%d %H:%M:%S')
-                        except (ValueError, TypeError):
-                            try:
-                                fecha_cierre_dt = datetime.strptime(fecha_cierre, '%Y-%m-%d')
-                            except (ValueError, TypeError):
-                                fecha_cierre_dt = None
-
-                    now = datetime.now()
-
-                    if fecha_cierre_dt and fecha_cierre_dt < now:
-                        programa['convocatoria']['estado'] = 'Cerrada'
-                    elif fecha_apertura_dt and fecha_apertura_dt > now:
-                        programa['convocatoria']['estado'] = 'Próxima apertura'
-                    elif fecha_cierre_dt and fecha_cierre_dt >= now:
-                        # Calcular días hasta el cierre
-                        dias_hasta_cierre = (fecha_cierre_dt - now).days
-                        if dias_hasta_cierre <= 15:
-                            programa['convocatoria']['estado'] = 'Cierre próximo'
-                        else:
-                            programa['convocatoria']['estado'] = 'Abierta'
-                    else:
-                        programa['convocatoria']['estado'] = 'Abierta'
-            
-            # Añadir campos normalizados para los filtros
-            programa['organismo_grupo'] = normalizar_organismo(programa.get('organismo'))
-            programa['tipo_ayuda_grupo'] = normalizar_tipo_ayuda(programa.get('tipo_ayuda'))
-            
-            if 'sectores' in programa:
-                programa['sectores_grupos'] = list(set([normalizar_sector(s) for s in programa['sectores']]))
-            else:
-                programa['sectores_grupos'] = []
-            
-            if 'beneficiarios' in programa:
-                programa['beneficiarios_grupos'] = list(set([normalizar_beneficiario(b) for b in programa['beneficiarios']]))
-            else:
-                programa['beneficiarios_grupos'] = []
-                    
-            for key in ['presupuesto_minimo', 'presupuesto_maximo', 'importe_maximo']:
-                if key in programa.get('financiacion', {}) and programa['financiacion'][key] not in [None, '', 'nan', 'No especificado']:
-                    try:
-                        programa['financiacion'][key] = float(programa['financiacion'][key])
-                    except (ValueError, TypeError):
-                        programa['financiacion'][key] = None
-            
-            if 'codigo_bdns' in programa and programa['codigo_bdns'] not in [None, '', 'nan', 'No especificado']:
-                try:
-                    if isinstance(programa['codigo_bdns'], (int, float)):
-                        programa['codigo_bdns'] = int(programa['codigo_bdns'])
-                    elif isinstance(programa['codigo_bdns'], str) and '.' in programa['codigo_bdns']:
-                        programa['codigo_bdns'] = int(float(programa['codigo_bdns']))
-                except (ValueError, TypeError):
-                    pass
-        
-        return programas
+        return get_catalogo().programas()
     except Exception as e:
         print(f"Error al cargar programas de financiación: {e}")
         import traceback
         print(traceback.format_exc())
         return []
 
+def version_catalogo():
+    """Versión actual del catálogo de este proceso (para claves de caché)"""
+    return get_catalogo().version_actual()
+
+def validadores_catalogo():
+    """(etiqueta, modificado) del catálogo para ETag y Last-Modified (ver ProgramCatalog.validadores)"""
+    return get_catalogo().validadores()
+
+def load_financing_records():
+    """Devuelve los ProgramRecord del catálogo (compartidos, de solo lectura)"""
+    return get_catalogo().registros()
+
+def _seleccionar(facetas, organismo=None, tipo_ayuda=None, ambito=None, beneficiario=None,
+                 sector=None, tipo_proyecto=None, fondos_europeos=None, origen_fondos=None, estado=None,
+                 presupuesto_min=None, presupuesto_max=None, search_term=None, bdns=None,
+                 importe_min=None, importe_max=None, cierre_desde=None, cierre_hasta=None,
+                 apertura_desde=None, apertura_hasta=None):
+    """Bitset de los programas que cumplen los filtros (ver load_financing_programs)"""
+    seleccion = facetas.todos()
+
+    if organismo:
+        # Usar campo normalizado directamente, con fallback a campo antiguo
+        seleccion &= facetas.bits('organismo', organismo) | facetas.bits('organismo_grupo', organismo)
+
+    if tipo_ayuda:
+        # Usar campo normalizado directamente, con fallback a campo antiguo
+        seleccion &= facetas.bits('tipo_ayuda', tipo_ayuda) | facetas.bits('tipo_ayuda_grupo', tipo_ayuda)
+
+    if ambito:
+        ambito_lower = ambito.lower()
+        seleccion &= facetas.bits_donde('ambito', lambda v: ambito_lower in v.lower())
+
+    if beneficiario:
+        # Usar campo normalizado directamente, con fallback a campo antiguo
+        seleccion &= (facetas.bits('beneficiarios', beneficiario) |
+                      facetas.bits('beneficiarios_grupos', beneficiario))
+
+    if sector:
+        # Usar campo normalizado directamente, con fallback a campo antiguo
+        seleccion &= facetas.bits('sectores', sector) | facetas.bits('sectores_grupos', sector)
+
+    if tipo_proyecto:
+        # Lista: valor exacto; texto (convocatorias antiguas): contiene
+        tipo_lower = tipo_proyecto.lower()
+        seleccion &= (facetas.bits('tipo_proyecto_lista', tipo_proyecto) |
+                      facetas.bits_donde('tipo_proyecto_texto', lambda v: tipo_lower in v.lower()))
+
+    # Filtrar por fondos europeos (nuevo campo) o origen_fondos (compatibilidad)
+    fondos_filter = fondos_europeos or origen_fondos
+    if fondos_filter:
+        seleccion &= facetas.bits('fondos_europeos', fondos_filter) | facetas.bits('origen_fondos', fondos_filter)
+
+    if estado:
+        estado_lower = estado.lower()
+        seleccion &= facetas.bits_donde('estado', lambda v: estado_lower in v.lower())
+
+    if search_term:
+        # Cada palabra de la búsqueda como prefijo de algún término del programa
+        consulta = terminos(search_term)
+        if not consulta:
+            seleccion = facetas.ninguno()
+        for termino in consulta:
+            seleccion &= facetas.bits_prefijo('terminos', termino)
+
+    if bdns:
+        seleccion &= facetas.bits_prefijo('codigo_bdns', str(bdns).lower())
+
+    if presupuesto_min is not None:
+        seleccion &= facetas.bits_rango('presupuesto_minimo', desde=presupuesto_min)
+
+    if presupuesto_max is not None:
+        seleccion &= facetas.bits_rango('presupuesto_maximo', hasta=presupuesto_max)
+
+    if importe_min is not None or importe_max is not None:
+        seleccion &= facetas.bits_rango('importe_maximo', importe_min, importe_max)
+
+    if cierre_desde is not None or cierre_hasta is not None:
+        seleccion &= facetas.bits_rango('fecha_cierre', _limite_fecha(cierre_desde),
+                                        _limite_fecha(cierre_hasta, fin_del_dia=True))
+
+    if apertura_desde is not None or apertura_hasta is not None:
+        seleccion &= facetas.bits_rango('fecha_apertura', _limite_fecha(apertura_desde),
+                                        _limite_fecha(apertura_hasta, fin_del_dia=True))
+
+    return seleccion
+
+# Facetas con recuento (facets=1): filtro -> columnas del índice de las que
+# salen sus valores. El recuento de cada valor usa el propio filtro, así que
+# respeta sus fallbacks (campo normalizado o antiguo, texto que contiene...).
+FACETAS_RECUENTO = {
+    'organismo': ('organismo', 'organismo_grupo'),
+    'tipo_ayuda': ('tipo_ayuda', 'tipo_ayuda_grupo'),
+    'sector': ('sectores', 'sectores_grupos'),
+    'beneficiario': ('beneficiarios', 'beneficiarios_grupos'),
+    'tipo_proyecto': ('tipo_proyecto_lista', 'tipo_proyecto_texto'),
+    'fondos_europeos': ('fondos_europeos', 'origen_fondos'),
+    'estado': ('estado',),
+}
+
+def _contar_facetas(facetas, filtros, seleccion):
+    """
+    Número de programas que daría cada valor de las facetas de FACETAS_RECUENTO
+
+    Cada faceta se cuenta sobre la selección con el resto de filtros (sin el
+    suyo), de modo que el número indica cuántos programas habría al elegir ese
+    valor. Los recuentos son popcounts de AND de bitsets; se omiten los ceros.
+    """
+    recuentos = {}
+    for filtro, columnas in FACETAS_RECUENTO.items():
+        # fondos_europeos y origen_fondos son el mismo filtro
+        propios = ('fondos_europeos', 'origen_fondos') if filtro == 'fondos_europeos' else (filtro,)
+        base = seleccion
+        if any(filtros.get(f) for f in propios):
+            base = _seleccionar(facetas, **{k: v for k, v in filtros.items() if k not in propios})
+
+        valores = set()
+        for columna in columnas:
+            valores.update(v for v in facetas.valores(columna) if isinstance(v, str) and v)
+        conteo = {}
+        for valor in valores:
+            total = facetas.contar(base & _seleccionar(facetas, **{filtro: valor}))
+            if total:
+                conteo[valor] = total
+        recuentos[filtro] = conteo
+    return recuentos
+
+# Textos de los que sale el vocabulario de la corrección de erratas
+CAMPOS_TRIGRAMAS = {
+    # r.nombre es el coloquial si lo hay; el oficial sale del programa completo
+    'nombre': lambda r: r.nombre,
+    'nombre_oficial': lambda r: r.datos.get('nombre'),
+    'organismo': lambda r: r.organismo,
+}
+
+# Autocompletado: tipo -> (texto o textos del programa, si se sugiere también desde cada palabra)
+CAMPOS_SUGERENCIAS = {
+    'nombre': (lambda r: r.nombre, True),
+    'organismo': (lambda r: r.organismo, True),
+    'tag': (lambda r: r.datos.get('tags'), False),
+    'bdns': (lambda r: str(r.codigo_bdns) if r.codigo_bdns else None, False),
+}
+
+# Valores de sort admitidos por la API -> columna de rango del índice
+ORDENACIONES = {
+    'fecha_cierre': 'fecha_cierre',
+    'fecha_apertura': 'fecha_apertura',
+    'nombre': 'nombre',
+    'organismo': 'organismo',
+    'fecha_publicacion_bdns': 'fecha_publicacion_bdns',
+    'presupuesto': 'importe_maximo',
+    'importe_maximo': 'importe_maximo',
+    'estado': 'estado',
+}
+
+def proyectar_campos(programa, campos):
+    """
+    Copia de un programa con solo los campos indicados
+
+    Args:
+        campos: Lista de campos; admite campos anidados con punto
+            ('convocatoria.fecha_cierre')
+    """
+    resultado = {}
+    for campo in campos:
+        origen, destino = programa, resultado
+        partes = campo.split('.')
+        for parte in partes[:-1]:
+            origen = origen.get(parte)
+            if not isinstance(origen, dict):
+                break
+            destino = destino.setdefault(parte, {})
+        else:
+            if partes[-1] in origen:
+                destino[partes[-1]] = origen[partes[-1]]
+    return resultado
+
+def _mas_relevantes(relevancia, facetas, seleccion, search_term, inicio=0, limite=None):
+    """
+    Registros de la selección ordenados por puntuación BM25 (solo los de la página)
+
+    Se usa un heap para quedarse con los inicio + limite mejores sin ordenar
+    toda la selección. A igual puntuación (o sin búsqueda) se mantiene el
+    orden del catálogo.
+    """
+    registros = facetas.registros(seleccion)
+    puntuaciones = relevancia.puntuaciones(terminos(search_term or ''))
+    if not puntuaciones:
+        return registros[inicio:inicio + limite] if limite else registros[inicio:]
+    clave = lambda r: puntuaciones.get(r.id, 0.0)
+    if limite:
+        return heapq.nlargest(inicio + limite, registros, key=clave)[inicio:]
+    return sorted(registros, key=clave, reverse=True)[inicio:]
+
+def _ordenar_abiertas_primero(facetas, seleccion, columna, descendente, inicio=0, limite=None):
+    """
+    Registros de la selección con las convocatorias no cerradas primero y,
+    dentro de cada grupo, ordenados por la columna
+
+    Solo se ordena la parte de cada grupo que cae en la página.
+    """
+    cerradas = seleccion & facetas.bits('estado', 'Cerrada')
+    abiertas = seleccion & ~cerradas
+    n_abiertas = facetas.contar(abiertas)
+    registros = []
+    if inicio < n_abiertas:
+        registros = facetas.registros_ordenados(abiertas, columna, descendente, inicio, limite)
+    if limite is None or len(registros) < limite:
+        resto = None if limite is None else limite - len(registros)
+        registros += facetas.registros_ordenados(cerradas, columna, descendente,
+                                                 max(inicio - n_abiertas, 0), resto)
+    return registros
+
+def _columna_de_orden(sort):
+    """Columna de rango por la que ordena sort (None: relevancia u orden del almacén)"""
+    columna = ORDENACIONES.get((sort or '').lstrip('-'))
+    if columna is None and sort and sort.lstrip('-') in COLUMNAS_RANGO:
+        columna = sort.lstrip('-')
+    return columna
+
+def _ordenar_seleccion(catalogo, seleccion, sort, search_term=None, inicio=0, limite=None,
+                       abiertas_primero=False):
+    """Registros de la selección en el orden de sort (ver buscar_programas), solo los de la página"""
+    facetas = catalogo.indice('facetas')
+    columna = _columna_de_orden(sort)
+    if sort == 'relevance':
+        return _mas_relevantes(catalogo.indice('relevancia'), facetas, seleccion, search_term, inicio, limite)
+    if columna and abiertas_primero:
+        return _ordenar_abiertas_primero(facetas, seleccion, columna, sort.startswith('-'), inicio, limite)
+    if columna:
+        return facetas.registros_ordenados(seleccion, columna, sort.startswith('-'), inicio, limite)
+    return facetas.registros(seleccion, inicio, limite)
+
+def buscar_programas(filtros=None, sort=None, page=1, page_size=None, fields=None, facets=False,
+                     abiertas_primero=False):
+    """
+    Devuelve una página de programas filtrados y ordenados
+
+    Solo se reconstruyen los programas de la página pedida.
+
+    Args:
+        filtros: Diccionario con los filtros de load_financing_programs
+        sort: Clave de ORDENACIONES (o columna de rango), con '-' delante para
+            orden descendente, o 'relevance' (BM25 con la búsqueda de
+            filtros['search_term'], de más a menos relevante). Sin sort (o
+            desconocido), el orden del almacén.
+        page: Número de página, empezando en 1
+        page_size: Programas por página (None = todos)
+        fields: Lista de campos a devolver de cada programa (None = todos)
+        facets: Si es True, añade 'facetas' con los recuentos por valor
+            (ver _contar_facetas)
+        abiertas_primero: Con una ordenación por columna, las convocatorias
+            no cerradas van antes que las cerradas (orden del dashboard)
+
+    Si la búsqueda (search_term) no da ningún resultado, se repite con las
+    palabras desconocidas corregidas por las más parecidas de los nombres y
+    organismos del catálogo (ver utils/financing_trigram.py).
+
+    Returns:
+        Diccionario con 'programas', 'total' (programas que cumplen los
+        filtros) y 'version' (versión del catálogo con la que se calculó),
+        más 'busqueda_corregida' si se corrigió la búsqueda
+    """
+    catalogo = get_catalogo()
+    with catalogo.lectura():
+        version = catalogo.version
+        facetas = catalogo.indice('facetas')
+        filtros = filtros or {}
+        seleccion = _seleccionar(facetas, **filtros)
+        total = facetas.contar(seleccion)
+
+        corregida = None
+        if not total and filtros.get('search_term'):
+            corregida = catalogo.indice('trigramas').corregir(
+                filtros['search_term'], conocida=lambda p: facetas.contar(facetas.bits_prefijo('terminos', p)) > 0)
+            if corregida:
+                filtros = dict(filtros, search_term=corregida)
+                seleccion = _seleccionar(facetas, **filtros)
+                total = facetas.contar(seleccion)
+        recuentos = _contar_facetas(facetas, filtros, seleccion) if facets else None
+
+        inicio = (max(page, 1) - 1) * page_size if page_size else 0
+        registros = _ordenar_seleccion(catalogo, seleccion, sort, filtros.get('search_term'),
+                                       inicio, page_size, abiertas_primero)
+
+    programas = [r.datos for r in registros]
+    if fields:
+        programas = [proyectar_campos(p, fields) for p in programas]
+    resultado = {'programas': programas, 'total': total, 'version': version}
+    if recuentos is not None:
+        resultado['facetas'] = recuentos
+    if corregida:
+        resultado['busqueda_corregida'] = corregida
+    return resultado
+
+# Programas que se leen del catálogo de cada vez al exportar en el orden del almacén
+LOTE_EXPORTACION = 500
+
+def _registros_por_lotes(catalogo, seleccion, generacion):
+    """
+    Genera los registros de la selección en el orden del almacén, por lotes
+
+    La selección y la generación del índice de facetas se toman juntas, con
+    el catálogo bloqueado. Cada lote se lee también con el catálogo
+    bloqueado, pero entre lotes se puede modificar: un programa cambiado sale
+    con sus datos nuevos y uno eliminado ya no sale.
+
+    Raises:
+        RuntimeError: Si el índice de facetas se reconstruye (recarga completa
+            o compactación) antes de terminar, porque las posiciones de la
+            selección ya no corresponden a los mismos programas
+    """
+    inicio = 0
+    while True:
+        with catalogo.lectura():
+            facetas = catalogo.indice('facetas')
+            if facetas.generacion != generacion:
+                raise RuntimeError("El catálogo se ha recargado durante la exportación")
+            lote = facetas.registros(seleccion, inicio, LOTE_EXPORTACION)
+        for registro in lote:
+            if registro is not None:
+                yield registro
+        if len(lote) < LOTE_EXPORTACION:
+            return
+        inicio += LOTE_EXPORTACION
+
+def exportar_programas(filtros=None, sort=None, fields=None):
+    """
+    Programas filtrados y ordenados, uno a uno, para exportaciones
+
+    En el orden del almacén (sin sort o desconocido) solo se guarda la
+    selección (un bit por programa del catálogo) y los registros se leen por
+    lotes de LOTE_EXPORTACION mientras se itera (ver _registros_por_lotes).
+    Con una ordenación o por relevancia, la selección ordenada se resuelve al
+    llamar como una lista de referencias a los registros, que son inmutables:
+    O(n) referencias, no copias. En los dos casos cada programa se reconstruye
+    como diccionario cuando se pide y no se retiene ninguno.
+
+    Args:
+        filtros, sort, fields: Como en buscar_programas
+
+    Returns:
+        (total, iterador de diccionarios de programa). En el orden del
+        almacén, total es el número de programas al llamar.
+    """
+    catalogo = get_catalogo()
+    with catalogo.lectura():
+        filtros = filtros or {}
+        facetas = catalogo.indice('facetas')
+        seleccion = _seleccionar(facetas, **filtros)
+        if sort != 'relevance' and _columna_de_orden(sort) is None:
+            total = facetas.contar(seleccion)
+            registros = _registros_por_lotes(catalogo, seleccion, facetas.generacion)
+        else:
+            registros = _ordenar_seleccion(catalogo, seleccion, sort, filtros.get('search_term'))
+            total = len(registros)
+
+    if fields:
+        return total, (proyectar_campos(r.datos, fields) for r in registros)
+    return total, (r.datos for r in registros)
+
+# Columnas de la exportación CSV: las anidadas con punto (convocatoria.fecha_cierre)
+COLUMNAS_CSV = [
+    'id', 'codigo_bdns', 'nombre', 'nombre_coloquial', 'nombre_oficial', 'organismo', 'tipo_ayuda', 'ambito',
+    'beneficiarios', 'sectores', 'tipo_proyecto', 'fondos_europeos', 'fecha_publicacion_bdns',
+    'convocatoria.estado', 'convocatoria.fecha_apertura', 'convocatoria.fecha_cierre',
+    'financiacion.intensidad', 'financiacion.presupuesto_total', 'financiacion.presupuesto_minimo',
+    'financiacion.presupuesto_maximo', 'financiacion.importe_minimo_subvencionable',
+    'financiacion.importe_maximo_subvencionable', 'resumen_breve', 'enlaces.url_bdns',
+]
+
+def fila_csv(programa, columnas):
+    """
+    Valores de un programa para una fila CSV
+
+    Los campos anidados se leen con punto, las listas se unen con '; ' y los
+    diccionarios que queden se escriben como JSON.
+    """
+    fila = []
+    for columna in columnas:
+        valor = programa
+        for parte in columna.split('.'):
+            valor = valor.get(parte) if isinstance(valor, dict) else None
+        if valor is None:
+            valor = ''
+        elif isinstance(valor, list):
+            valor = '; '.join(json.dumps(v, ensure_ascii=False) if isinstance(v, dict) else str(v)
+                              for v in valor if v is not None)
+        elif isinstance(valor, dict):
+            valor = json.dumps(valor, ensure_ascii=False)
+        fila.append(valor)
+    return fila
+
+def sugerir(prefijo, limite=8):
+    """
+    Sugerencias de autocompletado para el buscador y el campo BDNS
+
+    Returns:
+        Lista de diccionarios {'texto', 'tipo' (nombre, organismo, tag o
+        bdns), 'total' (programas que lo usan)}
+    """
+    catalogo = get_catalogo()
+    with catalogo.lectura():
+        sugerencias = catalogo.indice('sugerencias').sugerir(prefijo, limite)
+    return [{'texto': texto, 'tipo': tipo, 'total': total} for tipo, texto, total in sugerencias]
+
 def load_financing_programs(organismo=None, tipo_ayuda=None, ambito=None, beneficiario=None,
                            sector=None, tipo_proyecto=None, fondos_europeos=None, origen_fondos=None, estado=None,
-                           presupuesto_min=None, presupuesto_max=None, search_term=None, bdns=None):
-    """Carga y filtra programas de financiación según los criterios especificados"""
+                           presupuesto_min=None, presupuesto_max=None, search_term=None, bdns=None,
+                           importe_min=None, importe_max=None, cierre_desde=None, cierre_hasta=None,
+                           apertura_desde=None, apertura_hasta=None, sort=None):
+    """
+    Carga y filtra programas de financiación según los criterios especificados
+
+    Los filtros categóricos, la búsqueda de texto y los rangos de importes y
+    fechas se resuelven con el índice de facetas (AND/OR de bitsets); solo los
+    programas resultantes se reconstruyen como diccionarios.
+
+    Args:
+        cierre_desde, cierre_hasta, apertura_desde, apertura_hasta: Límites
+            inclusivos de fecha ('YYYY-MM-DD' o datetime); una fecha sin hora
+            como límite superior incluye todo ese día.
+        sort: Ver buscar_programas. Sin sort, el orden del almacén.
+    """
     try:
-        programas = load_all_financing_programs()
-
-        if organismo:
-            # Usar campo normalizado directamente, con fallback a campo antiguo
-            programas = [p for p in programas if
-                        p.get('organismo') == organismo or p.get('organismo_grupo') == organismo]
-
-        if tipo_ayuda:
-            # Usar campo normalizado directamente, con fallback a campo antiguo
-            programas = [p for p in programas if
-                        p.get('tipo_ayuda') == tipo_ayuda or p.get('tipo_ayuda_grupo') == tipo_ayuda]
-
-        if ambito:
-            programas = [p for p in programas if p.get('ambito') and ambito.lower() in p['ambito'].lower()]
-
-        if beneficiario:
-            # Usar campo normalizado directamente, con fallback a campo antiguo
-            programas = [p for p in programas if
-                        (isinstance(p.get('beneficiarios'), list) and beneficiario in p['beneficiarios']) or
-                        beneficiario in p.get('beneficiarios_grupos', [])]
-
-        if sector:
-            # Usar campo normalizado directamente, con fallback a campo antiguo
-            programas = [p for p in programas if
-                        (isinstance(p.get('sectores'), list) and sector in p['sectores']) or
-                        sector in p.get('sectores_grupos', [])]
-
-        if tipo_proyecto:
-            # Nuevo campo normalizado
-            def tiene_tipo_proyecto(p, tipo):
-                tp = p.get('tipo_proyecto')
-                if isinstance(tp, list):
-                    return tipo in tp
-                elif isinstance(tp, str):
-                    return tipo.lower() in tp.lower()
-                return False
-            programas = [p for p in programas if tiene_tipo_proyecto(p, tipo_proyecto)]
-
-        # Filtrar por fondos europeos (nuevo campo) o origen_fondos (compatibilidad)
-        fondos_filter = fondos_europeos or origen_fondos
-        if fondos_filter:
-            programas = [p for p in programas if
-                        (isinstance(p.get('fondos_europeos'), list) and fondos_filter in p['fondos_europeos']) or
-                        p.get('origen_fondos') == fondos_filter]
-        
-        if estado:
-            programas = [p for p in programas if 'convocatoria' in p and p['convocatoria'].get('estado') and estado.lower() in p['convocatoria']['estado'].lower()]
-        
-        if presupuesto_min is not None:
-            programas = [p for p in programas if 'financiacion' in p and 
-                         p['financiacion'].get('presupuesto_minimo') is not None and 
-                         p['financiacion']['presupuesto_minimo'] != 'nan' and
-                         float(p['financiacion']['presupuesto_minimo']) >= presupuesto_min]
-        
-        if presupuesto_max is not None:
-            programas = [p for p in programas if 'financiacion' in p and 
-                         p['financiacion'].get('presupuesto_maximo') is not None and 
-                         p['financiacion']['presupuesto_maximo'] != 'nan' and
-                         float(p['financiacion']['presupuesto_maximo']) <= presupuesto_max]
-        
-        if bdns:
-            bdns_str = str(bdns).lower()
-            programas = [p for p in programas if p.get('codigo_bdns') and 
-                        str(p['codigo_bdns']).lower().startswith(bdns_str)]
-        
-        if search_term:
-            programas = [p for p in programas if buscar_en_programa(p, search_term)]
-        
-        return programas
+        filtros = {
+            'organismo': organismo, 'tipo_ayuda': tipo_ayuda, 'ambito': ambito,
+            'beneficiario': beneficiario, 'sector': sector, 'tipo_proyecto': tipo_proyecto,
+            'fondos_europeos': fondos_europeos, 'origen_fondos': origen_fondos, 'estado': estado,
+            'presupuesto_min': presupuesto_min, 'presupuesto_max': presupuesto_max,
+            'search_term': search_term, 'bdns': bdns, 'importe_min': importe_min, 'importe_max': importe_max,
+            'cierre_desde': cierre_desde, 'cierre_hasta': cierre_hasta,
+            'apertura_desde': apertura_desde, 'apertura_hasta': apertura_hasta
+        }
+        return buscar_programas(filtros, sort)['programas']
     except Exception as e:
         print(f"Error al filtrar programas de financiación: {e}")
         import traceback
@@ -476,82 +1078,56 @@ def load_financing_programs(organismo=None, tipo_ayuda=None, ambito=None, benefi
 def get_financing_program_by_id(programa_id):
     """Obtiene un programa de financiación por su ID"""
     try:
-        programas = load_all_financing_programs()
-        for programa in programas:
-            if programa.get('id') == programa_id:
-                if 'codigo_bdns' in programa and programa['codigo_bdns']:
-                    try:
-                        if isinstance(programa['codigo_bdns'], (int, float)):
-                            programa['codigo_bdns'] = int(programa['codigo_bdns'])
-                        elif isinstance(programa['codigo_bdns'], str) and '.' in programa['codigo_bdns']:
-                            programa['codigo_bdns'] = int(float(programa['codigo_bdns']))
-                    except (ValueError, TypeError):
-                        pass
-                return programa
-        return None
+        return get_catalogo().obtener(programa_id)
     except Exception as e:
         print(f"Error al buscar programa por ID: {e}")
         return None
 
-def get_financing_stats():
-    """Obtiene estadísticas generales sobre los programas de financiación"""
-    try:
-        programas = load_all_financing_programs()
-        
-        total_programas = len(programas)
-        
-        estados = {'Abierta': 0, 'Cerrada': 0, 'Próxima apertura': 0, 'Cierre próximo': 0}
-        for p in programas:
-            if 'convocatoria' in p and 'estado' in p['convocatoria']:
-                estado = p['convocatoria']['estado']
-                if estado == 'Cierre próximo':
-                    estados['Cierre próximo'] += 1
-                elif estado == 'Próxima apertura':
-                    estados['Próxima apertura'] += 1
-                elif 'Abierta' in estado:
-                    estados['Abierta'] += 1
-                elif 'Cerrada' in estado:
-                    estados['Cerrada'] += 1
-        
-        tipos_ayuda = {}
-        for p in programas:
-            grupo = p.get('tipo_ayuda_grupo', 'Otros')
-            tipos_ayuda[grupo] = tipos_ayuda.get(grupo, 0) + 1
-        
-        ambitos = {}
-        for p in programas:
-            if 'ambito' in p:
-                ambito = p['ambito']
-                ambitos[ambito] = ambitos.get(ambito, 0) + 1
-        
-        organismos = {}
-        for p in programas:
-            grupo = p.get('organismo_grupo', 'Otros')
-            organismos[grupo] = organismos.get(grupo, 0) + 1
-        
-        return {
-            'total': total_programas,
-            'estados': estados,
-            'tipos_ayuda': tipos_ayuda,
-            'ambitos': ambitos,
-            'organismos': organismos
-        }
-    except Exception as e:
-        print(f"Error al generar estadísticas de financiación: {e}")
-        import traceback
-        print(traceback.format_exc())
-        return {
-            'total': 0,
-            'estados': {},
-            'tipos_ayuda': {},
-            'ambitos': {},
-            'organismos': {}
-        }
+# Resumen del catálogo: ((catálogo, versión), resumen) y primera página del
+# dashboard: ((catálogo, versión, page_size), página)
+_resumen = None
+_primera_pagina = None
 
-def get_financing_filter_options():
-    """Obtiene las opciones SIMPLIFICADAS disponibles para los filtros del dashboard"""
-    try:
-        programas = load_all_financing_programs()
+def _ordenar_con_otros_al_final(valores):
+    """Lista ordenada con 'Otros' (si está) al final"""
+    lista_ordenada = sorted(x for x in valores if x != 'Otros')
+    if 'Otros' in valores:
+        lista_ordenada.append('Otros')
+    return lista_ordenada
+
+def _resumen_catalogo():
+    """
+    Estadísticas, opciones de filtro y tarjetas del dashboard
+
+    Los recuentos salen del índice de facetas (popcount de bitsets o
+    np.bincount con el motor columnar); los conjuntos de opciones, de una
+    pasada por los registros. El resultado se guarda para la versión del
+    catálogo con la que se calculó, así que hasta el siguiente cambio las
+    llamadas no recorren nada.
+
+    Returns:
+        Diccionario con 'stats' (ver get_financing_stats), 'filter_options'
+        (ver get_financing_filter_options), 'kpis' (tarjetas del dashboard),
+        'recuento_estados' (programas por estado, como la faceta estado de la
+        API) y 'version'. Es compartido entre llamadas: no se debe modificar.
+    """
+    global _resumen
+    catalogo = get_catalogo()
+    with catalogo.lectura():
+        clave = (id(catalogo), catalogo.version)
+        if _resumen is not None and _resumen[0] == clave:
+            return _resumen[1]
+
+        facetas = catalogo.indice('facetas')
+        total_programas = facetas.contar(facetas.todos())
+        por_estado = facetas.valores('estado')
+        por_tipo_ayuda = facetas.valores('tipo_ayuda_grupo')
+        por_organismo = facetas.valores('organismo_grupo')
+        por_ambito = facetas.valores('ambito')
+        # Los programas con 'ambito': null cuentan aparte (clave None)
+        ambito_nulo = facetas.contar(facetas.bits('ambito_nulo', True))
+        if ambito_nulo:
+            por_ambito[None] = ambito_nulo
 
         organismos = set()
         tipos_ayuda = set()
@@ -562,81 +1138,175 @@ def get_financing_filter_options():
         origenes_fondos = set()
         estados = set()
 
-        for p in programas:
-            # Usar campos normalizados directamente (con fallback a campos antiguos)
-            if 'organismo' in p and p['organismo']:
-                organismos.add(p['organismo'])
-            elif 'organismo_grupo' in p:
-                organismos.add(p['organismo_grupo'])
-
-            # Tipo de ayuda (ahora puede ser array o string)
-            if 'tipo_ayuda' in p and p['tipo_ayuda']:
-                if isinstance(p['tipo_ayuda'], list):
-                    for ta in p['tipo_ayuda']:
+        registros = catalogo.registros()
+        for r in registros:
+            # Campos normalizados (con fallback a campos antiguos)
+            if r.organismo:
+                organismos.add(r.organismo)
+            elif r.organismo_grupo is not None:
+                organismos.add(r.organismo_grupo)
+
+            # Tipo de ayuda (puede ser array o string)
+            if r.tipo_ayuda:
+                if isinstance(r.tipo_ayuda, tuple):
+                    for ta in r.tipo_ayuda:
                         if ta:
                             tipos_ayuda.add(ta)
                 else:
-                    tipos_ayuda.add(p['tipo_ayuda'])
-            elif 'tipo_ayuda_grupo' in p:
-                tipos_ayuda.add(p['tipo_ayuda_grupo'])
+                    tipos_ayuda.add(r.tipo_ayuda)
+            elif r.tipo_ayuda_grupo is not None:
+                tipos_ayuda.add(r.tipo_ayuda_grupo)
 
-            if 'ambito' in p and p['ambito']:
-                ambitos.add(p['ambito'])
+            if r.ambito:
+                ambitos.add(r.ambito)
 
-            # Beneficiarios (ahora ya vienen normalizados desde Gemini)
-            if 'beneficiarios' in p and isinstance(p['beneficiarios'], list):
-                for b in p['beneficiarios']:
+            # Beneficiarios y sectores (ya vienen normalizados desde Gemini)
+            if r.beneficiarios is not None:
+                for b in r.beneficiarios:
                     if b:
                         beneficiarios.add(b)
-            elif 'beneficiarios_grupos' in p:
-                for b in p['beneficiarios_grupos']:
-                    beneficiarios.add(b)
-
-            # Sectores (ahora ya vienen normalizados desde Gemini)
-            if 'sectores' in p and isinstance(p['sectores'], list):
-                for s in p['sectores']:
+            else:
+                beneficiarios.update(r.beneficiarios_grupos)
+            if r.sectores is not None:
+                for s in r.sectores:
                     if s:
                         sectores.add(s)
-            elif 'sectores_grupos' in p:
-                for s in p['sectores_grupos']:
-                    sectores.add(s)
-
-            # Tipo de proyecto (nuevo campo normalizado)
-            if 'tipo_proyecto' in p:
-                if isinstance(p['tipo_proyecto'], list):
-                    for t in p['tipo_proyecto']:
-                        if t:
-                            tipos_proyecto.add(t)
-                elif p['tipo_proyecto']:  # Si es string (convocatorias antiguas)
-                    tipos_proyecto.add(p['tipo_proyecto'])
-
-            # Fondos europeos (nuevo campo array) o origen_fondos (compatibilidad)
-            if 'fondos_europeos' in p and isinstance(p['fondos_europeos'], list):
-                for f in p['fondos_europeos']:
+            else:
+                sectores.update(r.sectores_grupos)
+
+            # Tipo de proyecto: lista o string (convocatorias antiguas)
+            if isinstance(r.tipo_proyecto, tuple):
+                for t in r.tipo_proyecto:
+                    if t:
+                        tipos_proyecto.add(t)
+            elif r.tipo_proyecto:
+                tipos_proyecto.add(r.tipo_proyecto)
+
+            # Fondos europeos (array) u origen_fondos (compatibilidad)
+            if r.fondos_europeos is not None:
+                for f in r.fondos_europeos:
                     if f:
                         origenes_fondos.add(f)
-            elif 'origen_fondos' in p and p['origen_fondos']:
-                origenes_fondos.add(p['origen_fondos'])
+            elif r.origen_fondos:
+                origenes_fondos.add(r.origen_fondos)
+
+            if r.estado is not None:
+                estados.add(r.estado)
 
-            if 'convocatoria' in p and 'estado' in p['convocatoria']:
-                estados.add(p['convocatoria']['estado'])
+        estados_stats = {'Abierta': 0, 'Cerrada': 0, 'Próxima apertura': 0, 'Cierre próximo': 0}
+        for estado, n in por_estado.items():
+            if not isinstance(estado, str):
+                continue
+            if estado == 'Cierre próximo':
+                estados_stats['Cierre próximo'] += n
+            elif estado == 'Próxima apertura':
+                estados_stats['Próxima apertura'] += n
+            elif 'Abierta' in estado:
+                estados_stats['Abierta'] += n
+            elif 'Cerrada' in estado:
+                estados_stats['Cerrada'] += n
 
-        def ordenar_con_otros_al_final(lista):
-            lista_ordenada = sorted([x for x in lista if x != 'Otros'])
-            if 'Otros' in lista:
-                lista_ordenada.append('Otros')
-            return lista_ordenada
+        # Tarjetas del dashboard: mismo reparto que updateStatistics() en el
+        # navegador, para que la primera página y la filtrada coincidan
+        kpis = {'total': total_programas, 'abiertas': 0, 'pendientes': 0, 'cerradas': 0}
+        for estado, n in por_estado.items():
+            estado = str(estado)
+            if 'Cierre próximo' in estado or 'Abierta' in estado:
+                kpis['abiertas'] += n
+            elif 'Próxima apertura' in estado or 'Pendiente' in estado:
+                kpis['pendientes'] += n
+            else:
+                kpis['cerradas'] += n
+
+        def agrupar_con_otros(conteos):
+            # Los programas sin grupo cuentan como 'Otros'
+            grupos = {}
+            for grupo, n in conteos.items():
+                grupos[grupo or 'Otros'] = grupos.get(grupo or 'Otros', 0) + n
+            sin_grupo = total_programas - sum(conteos.values())
+            if sin_grupo:
+                grupos['Otros'] = grupos.get('Otros', 0) + sin_grupo
+            return grupos
+
+        resumen = {
+            'stats': {
+                'total': total_programas,
+                'estados': estados_stats,
+                'tipos_ayuda': agrupar_con_otros(por_tipo_ayuda),
+                'ambitos': por_ambito,
+                'organismos': agrupar_con_otros(por_organismo)
+            },
+            'filter_options': {
+                'organismos': _ordenar_con_otros_al_final(organismos),
+                'tipos_ayuda': _ordenar_con_otros_al_final(tipos_ayuda),
+                'ambitos': sorted(ambitos),
+                'beneficiarios': _ordenar_con_otros_al_final(beneficiarios),
+                'sectores': _ordenar_con_otros_al_final(sectores),
+                'tipos_proyecto': _ordenar_con_otros_al_final(tipos_proyecto),
+                'origenes_fondos': _ordenar_con_otros_al_final(origenes_fondos),
+                'estados': sorted(estados)
+            },
+            'kpis': kpis,
+            'recuento_estados': por_estado,
+            'version': catalogo.version
+        }
+        _resumen = (clave, resumen)
+        return resumen
+
+def catalog_summary(page_size):
+    """
+    Datos de arranque del dashboard: resumen del catálogo y primera página
+
+    La primera página sale del índice (orden del dashboard: fecha de cierre
+    con las convocatorias no cerradas primero) y, como el resumen, se guarda
+    para la versión del catálogo.
+
+    Args:
+        page_size: Programas de la primera página (Config.DASHBOARD_PAGE_SIZE)
+
+    Returns:
+        Diccionario con las claves de _resumen_catalogo más 'programas',
+        'total' y 'page_size'. Es compartido entre llamadas: no se debe
+        modificar.
+    """
+    global _primera_pagina
+    catalogo = get_catalogo()
+    with catalogo.lectura():
+        resumen = _resumen_catalogo()
+        clave = (id(catalogo), resumen['version'], page_size)
+        if _primera_pagina is not None and _primera_pagina[0] == clave:
+            return _primera_pagina[1]
+
+        pagina = buscar_programas(sort='fecha_cierre', page=1, page_size=page_size, abiertas_primero=True)
+        datos = dict(resumen)
+        datos.update(programas=pagina['programas'], total=pagina['total'], page_size=page_size)
+        _primera_pagina = (clave, datos)
+        return datos
+
+def get_financing_stats():
+    """
+    Obtiene estadísticas generales sobre los programas de financiación
 
+    Salen de los recuentos del índice de facetas (ver _resumen_catalogo).
+    """
+    try:
+        return copy.deepcopy(_resumen_catalogo()['stats'])
+    except Exception as e:
+        print(f"Error al generar estadísticas de financiación: {e}")
+        import traceback
+        print(traceback.format_exc())
         return {
-            'organismos': ordenar_con_otros_al_final(list(organismos)),
-            'tipos_ayuda': ordenar_con_otros_al_final(list(tipos_ayuda)),
-            'ambitos': sorted(list(ambitos)),
-            'beneficiarios': ordenar_con_otros_al_final(list(beneficiarios)),
-            'sectores': ordenar_con_otros_al_final(list(sectores)),
-            'tipos_proyecto': ordenar_con_otros_al_final(list(tipos_proyecto)),
-            'origenes_fondos': ordenar_con_otros_al_final(list(origenes_fondos)),
-            'estados': sorted(list(estados))
+            'total': 0,
+            'estados': {},
+            'tipos_ayuda': {},
+            'ambitos': {},
+            'organismos': {}
         }
+
+def get_financing_filter_options():
+    """Obtiene las opciones SIMPLIFICADAS disponibles para los filtros del dashboard"""
+    try:
+        return copy.deepcopy(_resumen_catalogo()['filter_options'])
     except Exception as e:
         print(f"Error al obtener opciones de filtro: {e}")
         import traceback
@@ -654,7 +1324,7 @@ def get_financing_filter_options():
 
 def agregar_programa(datos_programa):
     """
-    Añade un nuevo programa al archivo JSON de programas de financiación
+    Añade un nuevo programa al almacén de programas de financiación
     
     Args:
         datos_programa: Diccionario con los datos del programa
@@ -663,40 +1333,9 @@ def agregar_programa(datos_programa):
         ID del programa añadido o None si hay error
     """
     try:
-        # Obtener la ruta al archivo JSON
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        json_path = os.path.join(base_dir, 'data', 'programas_financiacion.json')
-        
-        # Cargar programas existentes
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-        
-        # Generar ID único basado en el nombre (nombre_coloquial tiene prioridad)
-        nombre = datos_programa.get('nombre_coloquial') or datos_programa.get('nombre') or 'programa'
-        programa_id = nombre.lower().replace(' ', '-').replace('/', '-').replace('(', '').replace(')', '')
-        programa_id = programa_id[:50]  # Limitar longitud
-        
-        # Asegurarse de que el ID es único
-        ids_existentes = [p.get('id') for p in data['programas']]
-        id_original = programa_id
-        contador = 1
-        while programa_id in ids_existentes:
-            programa_id = f"{id_original}-{contador}"
-            contador += 1
-        
-        # Añadir ID al programa
-        datos_programa['id'] = programa_id
-        
-        # Añadir el programa a la lista
-        data['programas'].append(datos_programa)
-        
-        # Actualizar fecha de última actualización
-        data['ultima_actualizacion'] = datetime.now().isoformat()
-        data['total_programas'] = len(data['programas'])
-        
-        # Guardar el archivo JSON actualizado
-        with open(json_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+        enriquecer_programa(datos_programa)
+        # El almacén asegura que el ID es único (sufijo -1, -2... si ya existe)
+        programa_id = get_catalogo().agregar(datos_programa, generar_id_base(datos_programa))
         
         print(f"Programa añadido exitosamente con ID: {programa_id}")
         return programa_id
@@ -707,11 +1346,122 @@ def agregar_programa(datos_programa):
         print(traceback.format_exc())
         return None
 
+def agregar_programas(programas, reemplazar=True):
+    """
+    Añade (o reemplaza) varios programas con una sola escritura en el almacén
+
+    Los IDs únicos se asignan en una pasada sobre los existentes, en lugar de
+    una lectura y una escritura por programa como con agregar_programa.
+
+    Args:
+        programas: Lista de diccionarios de programa (se modifican)
+        reemplazar: Si es True, un programa que trae un ID existente lo
+            sustituye; si no, siempre se añade con un ID nuevo. Los programas
+            sin ID siempre se añaden con un ID nuevo derivado del nombre (como
+            en agregar_programa), aunque coincida con el de otro programa
+
+    Returns:
+        Lista de (ID asignado, True si es nuevo) en el orden de programas, o
+        None si hay error
+    """
+    try:
+        elementos = []
+        for programa in programas:
+            enriquecer_programa(programa)
+            # Solo se sustituye un programa cuando el ID viene en los datos
+            sustituir = bool(reemplazar and programa.get('id'))
+            id_base = programa['id'] if sustituir else generar_id_base(programa)
+            elementos.append((programa, id_base, sustituir))
+        resultado = get_catalogo().agregar_varios(elementos)
+
+        print(f"{len(resultado)} programas guardados en lote")
+        return resultado
+
+    except Exception as e:
+        print(f"Error al agregar programas en lote: {e}")
+        import traceback
+        print(traceback.format_exc())
+        return None
+
+def _clave_bdns(codigo_bdns):
+    """Código BDNS con el formato de la columna codigo_bdns del índice (como en enriquecer_programa)"""
+    if codigo_bdns in (None, '', 'nan', 'No especificado'):
+        return None
+    try:
+        if isinstance(codigo_bdns, (int, float)):
+            codigo_bdns = int(codigo_bdns)
+        elif isinstance(codigo_bdns, str) and '.' in codigo_bdns:
+            codigo_bdns = int(float(codigo_bdns))
+    except (ValueError, TypeError):
+        pass
+    return str(codigo_bdns).lower()
+
+def _variantes_bdns(clave):
+    """Códigos a un dígito de distancia (cambiado, quitado o añadido): erratas de un código BDNS"""
+    variantes = set()
+    for i in range(len(clave) + 1):
+        if i < len(clave):
+            variantes.add(clave[:i] + clave[i + 1:])
+        for digito in '0123456789':
+            variantes.add(clave[:i] + digito + clave[i:])
+            if i < len(clave):
+                variantes.add(clave[:i] + digito + clave[i + 1:])
+    variantes.discard(clave)
+    return variantes
+
+# Programas más parecidos por nombre que se comparan al buscar duplicados
+CANDIDATOS_DUPLICADO = 20
+
+def candidatos_duplicado(programa, limite=CANDIDATOS_DUPLICADO):
+    """
+    Programas del catálogo que pueden duplicar a uno dado
+
+    Para no pasar todo el catálogo a verificar_duplicados, se toman con los
+    índices los programas con el mismo código BDNS (o a un dígito de
+    distancia) o el mismo ID y los más relevantes (BM25) para el nombre del
+    programa, en todo el catálogo y entre los de su mismo organismo.
+
+    Returns:
+        Lista de diccionarios de programa
+    """
+    catalogo = get_catalogo()
+    with catalogo.lectura():
+        facetas = catalogo.indice('facetas')
+        relevancia = catalogo.indice('relevancia')
+        registros = {}
+
+        clave_bdns = _clave_bdns(programa.get('codigo_bdns'))
+        if clave_bdns:
+            claves = [clave_bdns]
+            if clave_bdns.isdigit():
+                claves.extend(_variantes_bdns(clave_bdns))
+            for clave in claves:
+                for r in facetas.registros(facetas.bits('codigo_bdns', clave)):
+                    registros[r.id] = r
+        existente = catalogo.obtener_registro(programa.get('id')) if programa.get('id') else None
+        if existente is not None:
+            registros[existente.id] = existente
+
+        nombre = ' '.join(t for t in (programa.get('nombre'), programa.get('nombre_coloquial'))
+                          if isinstance(t, str))
+        puntuaciones = relevancia.puntuaciones(terminos(nombre))
+        if puntuaciones:
+            selecciones = [facetas.todos()]
+            organismo = programa.get('organismo')
+            if isinstance(organismo, str) and organismo.strip():
+                plegado = terminos(organismo)
+                selecciones.append(facetas.bits_donde('organismo', lambda v: terminos(v) == plegado))
+            for seleccion in selecciones:
+                for r in heapq.nlargest(limite, facetas.registros(seleccion),
+                                        key=lambda r: puntuaciones.get(r.id, 0.0)):
+                    registros[r.id] = r
+
+    return [r.datos for r in registros.values()]
+
 def get_total_programas():
     """Obtiene el total de programas en la base de datos"""
     try:
-        programas = load_all_financing_programs()
-        return len(programas)
+        return len(load_financing_records())
     except:
         return 0
 
@@ -721,7 +1471,7 @@ def get_programa_by_id(programa_id):
 
 def actualizar_programa(programa_id, datos_actualizados):
     """
-    Actualiza un programa existente en el archivo JSON
+    Actualiza un programa existente en el almacén
     
     Args:
         programa_id: ID del programa a actualizar
@@ -731,36 +1481,12 @@ def actualizar_programa(programa_id, datos_actualizados):
         True si se actualizó correctamente, False si no se encontró
     """
     try:
-        # Obtener la ruta al archivo JSON
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        json_path = os.path.join(base_dir, 'data', 'programas_financiacion.json')
-        
-        # Cargar programas existentes
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-        
-        # Buscar el programa por ID
-        programa_encontrado = False
-        for i, programa in enumerate(data['programas']):
-            if programa.get('id') == programa_id:
-                # Mantener el ID original
-                datos_actualizados['id'] = programa_id
-                # Reemplazar el programa
-                data['programas'][i] = datos_actualizados
-                programa_encontrado = True
-                break
-        
-        if not programa_encontrado:
+        enriquecer_programa(datos_actualizados)
+        # Se mantiene el ID original
+        if not get_catalogo().actualizar(programa_id, datos_actualizados):
             print(f"Programa con ID {programa_id} no encontrado")
             return False
         
-        # Actualizar fecha de última actualización
-        data['ultima_actualizacion'] = datetime.now().isoformat()
-        
-        # Guardar el archivo JSON actualizado
-        with open(json_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
-        
         print(f"Programa {programa_id} actualizado exitosamente")
         return True
         
@@ -772,7 +1498,7 @@ def actualizar_programa(programa_id, datos_actualizados):
 
 def eliminar_programa(programa_id):
     """
-    Elimina un programa del archivo JSON
+    Elimina un programa del almacén
     
     Args:
         programa_id: ID del programa a eliminar
@@ -781,30 +1507,10 @@ def eliminar_programa(programa_id):
         True si se eliminó correctamente, False si no se encontró
     """
     try:
-        # Obtener la ruta al archivo JSON
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        json_path = os.path.join(base_dir, 'data', 'programas_financiacion.json')
-        
-        # Cargar programas existentes
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-        
-        # Buscar y eliminar el programa por ID
-        programas_originales = len(data['programas'])
-        data['programas'] = [p for p in data['programas'] if p.get('id') != programa_id]
-        
-        if len(data['programas']) == programas_originales:
+        if not get_catalogo().eliminar(programa_id):
             print(f"Programa con ID {programa_id} no encontrado")
             return False
         
-        # Actualizar metadatos
-        data['ultima_actualizacion'] = datetime.now().isoformat()
-        data['total_programas'] = len(data['programas'])
-        
-        # Guardar el archivo JSON actualizado
-        with open(json_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
-        
         print(f"Programa {programa_id} eliminado exitosamente")
         return True
         
@@ -0,0 +1,381 @@
+"""
+Índice columnar de facetas para filtrar el catálogo de programas
+
+Cada columna categórica (organismo, estado, sectores...) se codifica como
+diccionario: cada valor distinto recibe un código entero y tiene asociado un
+bitset (un int de Python) con un bit por posición de programa. Un filtro se
+resuelve con AND/OR de bitsets, así que su coste apenas depende del número de
+filtros activos ni del tamaño del catálogo, y solo se materializan los
+programas de las posiciones que interesan.
+
+Las columnas de texto (p. ej. los términos de búsqueda de cada programa) se
+consultan además por prefijo sobre la lista ordenada de sus valores.
+
+Las columnas de rango (importes, fechas) se guardan como listas ordenadas de
+(valor, posición): un rango se localiza con bisect en O(log n) y sus k
+posiciones se convierten en bitset para combinarlo con el resto de filtros.
+Las mismas listas sirven para devolver los resultados ordenados.
+
+Los índices se mantienen desde ProgramCatalog: reconstruir() tras una carga
+completa y agregar()/eliminar() por cada programa que cambia.
+"""
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+
+_PATRON_TERMINO = re.compile(r'[a-z0-9]+')
+
+
+def plegar_texto(texto):
+    """Pasa un texto a minúsculas sin tildes ni diéresis ('Subvención' -> 'subvencion')"""
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def terminos(texto):
+    """Lista de términos de búsqueda (palabras plegadas) de un texto"""
+    return _PATRON_TERMINO.findall(plegar_texto(texto))
+
+
+def bitset_desde_posiciones(posiciones, tamano):
+    """Construye un bitset a partir de una lista de posiciones"""
+    if not posiciones:
+        return 0
+    buffer = bytearray((tamano + 7) // 8)
+    for posicion in posiciones:
+        buffer[posicion >> 3] |= 1 << (posicion & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def posiciones_de(bitset, inicio=0, limite=None):
+    """
+    Genera las posiciones activas de un bitset en orden ascendente
+
+    Args:
+        inicio: Número de posiciones activas que se saltan
+        limite: Máximo de posiciones devueltas (None = todas)
+    """
+    if not bitset or limite == 0:
+        return
+    binario = bin(bitset)[:1:-1]  # bit menos significativo primero
+    posicion = binario.find('1')
+    saltadas = devueltas = 0
+    while posicion != -1:
+        if saltadas < inicio:
+            saltadas += 1
+        else:
+            yield posicion
+            devueltas += 1
+            if limite is not None and devueltas >= limite:
+                return
+        posicion = binario.find('1', posicion + 1)
+
+
+class FacetIndex:
+    """Bitsets por valor para las columnas categóricas del catálogo"""
+
+    # Huecos (programas eliminados) a partir de los cuales se reordenan las posiciones
+    MINIMO_HUECOS_COMPACTAR = 1000
+
+    def __init__(self, columnas, rangos=None):
+        """
+        Args:
+            columnas: Diccionario nombre -> función(registro) que devuelve el
+                valor de la columna: None (sin valor), una tupla (columna
+                multivalor, p. ej. sectores) o un único valor hashable.
+            rangos: Diccionario nombre -> función(registro) que devuelve un
+                valor ordenable (número, fecha...) o None. Todos los valores
+                de una columna deben ser comparables entre sí.
+        """
+        self._columnas = columnas
+        self._rangos = rangos or {}
+        # Aumenta en cada reconstrucción: las posiciones de antes dejan de valer
+        self.generacion = 0
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vacía el índice"""
+        self._posiciones = {}   # programa_id -> posición
+        self._registros = []    # posición -> registro (None si se eliminó)
+        self._huecos = 0
+        self._vivos = 0         # bitset de posiciones ocupadas
+        # Por columna: valor -> código, y código -> bitset / valor
+        self._codigos = {nombre: {} for nombre in self._columnas}
+        self._bits = {nombre: [] for nombre in self._columnas}
+        self._valores = {nombre: [] for nombre in self._columnas}
+        # Valores de texto ordenados, para las búsquedas por prefijo
+        self._ordenados = {}
+        # Por columna de rango: lista ordenada de (valor, posición) y bitset de
+        # las posiciones que tienen valor
+        self._pares = {nombre: [] for nombre in self._rangos}
+        self._con_valor = {nombre: 0 for nombre in self._rangos}
+
+    @staticmethod
+    def _valores_de(valor):
+        """Valores indexables de una celda"""
+        if valor is None:
+            return ()
+        if isinstance(valor, tuple):
+            return valor
+        return (valor,)
+
+    @classmethod
+    def _conjunto_de(cls, valor):
+        """Valores hashables de una celda como conjunto"""
+        conjunto = set()
+        for v in cls._valores_de(valor):
+            try:
+                conjunto.add(v)
+            except TypeError:
+                pass
+        return conjunto
+
+    def _codigo(self, nombre, valor):
+        """Código del valor en la columna, creándolo si no existe (None si no es hashable)"""
+        codigos = self._codigos[nombre]
+        try:
+            codigo = codigos.get(valor)
+        except TypeError:
+            return None
+        if codigo is None:
+            codigo = codigos[valor] = len(self._valores[nombre])
+            self._valores[nombre].append(valor)
+            self._bits[nombre].append(0)
+            self._ordenados.pop(nombre, None)
+        return codigo
+
+    def reconstruir(self, elementos):
+        """Indexa de una vez una secuencia de (programa_id, registro)"""
+        self.reiniciar()
+        self.generacion += 1
+        for posicion, (programa_id, registro) in enumerate(elementos):
+            self._posiciones[programa_id] = posicion
+            self._registros.append(registro)
+        tamano = len(self._registros)
+        self._vivos = (1 << tamano) - 1
+
+        # Columna a columna: posiciones de cada código y un bitset por código al final
+        for nombre, extraer in self._columnas.items():
+            codigos = self._codigos[nombre]
+            valores = self._valores[nombre]
+            miembros = []
+            for posicion, registro in enumerate(self._registros):
+                valor = extraer(registro)
+                if valor is None:
+                    continue
+                for v in (valor if isinstance(valor, tuple) else (valor,)):
+                    try:
+                        codigo = codigos.get(v)
+                    except TypeError:
+                        continue
+                    if codigo is None:
+                        codigo = codigos[v] = len(valores)
+                        valores.append(v)
+                        miembros.append([])
+                    miembros[codigo].append(posicion)
+            self._bits[nombre] = [bitset_desde_posiciones(p, tamano) for p in miembros]
+
+        for nombre, extraer in self._rangos.items():
+            pares = []
+            for posicion, registro in enumerate(self._registros):
+                valor = extraer(registro)
+                if valor is not None:
+                    pares.append((valor, posicion))
+            pares.sort()
+            self._pares[nombre] = pares
+            self._con_valor[nombre] = bitset_desde_posiciones([p for _, p in pares], tamano)
+
+    def _marcar(self, posicion, registro, activar):
+        """Activa o desactiva los bits de un registro en todas las columnas"""
+        bit = 1 << posicion
+        for nombre, extraer in self._columnas.items():
+            bits = self._bits[nombre]
+            for valor in self._valores_de(extraer(registro)):
+                codigo = self._codigo(nombre, valor)
+                if codigo is None:
+                    continue
+                bits[codigo] = bits[codigo] | bit if activar else bits[codigo] & ~bit
+        for nombre, extraer in self._rangos.items():
+            self._marcar_rango(nombre, posicion, extraer(registro), activar)
+
+    def _marcar_rango(self, nombre, posicion, valor, activar):
+        """Inserta o quita el par (valor, posición) de una columna de rango"""
+        if valor is None:
+            return
+        pares = self._pares[nombre]
+        if activar:
+            insort(pares, (valor, posicion))
+            self._con_valor[nombre] |= 1 << posicion
+        else:
+            i = bisect_left(pares, (valor, posicion))
+            if i < len(pares) and pares[i] == (valor, posicion):
+                del pares[i]
+            self._con_valor[nombre] &= ~(1 << posicion)
+
+    def agregar(self, programa_id, registro):
+        """Indexa un programa nuevo o reemplaza el registro de uno existente (misma posición)"""
+        posicion = self._posiciones.get(programa_id)
+        if posicion is None:
+            posicion = self._posiciones[programa_id] = len(self._registros)
+            self._registros.append(None)
+        anterior = self._registros[posicion]
+        self._registros[posicion] = registro
+        self._vivos |= 1 << posicion
+        if anterior is None:
+            self._marcar(posicion, registro, True)
+            return
+
+        # Solo se tocan los valores que cambian (p. ej. el estado en una transición)
+        bit = 1 << posicion
+        for nombre, extraer in self._columnas.items():
+            antes = self._conjunto_de(extraer(anterior))
+            despues = self._conjunto_de(extraer(registro))
+            if antes == despues:
+                continue
+            bits = self._bits[nombre]
+            for valor in antes - despues:
+                codigo = self._codigo(nombre, valor)
+                if codigo is not None:
+                    bits[codigo] &= ~bit
+            for valor in despues - antes:
+                codigo = self._codigo(nombre, valor)
+                if codigo is not None:
+                    bits[codigo] |= bit
+        for nombre, extraer in self._rangos.items():
+            antes = extraer(anterior)
+            despues = extraer(registro)
+            if antes != despues:
+                self._marcar_rango(nombre, posicion, antes, False)
+                self._marcar_rango(nombre, posicion, despues, True)
+
+    def eliminar(self, programa_id):
+        """Quita un programa del índice"""
+        posicion = self._posiciones.pop(programa_id, None)
+        if posicion is None:
+            return
+        self._marcar(posicion, self._registros[posicion], False)
+        self._registros[posicion] = None
+        self._vivos &= ~(1 << posicion)
+        self._huecos += 1
+        if self._huecos >= self.MINIMO_HUECOS_COMPACTAR and self._huecos * 2 > len(self._registros):
+            self.reconstruir([(pid, self._registros[pos])
+                              for pid, pos in sorted(self._posiciones.items(), key=lambda x: x[1])])
+
+    def todos(self):
+        """Bitset con todos los programas indexados"""
+        return self._vivos
+
+    @staticmethod
+    def ninguno():
+        """Bitset vacío"""
+        return 0
+
+    def bits(self, nombre, valor):
+        """Bitset de los programas cuyo valor en la columna es exactamente valor"""
+        try:
+            codigo = self._codigos[nombre].get(valor)
+        except TypeError:
+            return 0
+        return 0 if codigo is None else self._bits[nombre][codigo]
+
+    def bits_donde(self, nombre, condicion):
+        """OR de los bitsets de los valores de texto de la columna que cumplen condicion(valor)"""
+        resultado = 0
+        bits = self._bits[nombre]
+        for codigo, valor in enumerate(self._valores[nombre]):
+            if isinstance(valor, str) and bits[codigo] and condicion(valor):
+                resultado |= bits[codigo]
+        return resultado
+
+    def bits_prefijo(self, nombre, prefijo):
+        """OR de los bitsets de los valores de texto de la columna que empiezan por prefijo"""
+        ordenados = self._ordenados.get(nombre)
+        if ordenados is None:
+            ordenados = self._ordenados[nombre] = sorted(
+                v for v in self._valores[nombre] if isinstance(v, str))
+        codigos = self._codigos[nombre]
+        bits = self._bits[nombre]
+        resultado = 0
+        for i in range(bisect_left(ordenados, prefijo), len(ordenados)):
+            valor = ordenados[i]
+            if not valor.startswith(prefijo):
+                break
+            resultado |= bits[codigos[valor]]
+        return resultado
+
+    def bits_rango(self, nombre, desde=None, hasta=None):
+        """Bitset de los programas con valor de la columna de rango entre desde y hasta (inclusive)"""
+        pares = self._pares[nombre]
+        inicio = 0 if desde is None else bisect_left(pares, (desde,))
+        fin = len(pares) if hasta is None else bisect_right(pares, (hasta, float('inf')))
+        if inicio == 0 and fin == len(pares):
+            return self._con_valor[nombre]
+        return bitset_desde_posiciones([p for _, p in pares[inicio:fin]], len(self._registros))
+
+    def registros_ordenados(self, bitset, nombre, descendente=False, inicio=0, limite=None):
+        """
+        Registros del bitset ordenados por una columna de rango
+
+        Los programas sin valor en la columna van al final, en el orden del
+        catálogo. A igual valor se mantiene también el orden del catálogo.
+
+        Recorre la lista ya ordenada de la columna (hacia atrás si es
+        descendente) y se detiene al reunir inicio + limite programas.
+        """
+        if limite == 0:
+            return []
+        con_valor = bitset & self._con_valor[nombre]
+        total = con_valor.bit_count()
+        resultado = []
+        if inicio < total:
+            # Bytes del bitset: comprobar una posición no copia el entero
+            bytes_seleccion = con_valor.to_bytes((len(self._registros) + 7) // 8, 'little')
+            pares = self._pares[nombre]
+            pendientes = min(total, inicio + limite) if limite is not None else total
+            for posicion in self._posiciones_ordenadas(pares, descendente):
+                if not bytes_seleccion[posicion >> 3] >> (posicion & 7) & 1:
+                    continue
+                pendientes -= 1
+                if inicio:
+                    inicio -= 1
+                else:
+                    resultado.append(self._registros[posicion])
+                if not pendientes:
+                    break
+            inicio = 0
+        else:
+            inicio -= total
+        restantes = None if limite is None else limite - len(resultado)
+        if restantes == 0:
+            return resultado
+        sin_valor = bitset & ~self._con_valor[nombre]
+        return resultado + self.registros(sin_valor, inicio, restantes)
+
+    @staticmethod
+    def _posiciones_ordenadas(pares, descendente):
+        """Posiciones de los pares (valor, posición) por valor; a igual valor, en el orden del catálogo"""
+        if not descendente:
+            for _, posicion in pares:
+                yield posicion
+            return
+        # Hacia atrás por grupos de igual valor, cada grupo hacia delante
+        fin = len(pares)
+        while fin:
+            comienzo = bisect_left(pares, (pares[fin - 1][0],), 0, fin)
+            for i in range(comienzo, fin):
+                yield pares[i][1]
+            fin = comienzo
+
+    def valores(self, nombre):
+        """Diccionario valor -> número de programas con ese valor en la columna"""
+        bits = self._bits[nombre]
+        return {valor: bits[codigo].bit_count()
+                for codigo, valor in enumerate(self._valores[nombre]) if bits[codigo]}
+
+    def registros(self, bitset, inicio=0, limite=None):
+        """Registros de las posiciones activas del bitset (en el orden del catálogo)"""
+        return [self._registros[p] for p in posiciones_de(bitset, inicio, limite)]
+
+    @staticmethod
+    def contar(bitset):
+        """Número de programas de un bitset"""
+        return bitset.bit_count()
@@ -0,0 +1,142 @@
+"""
+Índice de relevancia (BM25) para ordenar los resultados de búsqueda
+
+La búsqueda del índice de facetas es booleana: dice qué programas contienen
+todas las palabras, pero no cuáles encajan mejor. RelevanceIndex guarda, por
+término, la frecuencia de cada programa ponderada por campo (el nombre pesa
+más que la descripción) y la longitud ponderada de cada programa, y puntúa con
+BM25:
+
+    idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * longitud / longitud_media))
+
+Como en la búsqueda, cada palabra de la consulta es un prefijo: se expande a
+los términos del vocabulario que empiezan por ella, y los más largos que la
+palabra puntúan en proporción (len(palabra) / len(término)), de modo que una
+coincidencia exacta pesa más que una parcial.
+
+Se mantiene desde ProgramCatalog igual que FacetIndex: reconstruir() tras una
+carga completa y agregar()/eliminar() por cada programa que cambia.
+"""
+import math
+from bisect import bisect_left
+
+from .financing_index import terminos
+
+
+class RelevanceIndex:
+    """Listas invertidas término -> {programa_id: frecuencia ponderada} para BM25"""
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, campos):
+        """
+        Args:
+            campos: Diccionario campo del programa -> peso. Los campos pueden
+                ser texto o listas de textos.
+        """
+        self._campos = campos
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vacía el índice"""
+        self._listas = {}           # término -> {programa_id: frecuencia ponderada}
+        self._documentos = {}       # programa_id -> {término: frecuencia ponderada}
+        self._longitudes = {}       # programa_id -> longitud ponderada
+        self._longitud_total = 0.0
+        self._vocabulario = None    # términos ordenados (para expandir prefijos)
+
+    def _frecuencias(self, registro):
+        """Frecuencia ponderada de cada término del programa y longitud ponderada"""
+        programa = registro.datos
+        frecuencias = {}
+        longitud = 0.0
+        for campo, peso in self._campos.items():
+            valor = programa.get(campo)
+            if isinstance(valor, list):
+                valor = ' '.join(str(v) for v in valor if v)
+            if not valor:
+                continue
+            palabras = terminos(str(valor))
+            longitud += peso * len(palabras)
+            for palabra in palabras:
+                frecuencias[palabra] = frecuencias.get(palabra, 0.0) + peso
+        return frecuencias, longitud
+
+    def _indexar(self, programa_id, frecuencias, longitud):
+        """Añade las frecuencias de un programa a las listas invertidas"""
+        for termino, frecuencia in frecuencias.items():
+            lista = self._listas.get(termino)
+            if lista is None:
+                lista = self._listas[termino] = {}
+                self._vocabulario = None
+            lista[programa_id] = frecuencia
+        self._documentos[programa_id] = frecuencias
+        self._longitudes[programa_id] = longitud
+        self._longitud_total += longitud
+
+    def reconstruir(self, elementos):
+        """Indexa de una vez una secuencia de (programa_id, registro)"""
+        self.reiniciar()
+        for programa_id, registro in elementos:
+            self._indexar(programa_id, *self._frecuencias(registro))
+
+    def agregar(self, programa_id, registro):
+        """Indexa un programa nuevo o reemplaza uno existente"""
+        frecuencias, longitud = self._frecuencias(registro)
+        if self._documentos.get(programa_id) == frecuencias:
+            return  # p. ej. una transición de estado: el texto no cambia
+        self.eliminar(programa_id)
+        self._indexar(programa_id, frecuencias, longitud)
+
+    def eliminar(self, programa_id):
+        """Quita un programa del índice"""
+        frecuencias = self._documentos.pop(programa_id, None)
+        if frecuencias is None:
+            return
+        for termino in frecuencias:
+            lista = self._listas[termino]
+            del lista[programa_id]
+            if not lista:
+                del self._listas[termino]
+                self._vocabulario = None
+        self._longitud_total -= self._longitudes.pop(programa_id)
+
+    def _expandir(self, palabra):
+        """Términos del vocabulario que empiezan por la palabra"""
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self._listas)
+        vocabulario = self._vocabulario
+        expansion = []
+        for i in range(bisect_left(vocabulario, palabra), len(vocabulario)):
+            if not vocabulario[i].startswith(palabra):
+                break
+            expansion.append(vocabulario[i])
+        return expansion
+
+    def puntuaciones(self, consulta):
+        """
+        Puntuación BM25 de cada programa que contiene alguna palabra de la consulta
+
+        Args:
+            consulta: Lista de palabras ya plegadas (ver financing_index.terminos)
+
+        Returns:
+            Diccionario programa_id -> puntuación (los que no aparecen, 0)
+        """
+        total = len(self._documentos)
+        if not total:
+            return {}
+        media = self._longitud_total / total or 1.0
+        k1, b = self.K1, self.B
+        puntuaciones = {}
+        for palabra in set(consulta):
+            for termino in self._expandir(palabra):
+                lista = self._listas[termino]
+                idf = math.log(1 + (total - len(lista) + 0.5) / (len(lista) + 0.5))
+                idf *= len(palabra) / len(termino)
+                for programa_id, tf in lista.items():
+                    norma = k1 * (1 - b + b * self._longitudes[programa_id] / media)
+                    puntuaciones[programa_id] = (puntuaciones.get(programa_id, 0.0) +
+                                                 idf * tf * (k1 + 1) / (tf + norma))
+        return puntuaciones
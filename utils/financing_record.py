@@ -0,0 +1,120 @@
+"""
+Representación compacta de un programa de financiación en el catálogo
+
+Cada worker mantiene miles de programas en memoria. Como diccionarios anidados
+ocupan mucho (cada programa repite cadenas largas como el organismo o
+'Próxima apertura') y los bucles de filtrado recorren estructuras dispersas.
+
+ProgramRecord guarda en __slots__ solo los campos que usan los filtros, las
+estadísticas y las opciones de filtro, con los valores categóricos internados
+(sys.intern) para que todos los programas compartan la misma cadena. El
+programa completo se conserva serializado con marshal y se reconstruye solo
+cuando se necesita (vista de detalle, salida JSON).
+
+Los registros se comparten entre peticiones y no se modifican: un cambio de
+estado crea una copia (con_estado) que comparte el programa serializado.
+"""
+import sys
+import marshal
+
+
+def _internar(valor):
+    """Interna una cadena; el resto de valores se devuelven tal cual"""
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+
+def _tupla_internada(valor):
+    """Convierte una lista en tupla de valores internados (None si no es lista)"""
+    if not isinstance(valor, list):
+        return None
+    return tuple(_internar(v) for v in valor)
+
+
+def estado_de(programa):
+    """Estado de la convocatoria de un programa (None si no tiene)"""
+    convocatoria = programa.get('convocatoria')
+    if not isinstance(convocatoria, dict):
+        return None
+    return convocatoria.get('estado')
+
+
+class ProgramRecord:
+    """Programa de financiación con los campos de filtrado en __slots__"""
+
+    __slots__ = (
+        'id', 'nombre', 'organismo', 'organismo_grupo', 'tipo_ayuda', 'tipo_ayuda_grupo', 'ambito', 'ambito_nulo',
+        'beneficiarios', 'beneficiarios_grupos', 'sectores', 'sectores_grupos',
+        'tipo_proyecto', 'fondos_europeos', 'origen_fondos', 'estado',
+        'fecha_apertura', 'fecha_cierre', 'presupuesto_minimo', 'presupuesto_maximo',
+        'importe_maximo', 'codigo_bdns', 'fecha_publicacion_bdns', '_serializado'
+    )
+
+    def __init__(self, programa):
+        """
+        Args:
+            programa: Diccionario ya procesado (campos *_grupo, importes y
+                estado actualizados). No se conserva ninguna referencia a él.
+        """
+        convocatoria = programa.get('convocatoria')
+        if not isinstance(convocatoria, dict):
+            convocatoria = {}
+        financiacion = programa.get('financiacion')
+        if not isinstance(financiacion, dict):
+            financiacion = {}
+
+        self.id = programa.get('id')
+        # Nombre que muestra el dashboard (ordenación por nombre)
+        self.nombre = programa.get('nombre_coloquial') or programa.get('nombre')
+        self.organismo = _internar(programa.get('organismo'))
+        self.organismo_grupo = _internar(programa.get('organismo_grupo'))
+        # tipo_ayuda y tipo_proyecto pueden ser lista o cadena (convocatorias antiguas)
+        tipo_ayuda = programa.get('tipo_ayuda')
+        self.tipo_ayuda = _tupla_internada(tipo_ayuda) if isinstance(tipo_ayuda, list) else _internar(tipo_ayuda)
+        self.tipo_ayuda_grupo = _internar(programa.get('tipo_ayuda_grupo'))
+        self.ambito = _internar(programa.get('ambito'))
+        # 'ambito': null cuenta en las estadísticas (clave None); sin la clave, no
+        self.ambito_nulo = 'ambito' in programa and programa['ambito'] is None
+        self.beneficiarios = _tupla_internada(programa.get('beneficiarios'))
+        self.beneficiarios_grupos = _tupla_internada(programa.get('beneficiarios_grupos')) or ()
+        self.sectores = _tupla_internada(programa.get('sectores'))
+        self.sectores_grupos = _tupla_internada(programa.get('sectores_grupos')) or ()
+        tipo_proyecto = programa.get('tipo_proyecto')
+        self.tipo_proyecto = (_tupla_internada(tipo_proyecto) if isinstance(tipo_proyecto, list)
+                              else _internar(tipo_proyecto))
+        self.fondos_europeos = _tupla_internada(programa.get('fondos_europeos'))
+        self.origen_fondos = _internar(programa.get('origen_fondos'))
+        self.estado = _internar(convocatoria.get('estado'))
+        self.fecha_apertura = convocatoria.get('fecha_apertura')
+        self.fecha_cierre = convocatoria.get('fecha_cierre')
+        self.presupuesto_minimo = financiacion.get('presupuesto_minimo')
+        self.presupuesto_maximo = financiacion.get('presupuesto_maximo')
+        self.importe_maximo = financiacion.get('importe_maximo')
+        self.codigo_bdns = programa.get('codigo_bdns')
+        self.fecha_publicacion_bdns = programa.get('fecha_publicacion_bdns')
+        self._serializado = marshal.dumps(programa)
+
+    @property
+    def datos(self):
+        """
+        Programa completo como diccionario
+
+        Se reconstruye en cada llamada, así que el llamante puede modificarlo
+        libremente. El estado se toma del registro, que es el que mantiene al
+        día el catálogo.
+        """
+        programa = marshal.loads(self._serializado)
+        convocatoria = programa.get('convocatoria')
+        if isinstance(convocatoria, dict) and self.estado is not None:
+            convocatoria['estado'] = self.estado
+        return programa
+
+    def con_estado(self, estado):
+        """Copia del registro con otro estado de convocatoria (transiciones por fecha)"""
+        copia = ProgramRecord.__new__(ProgramRecord)
+        for campo in self.__slots__:
+            setattr(copia, campo, getattr(self, campo))
+        copia.estado = _internar(estado)
+        return copia
+
+    def __repr__(self):
+        return f"<ProgramRecord {self.id!r} {self.estado!r}>"
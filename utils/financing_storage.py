@@ -0,0 +1,835 @@
+"""
+Almacenamiento persistente de los programas de financiación
+
+Dos implementaciones con la misma interfaz, seleccionadas por la extensión de
+Config.DATABASE_PATH:
+
+- JsonStorage: el archivo programas_financiacion.json de siempre, con las
+  escrituras registradas en un diario de operaciones que se compacta
+  periódicamente sobre él.
+- SqliteStorage (.db, .sqlite, .sqlite3): una fila por programa en SQLite en
+  modo WAL, con columnas indexadas para los campos de consulta habitual y el
+  programa completo como JSON. Las escrituras se serializan entre workers con
+  BEGIN IMMEDIATE, por lo que dos ediciones simultáneas no se pisan.
+
+Cada modificación recibe un número de secuencia creciente y queda anotada en
+un registro de cambios compartido (el propio diario en JSON, la tabla cambios
+en SQLite). Cada worker guarda un cursor con lo último que ha leído y, con
+cambios_desde(cursor), obtiene solo los programas modificados desde entonces
+para parchear su catálogo en memoria sin volver a leerlo entero.
+"""
+import os
+import sys
+import json
+import marshal
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo bloqueo entre hilos
+    fcntl = None
+
+EXTENSIONES_SQLITE = ('.db', '.sqlite', '.sqlite3')
+
+
+def crear_almacen(ruta, columnas_indexadas=None, instantanea_binaria=True):
+    """
+    Crea el almacén adecuado para la ruta indicada
+
+    Args:
+        ruta: Ruta al archivo JSON o a la base de datos SQLite
+        columnas_indexadas: Función programa -> dict con las columnas indexadas
+            (solo se usa en SQLite)
+        instantanea_binaria: Mantener la copia binaria de arranque rápido
+            (solo se usa en JSON)
+    """
+    if ruta.lower().endswith(EXTENSIONES_SQLITE):
+        return SqliteStorage(ruta, columnas_indexadas)
+    return JsonStorage(ruta, instantanea_binaria)
+
+
+def generar_id_unico(id_base, existe):
+    """Añade un sufijo numérico a id_base hasta que existe(id) sea False"""
+    programa_id = id_base
+    contador = 1
+    while existe(programa_id):
+        programa_id = f"{id_base}-{contador}"
+        contador += 1
+    return programa_id
+
+
+class _BloqueoArchivo:
+    """
+    Bloqueo exclusivo entre procesos sobre un archivo .lock (fcntl.flock)
+
+    En sistemas sin fcntl (Windows, solo desarrollo) se limita a un bloqueo
+    entre hilos del mismo proceso.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._hilos = threading.RLock()
+        self._archivo = None
+        self._nivel = 0
+
+    def __enter__(self):
+        self._hilos.acquire()
+        self._nivel += 1
+        if self._nivel == 1 and fcntl is not None:
+            self._archivo = open(self.ruta, 'a')
+            fcntl.flock(self._archivo.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        self._nivel -= 1
+        if self._nivel == 0 and self._archivo is not None:
+            fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+            self._archivo.close()
+            self._archivo = None
+        self._hilos.release()
+        return False
+
+
+def _aplicar_operacion(programas, registro):
+    """Aplica un registro del diario (upsert/delete) sobre un dict id -> programa"""
+    if registro['op'] == 'delete':
+        programas.pop(registro['id'], None)
+    else:
+        # Un programa borrado y vuelto a crear pasa al final, como en disco
+        programas[registro['id']] = registro['programa']
+
+
+class JsonStorage:
+    """
+    Programas guardados en un archivo JSON más un diario de operaciones
+
+    Las escrituras no reescriben programas_financiacion.json: añaden una línea
+    JSONL (upsert/delete con seq, id y timestamp) al diario .journal que hay
+    junto a él, con coste proporcional al registro y no al catálogo. Al cargar
+    se reproduce el diario sobre la última instantánea. Cuando el diario supera
+    UMBRAL_COMPACTACION registros se integra en la instantánea escribiendo un
+    archivo temporal y sustituyéndolo con os.replace(), así que una caída a
+    mitad de escritura nunca deja el archivo principal truncado.
+
+    El cursor es (firma de la instantánea, desplazamiento en el diario, seq):
+    mientras la instantánea no cambie, leer los cambios de otro worker es leer
+    el final del diario a partir del desplazamiento.
+
+    Opcionalmente se mantiene junto al JSON una copia binaria (marshal) de la
+    instantánea, que se carga varias veces más rápido al arrancar cada worker.
+    Solo se usa si corresponde exactamente al JSON actual (misma firma) y a la
+    misma versión de Python; si no, se lee el JSON y se regenera.
+    """
+
+    UMBRAL_COMPACTACION = 200
+    FORMATO_BINARIO = 1
+
+    def __init__(self, ruta, instantanea_binaria=True):
+        self.ruta = ruta
+        self.ruta_diario = ruta + '.journal'
+        self.ruta_binaria = ruta + '.bin' if instantanea_binaria else None
+        self._bloqueo = _BloqueoArchivo(ruta + '.lock')
+        # IDs conocidos, cursor y registros en el diario vistos por las
+        # escrituras de este proceso (solo se usan con el bloqueo tomado)
+        self._ids = None
+        self._cursor = None
+        self._registros_diario = 0
+        # Versión de normalización de la última instantánea leída (ver marcar_normalizacion)
+        self.version_normalizacion = None
+
+    def _firma_instantanea(self):
+        try:
+            st = os.stat(self.ruta)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _tamano_diario(self):
+        try:
+            return os.path.getsize(self.ruta_diario)
+        except OSError:
+            return 0
+
+    def _leer_instantanea(self, firma_instantanea):
+        """Devuelve el contenido del archivo JSON (sin programas si no existe)"""
+        if not os.path.exists(self.ruta):
+            print(f"ERROR: El archivo de programas de financiación no existe en la ruta: {self.ruta}")
+            return {'programas': []}
+
+        data = self._leer_binaria(firma_instantanea)
+        if data is not None:
+            return data
+
+        with open(self.ruta, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if 'programas' not in data:
+            print("ERROR: El archivo JSON no contiene la clave 'programas'")
+            data['programas'] = []
+        elif self._firma_instantanea() == firma_instantanea:
+            self._guardar_binaria(data, firma_instantanea)
+        return data
+
+    def _leer_binaria(self, firma_instantanea):
+        """Devuelve la copia binaria si corresponde a la instantánea indicada, o None"""
+        if not self.ruta_binaria:
+            return None
+        try:
+            # marshal.load() sobre el archivo lee en trozos muy pequeños
+            with open(self.ruta_binaria, 'rb') as file:
+                contenido = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if (contenido.get('formato') != self.FORMATO_BINARIO or
+                contenido.get('python') != list(sys.version_info[:2]) or
+                contenido.get('fuente') != list(firma_instantanea or [])):
+            return None
+        return contenido['data']
+
+    def _guardar_binaria(self, data, firma_instantanea):
+        """Escribe la copia binaria de la instantánea (sin consecuencias si falla)"""
+        if not self.ruta_binaria or firma_instantanea is None:
+            return
+        temporal = f"{self.ruta_binaria}.tmp{os.getpid()}"
+        try:
+            with open(temporal, 'wb') as file:
+                file.write(marshal.dumps({
+                    'formato': self.FORMATO_BINARIO,
+                    'python': list(sys.version_info[:2]),
+                    'fuente': list(firma_instantanea),
+                    'data': data
+                }))
+            os.replace(temporal, self.ruta_binaria)
+        except (OSError, ValueError) as e:
+            print(f"Aviso: no se pudo guardar la instantánea binaria: {e}")
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+
+    def _leer_diario(self, desde=0):
+        """
+        Lee los registros completos del diario a partir de un desplazamiento
+
+        Returns:
+            (registros, nuevo_desplazamiento). Una última línea sin salto de
+            línea (escritura en curso) se ignora hasta que esté completa.
+        """
+        try:
+            with open(self.ruta_diario, 'rb') as file:
+                file.seek(desde)
+                contenido = file.read()
+        except OSError:
+            return [], desde
+
+        fin = contenido.rfind(b'\n') + 1
+        registros = []
+        for linea in contenido[:fin].splitlines():
+            if linea.strip():
+                registros.append(json.loads(linea))
+        return registros, desde + fin
+
+    def _estado(self):
+        """
+        Reconstruye el estado completo: instantánea + diario
+
+        Returns:
+            (data, programas_por_id, cursor, registros_en_diario)
+        """
+        for _ in range(3):
+            firma_instantanea = self._firma_instantanea()
+            data = self._leer_instantanea(firma_instantanea)
+            registros, desplazamiento = self._leer_diario()
+            # Si se compactó mientras leíamos, volver a empezar
+            if self._firma_instantanea() == firma_instantanea:
+                break
+
+        self.version_normalizacion = data.get('version_normalizacion')
+        programas = {}
+        for i, programa in enumerate(data['programas']):
+            programas[programa.get('id') or f"__sin_id_{i}"] = programa
+        secuencia = data.get('secuencia', 0)
+        for registro in registros:
+            _aplicar_operacion(programas, registro)
+            data['ultima_actualizacion'] = registro['ts']
+            secuencia = registro['seq']
+        return data, programas, (firma_instantanea, desplazamiento, secuencia), len(registros)
+
+    def cargar(self):
+        """Devuelve (programas, cursor): instantánea con el diario aplicado"""
+        _, programas, cursor, _ = self._estado()
+        return list(programas.values()), cursor
+
+    def cambios_desde(self, cursor):
+        """
+        Devuelve los cambios posteriores a un cursor
+
+        Returns:
+            (cambios, nuevo_cursor), con cambios como lista de
+            (programa_id, programa o None si se eliminó) en orden. cambios es
+            None si hay que recargar todo (la instantánea se compactó).
+        """
+        firma_instantanea, desplazamiento, secuencia = cursor
+        if self._firma_instantanea() != firma_instantanea:
+            return None, None
+
+        tamano = self._tamano_diario()
+        if tamano == desplazamiento:
+            return [], cursor
+        if tamano < desplazamiento:
+            return None, None
+
+        registros, desplazamiento = self._leer_diario(desplazamiento)
+        if registros:
+            secuencia = registros[-1]['seq']
+        cambios = [(r['id'], r.get('programa')) for r in registros]
+        return cambios, (firma_instantanea, desplazamiento, secuencia)
+
+    def metadatos(self):
+        """Devuelve ultima_actualizacion y total_programas"""
+        data, programas, _, _ = self._estado()
+        return {
+            'ultima_actualizacion': data.get('ultima_actualizacion'),
+            'total_programas': len(programas)
+        }
+
+    def _sincronizar_ids(self):
+        """Actualiza los IDs conocidos leyendo solo lo nuevo del diario (con el bloqueo tomado)"""
+        cambios = None
+        if self._cursor is not None:
+            cambios, cursor = self.cambios_desde(self._cursor)
+
+        if cambios is None:
+            _, programas, cursor, self._registros_diario = self._estado()
+            self._ids = set(programas)
+        else:
+            self._registros_diario += len(cambios)
+            for programa_id, programa in cambios:
+                if programa is None:
+                    self._ids.discard(programa_id)
+                else:
+                    self._ids.add(programa_id)
+        self._cursor = cursor
+
+    def _anadir_registros(self, operaciones):
+        """
+        Añade operaciones (op, programa_id, programa) al diario en una sola escritura
+
+        Se llama con el bloqueo tomado y los IDs sincronizados.
+        """
+        firma_instantanea, desplazamiento, secuencia = self._cursor
+        ahora = datetime.now().isoformat()
+        lineas = []
+        for op, programa_id, programa in operaciones:
+            secuencia += 1
+            registro = {'seq': secuencia, 'op': op, 'id': programa_id, 'ts': ahora}
+            if programa is not None:
+                registro['programa'] = programa
+            lineas.append(json.dumps(registro, ensure_ascii=False) + '\n')
+        contenido = ''.join(lineas).encode('utf-8')
+
+        with open(self.ruta_diario, 'ab') as file:
+            # Descartar una línea incompleta que haya dejado una caída anterior
+            if file.tell() > desplazamiento:
+                file.truncate(desplazamiento)
+            file.write(contenido)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self._cursor = (firma_instantanea, desplazamiento + len(contenido), secuencia)
+        self._registros_diario += len(operaciones)
+        for op, programa_id, _ in operaciones:
+            if op == 'delete':
+                self._ids.discard(programa_id)
+            else:
+                self._ids.add(programa_id)
+
+        if self._registros_diario >= self.UMBRAL_COMPACTACION:
+            self.compactar()
+
+    def compactar(self, version_normalizacion=None):
+        """
+        Integra el diario en programas_financiacion.json
+
+        Escribe la instantánea completa en un archivo temporal, la sustituye con
+        os.replace() (atómico) y después vacía el diario. Si el proceso cae
+        entre ambos pasos, volver a aplicar el diario sobre la nueva instantánea
+        da el mismo resultado.
+
+        Args:
+            version_normalizacion: Si se indica, se anota en la instantánea
+                (ver marcar_normalizacion)
+        """
+        with self._bloqueo:
+            data, programas, cursor, _ = self._estado()
+            if version_normalizacion is not None:
+                data['version_normalizacion'] = self.version_normalizacion = version_normalizacion
+            data['programas'] = list(programas.values())
+            data['total_programas'] = len(data['programas'])
+            data['secuencia'] = cursor[2]
+            if not data.get('ultima_actualizacion'):
+                data['ultima_actualizacion'] = datetime.now().isoformat()
+
+            temporal = f"{self.ruta}.tmp{os.getpid()}"
+            with open(temporal, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporal, self.ruta)
+            firma_instantanea = self._firma_instantanea()
+            self._guardar_binaria(data, firma_instantanea)
+
+            with open(self.ruta_diario, 'wb') as file:
+                os.fsync(file.fileno())
+            self._ids = set(programas)
+            self._cursor = (firma_instantanea, 0, cursor[2])
+            self._registros_diario = 0
+
+    def marcar_normalizacion(self, version):
+        """
+        Anota que todos los programas guardados tienen los campos derivados de
+        esa versión de las tablas de normalización (se compacta el diario)
+        """
+        self.compactar(version_normalizacion=version)
+
+    def agregar(self, programa, id_base):
+        """Añade un programa con un ID único derivado de id_base y devuelve el ID"""
+        with self._bloqueo:
+            self._sincronizar_ids()
+            programa_id = generar_id_unico(id_base, lambda i: i in self._ids)
+            programa['id'] = programa_id
+            self._anadir_registros([('upsert', programa_id, programa)])
+        return programa_id
+
+    def actualizar(self, programa_id, programa):
+        """Reemplaza un programa existente; False si no existe"""
+        with self._bloqueo:
+            self._sincronizar_ids()
+            if programa_id not in self._ids:
+                return False
+            programa['id'] = programa_id
+            self._anadir_registros([('upsert', programa_id, programa)])
+        return True
+
+    def eliminar(self, programa_id):
+        """Elimina un programa; False si no existe"""
+        with self._bloqueo:
+            self._sincronizar_ids()
+            if programa_id not in self._ids:
+                return False
+            self._anadir_registros([('delete', programa_id, None)])
+        return True
+
+    def guardar_varios(self, programas):
+        """Inserta o reemplaza varios programas (con ID) en una sola escritura"""
+        if not programas:
+            return
+        with self._bloqueo:
+            self._sincronizar_ids()
+            self._anadir_registros([('upsert', p['id'], p) for p in programas])
+
+    def agregar_varios(self, elementos):
+        """
+        Añade o reemplaza varios programas en una sola escritura del diario
+
+        Args:
+            elementos: Lista de (programa, id_base, reemplazar). Si reemplazar
+                es True y existe un programa con ID id_base (guardado antes o
+                añadido por un elemento anterior del lote), se sustituye; si
+                no, se añade con un ID único derivado de id_base.
+
+        Returns:
+            Lista de (ID asignado, True si el programa es nuevo)
+        """
+        resultado = []
+        if not elementos:
+            return resultado
+        with self._bloqueo:
+            self._sincronizar_ids()
+            # IDs creados por el lote (self._ids no cambia hasta escribir el diario)
+            nuevos = set()
+            existe = lambda i: i in self._ids or i in nuevos
+            operaciones = []
+            for programa, id_base, reemplazar in elementos:
+                creado = not (reemplazar and existe(id_base))
+                programa_id = generar_id_unico(id_base, existe) if creado else id_base
+                if creado:
+                    nuevos.add(programa_id)
+                programa['id'] = programa_id
+                operaciones.append(('upsert', programa_id, programa))
+                resultado.append((programa_id, creado))
+            self._anadir_registros(operaciones)
+        return resultado
+
+
+class SqliteStorage:
+    """
+    Programas guardados en SQLite (modo WAL), una fila por programa
+
+    El cursor es el número de secuencia del último cambio leído. La tabla
+    cambios conserva los últimos RETENCION_CAMBIOS cambios; un worker que se
+    haya quedado más atrás recarga el catálogo completo.
+    """
+
+    RETENCION_CAMBIOS = 1000
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS programas (
+            id TEXT PRIMARY KEY,
+            posicion INTEGER NOT NULL,
+            codigo_bdns TEXT,
+            organismo_grupo TEXT,
+            estado TEXT,
+            fecha_cierre TEXT,
+            ambito TEXT,
+            datos TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_programas_posicion ON programas(posicion);
+        CREATE INDEX IF NOT EXISTS idx_programas_codigo_bdns ON programas(codigo_bdns);
+        CREATE INDEX IF NOT EXISTS idx_programas_organismo_grupo ON programas(organismo_grupo);
+        CREATE INDEX IF NOT EXISTS idx_programas_estado ON programas(estado);
+        CREATE INDEX IF NOT EXISTS idx_programas_fecha_cierre ON programas(fecha_cierre);
+        CREATE INDEX IF NOT EXISTS idx_programas_ambito ON programas(ambito);
+        CREATE TABLE IF NOT EXISTS cambios (
+            seq INTEGER PRIMARY KEY,
+            op TEXT NOT NULL,
+            programa_id TEXT NOT NULL,
+            ts TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        );
+        INSERT OR IGNORE INTO meta (clave, valor) VALUES ('version', '0');
+    """
+
+    def __init__(self, ruta, columnas_indexadas=None):
+        self.ruta = ruta
+        self._columnas_indexadas = columnas_indexadas
+        self._local = threading.local()
+        # Versión de normalización leída en la última carga (ver marcar_normalizacion)
+        self.version_normalizacion = None
+
+    def _conexion(self):
+        """Conexión propia de cada hilo (sqlite3 no comparte conexiones entre hilos)"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            directorio = os.path.dirname(self.ruta)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            conexion.executescript(self.ESQUEMA)
+            self._local.conexion = conexion
+        return conexion
+
+    def _columnas(self, programa):
+        """Valores de las columnas indexadas de un programa"""
+        columnas = self._columnas_indexadas(programa) if self._columnas_indexadas else {}
+        convocatoria = programa.get('convocatoria') or {}
+        codigo_bdns = programa.get('codigo_bdns')
+        return (
+            str(codigo_bdns) if codigo_bdns not in (None, '') else None,
+            columnas.get('organismo_grupo', programa.get('organismo_grupo')),
+            columnas.get('estado', convocatoria.get('estado')),
+            columnas.get('fecha_cierre', convocatoria.get('fecha_cierre')),
+            columnas.get('ambito', programa.get('ambito')),
+        )
+
+    def _version(self, conexion):
+        return int(conexion.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0])
+
+    def _registrar_cambio(self, conexion, version, op, programa_id):
+        """Anota el cambio con el siguiente número de secuencia (dentro de la transacción)"""
+        ahora = datetime.now().isoformat()
+        secuencia = version + 1
+        conexion.execute('INSERT INTO cambios (seq, op, programa_id, ts) VALUES (?, ?, ?, ?)',
+                         (secuencia, op, programa_id, ahora))
+        conexion.execute('DELETE FROM cambios WHERE seq <= ?', (secuencia - self.RETENCION_CAMBIOS,))
+        conexion.execute("UPDATE meta SET valor = ? WHERE clave = 'version'", (str(secuencia),))
+        conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('ultima_actualizacion', ?)",
+                         (ahora,))
+        return secuencia
+
+    def cargar(self):
+        """Devuelve (programas, cursor) con los programas en su orden de inserción"""
+        conexion = self._conexion()
+        conexion.execute('BEGIN')
+        try:
+            version = self._version(conexion)
+            filas = conexion.execute('SELECT datos FROM programas ORDER BY posicion').fetchall()
+            fila = conexion.execute("SELECT valor FROM meta WHERE clave = 'version_normalizacion'").fetchone()
+            self.version_normalizacion = fila[0] if fila else None
+        finally:
+            conexion.execute('COMMIT')
+        return [json.loads(datos) for (datos,) in filas], version
+
+    def cambios_desde(self, cursor):
+        """
+        Devuelve los cambios posteriores a un cursor
+
+        Returns:
+            (cambios, nuevo_cursor), con cambios como lista de
+            (programa_id, programa o None si se eliminó) en orden. cambios es
+            None si hay que recargar todo (el cursor es más antiguo que los
+            cambios conservados).
+        """
+        conexion = self._conexion()
+        if self._version(conexion) == cursor:
+            return [], cursor
+
+        conexion.execute('BEGIN')
+        try:
+            version = self._version(conexion)
+            minimo = conexion.execute('SELECT MIN(seq) FROM cambios').fetchone()[0]
+            if minimo is None or minimo > cursor + 1:
+                return None, None
+
+            filas = conexion.execute('SELECT op, programa_id FROM cambios WHERE seq > ? AND seq <= ? ORDER BY seq',
+                                     (cursor, version)).fetchall()
+            ids = list({programa_id for op, programa_id in filas if op != 'delete'})
+            datos = {}
+            for inicio in range(0, len(ids), 500):
+                bloque = ids[inicio:inicio + 500]
+                consulta = 'SELECT id, datos FROM programas WHERE id IN (%s)' % ','.join('?' * len(bloque))
+                datos.update(conexion.execute(consulta, bloque).fetchall())
+        finally:
+            conexion.execute('COMMIT')
+
+        cambios = []
+        for op, programa_id in filas:
+            programa = json.loads(datos[programa_id]) if op != 'delete' and programa_id in datos else None
+            cambios.append((programa_id, programa))
+        return cambios, version
+
+    def metadatos(self):
+        """Devuelve ultima_actualizacion y total_programas"""
+        conexion = self._conexion()
+        fila = conexion.execute("SELECT valor FROM meta WHERE clave = 'ultima_actualizacion'").fetchone()
+        total = conexion.execute('SELECT COUNT(*) FROM programas').fetchone()[0]
+        return {
+            'ultima_actualizacion': fila[0] if fila else None,
+            'total_programas': total
+        }
+
+    def _insertar(self, conexion, programa):
+        posicion = conexion.execute('SELECT COALESCE(MAX(posicion), 0) + 1 FROM programas').fetchone()[0]
+        conexion.execute(
+            'INSERT INTO programas (id, posicion, codigo_bdns, organismo_grupo, estado, fecha_cierre, ambito, datos) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (programa['id'], posicion) + self._columnas(programa) + (json.dumps(programa, ensure_ascii=False),)
+        )
+
+    def agregar(self, programa, id_base):
+        """Añade un programa con un ID único derivado de id_base y devuelve el ID"""
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._version(conexion)
+
+            def existe(programa_id):
+                return conexion.execute('SELECT 1 FROM programas WHERE id = ?', (programa_id,)).fetchone() is not None
+
+            programa['id'] = generar_id_unico(id_base, existe)
+            self._insertar(conexion, programa)
+            self._registrar_cambio(conexion, version, 'upsert', programa['id'])
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+        return programa['id']
+
+    def actualizar(self, programa_id, programa):
+        """Reemplaza un programa existente; False si no existe"""
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._version(conexion)
+            programa['id'] = programa_id
+            cursor = conexion.execute(
+                'UPDATE programas SET codigo_bdns = ?, organismo_grupo = ?, estado = ?, fecha_cierre = ?, '
+                'ambito = ?, datos = ? WHERE id = ?',
+                self._columnas(programa) + (json.dumps(programa, ensure_ascii=False), programa_id)
+            )
+            if cursor.rowcount == 0:
+                conexion.execute('ROLLBACK')
+                return False
+            self._registrar_cambio(conexion, version, 'upsert', programa_id)
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+        return True
+
+    def eliminar(self, programa_id):
+        """Elimina un programa; False si no existe"""
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._version(conexion)
+            cursor = conexion.execute('DELETE FROM programas WHERE id = ?', (programa_id,))
+            if cursor.rowcount == 0:
+                conexion.execute('ROLLBACK')
+                return False
+            self._registrar_cambio(conexion, version, 'delete', programa_id)
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+        return True
+
+    def marcar_normalizacion(self, version):
+        """
+        Anota que todos los programas guardados tienen los campos derivados de
+        esa versión de las tablas de normalización
+        """
+        self._conexion().execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('version_normalizacion', ?)",
+                                 (version,))
+        self.version_normalizacion = version
+
+    def guardar_varios(self, programas):
+        """Inserta o reemplaza varios programas (con ID) en una sola transacción"""
+        if not programas:
+            return
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._version(conexion)
+            for programa in programas:
+                cursor = conexion.execute(
+                    'UPDATE programas SET codigo_bdns = ?, organismo_grupo = ?, estado = ?, fecha_cierre = ?, '
+                    'ambito = ?, datos = ? WHERE id = ?',
+                    self._columnas(programa) + (json.dumps(programa, ensure_ascii=False), programa['id'])
+                )
+                if cursor.rowcount == 0:
+                    self._insertar(conexion, programa)
+                version = self._registrar_cambio(conexion, version, 'upsert', programa['id'])
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+
+    def agregar_varios(self, elementos):
+        """Como JsonStorage.agregar_varios, en una sola transacción"""
+        resultado = []
+        if not elementos:
+            return resultado
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._version(conexion)
+            ids = {fila[0] for fila in conexion.execute('SELECT id FROM programas')}
+            # IDs creados por el lote (misma regla que JsonStorage.agregar_varios)
+            nuevos = set()
+            existe = lambda i: i in ids or i in nuevos
+            for programa, id_base, reemplazar in elementos:
+                creado = not (reemplazar and existe(id_base))
+                programa['id'] = generar_id_unico(id_base, existe) if creado else id_base
+                if creado:
+                    self._insertar(conexion, programa)
+                    nuevos.add(programa['id'])
+                else:
+                    conexion.execute(
+                        'UPDATE programas SET codigo_bdns = ?, organismo_grupo = ?, estado = ?, fecha_cierre = ?, '
+                        'ambito = ?, datos = ? WHERE id = ?',
+                        self._columnas(programa) + (json.dumps(programa, ensure_ascii=False), programa['id'])
+                    )
+                version = self._registrar_cambio(conexion, version, 'upsert', programa['id'])
+                resultado.append((programa['id'], creado))
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+        return resultado
+
+    def importar(self, programas, generar_id_base):
+        """
+        Carga de una vez una lista de programas (importación desde JSON)
+
+        Los programas sin ID reciben uno derivado de generar_id_base(programa).
+        Los IDs que ya existan en la base de datos se sobrescriben.
+
+        Returns:
+            Número de programas importados
+        """
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._version(conexion)
+            ids = {fila[0] for fila in conexion.execute('SELECT id FROM programas')}
+            for programa in programas:
+                if not programa.get('id'):
+                    programa['id'] = generar_id_unico(generar_id_base(programa), lambda i: i in ids)
+                conexion.execute('DELETE FROM programas WHERE id = ?', (programa['id'],))
+                self._insertar(conexion, programa)
+                ids.add(programa['id'])
+            # Un cambio masivo: el resto de workers recargará el catálogo completo
+            conexion.execute('DELETE FROM cambios')
+            conexion.execute("UPDATE meta SET valor = ? WHERE clave = 'version'", (str(version + 1),))
+            conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('ultima_actualizacion', ?)",
+                             (datetime.now().isoformat(),))
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+        return len(programas)
+
+
+def importar_json_a_sqlite(ruta_json, ruta_db):
+    """
+    Importa (una sola vez) el archivo JSON de programas a una base de datos SQLite
+
+    Returns:
+        Número de programas importados
+    """
+    from .financing_dashboard import (columnas_indexadas, enriquecer_programa, generar_id_base,
+                                      VERSION_NORMALIZACION)
+
+    programas, _ = JsonStorage(ruta_json).cargar()
+    for programa in programas:
+        enriquecer_programa(programa)
+    almacen = SqliteStorage(ruta_db, columnas_indexadas)
+    total = almacen.importar(programas, generar_id_base)
+    almacen.marcar_normalizacion(VERSION_NORMALIZACION)
+    return total
+
+
+def recalcular_campos_derivados(ruta):
+    """
+    Persiste los campos derivados de los programas que no los tengan al día
+
+    Returns:
+        Número de programas actualizados
+    """
+    from .financing_dashboard import columnas_indexadas, enriquecer_programa, VERSION_NORMALIZACION
+
+    almacen = crear_almacen(ruta, columnas_indexadas)
+    programas, _ = almacen.cargar()
+    if almacen.version_normalizacion == VERSION_NORMALIZACION:
+        return 0
+    pendientes = [enriquecer_programa(p) for p in programas if p.get('id')]
+    almacen.guardar_varios(pendientes)
+    almacen.marcar_normalizacion(VERSION_NORMALIZACION)
+    return len(pendientes)
+
+
+if __name__ == '__main__':
+    # Uso: python -m utils.financing_storage importar <programas.json> <programas.db>
+    #      python -m utils.financing_storage compactar <programas.json>
+    #      python -m utils.financing_storage recalcular <programas.json|programas.db>
+    if len(sys.argv) == 4 and sys.argv[1] == 'importar':
+        total = importar_json_a_sqlite(sys.argv[2], sys.argv[3])
+        print(f"Importados {total} programas de {sys.argv[2]} a {sys.argv[3]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'compactar':
+        JsonStorage(sys.argv[2]).compactar()
+        print(f"Diario integrado en {sys.argv[2]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'recalcular':
+        total = recalcular_campos_derivados(sys.argv[2])
+        print(f"Campos derivados recalculados en {total} programas de {sys.argv[2]}")
+    else:
+        print("Uso: python -m utils.financing_storage importar <programas.json> <programas.db>")
+        print("     python -m utils.financing_storage compactar <programas.json>")
+        print("     python -m utils.financing_storage recalcular <programas.json|programas.db>")
+        sys.exit(1)
@@ -0,0 +1,131 @@
+"""
+Índice de prefijos para autocompletar la búsqueda
+
+Guarda una lista ordenada de claves plegadas (sin tildes, en minúsculas) de
+los nombres, organismos, etiquetas y códigos BDNS del catálogo. Una consulta
+localiza con bisect el tramo de claves que empiezan por el texto escrito y
+devuelve los textos originales más usados de ese tramo.
+
+Los textos de varias palabras se indexan también desde cada palabra, así que
+"innov" sugiere "Cheque Innovación" además de lo que empieza por "innov".
+
+Se mantiene desde ProgramCatalog igual que FacetIndex: reconstruir() tras una
+carga completa y agregar()/eliminar() por cada programa que cambia.
+"""
+import heapq
+from bisect import bisect_left, insort
+
+from .financing_index import plegar_texto
+
+
+class SuggestIndex:
+    """Claves plegadas ordenadas -> (tipo, texto) con el número de programas que lo usan"""
+
+    def __init__(self, campos):
+        """
+        Args:
+            campos: Diccionario tipo -> (función(registro) que devuelve un
+                texto o una lista de textos, si se indexa también desde cada
+                palabra)
+        """
+        self._campos = campos
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vacía el índice"""
+        self._entradas_de = {}     # programa_id -> {(tipo, texto)}
+        self._usos = {}            # (tipo, texto) -> número de programas
+        self._claves = []          # lista ordenada de (clave, tipo, texto, desde el inicio del texto)
+
+    def _entradas(self, registro):
+        """Pares (tipo, texto) de un programa"""
+        entradas = set()
+        for tipo, (extraer, _) in self._campos.items():
+            textos = extraer(registro)
+            if isinstance(textos, str):
+                textos = [textos]
+            elif not isinstance(textos, (list, tuple)):
+                continue
+            for texto in textos:
+                if isinstance(texto, str) and texto.strip():
+                    entradas.add((tipo, texto.strip()))
+        return entradas
+
+    def _claves_de(self, tipo, texto):
+        """Elementos de la lista ordenada de un texto: el texto entero y, si procede, desde cada palabra"""
+        plegado = ' '.join(plegar_texto(texto).split())
+        claves = [(plegado, tipo, texto, True)]
+        if self._campos[tipo][1]:
+            inicio = plegado.find(' ')
+            while inicio != -1:
+                claves.append((plegado[inicio + 1:], tipo, texto, False))
+                inicio = plegado.find(' ', inicio + 1)
+        return claves
+
+    def _sumar(self, entrada):
+        """Cuenta un uso más de la entrada, dándola de alta si es nueva"""
+        usos = self._usos.get(entrada, 0)
+        self._usos[entrada] = usos + 1
+        if not usos:
+            for clave in self._claves_de(*entrada):
+                insort(self._claves, clave)
+
+    def _restar(self, entrada):
+        """Cuenta un uso menos de la entrada, dándola de baja si nadie la usa"""
+        usos = self._usos[entrada] - 1
+        if usos:
+            self._usos[entrada] = usos
+            return
+        del self._usos[entrada]
+        for clave in self._claves_de(*entrada):
+            i = bisect_left(self._claves, clave)
+            if i < len(self._claves) and self._claves[i] == clave:
+                del self._claves[i]
+
+    def reconstruir(self, elementos):
+        """Indexa de una vez una secuencia de (programa_id, registro)"""
+        self.reiniciar()
+        for programa_id, registro in elementos:
+            entradas = self._entradas_de[programa_id] = self._entradas(registro)
+            for entrada in entradas:
+                self._usos[entrada] = self._usos.get(entrada, 0) + 1
+        self._claves = sorted(clave for entrada in self._usos for clave in self._claves_de(*entrada))
+
+    def agregar(self, programa_id, registro):
+        """Indexa un programa nuevo o reemplaza uno existente"""
+        nuevas = self._entradas(registro)
+        anteriores = self._entradas_de.get(programa_id, set())
+        for entrada in anteriores - nuevas:
+            self._restar(entrada)
+        for entrada in nuevas - anteriores:
+            self._sumar(entrada)
+        self._entradas_de[programa_id] = nuevas
+
+    def eliminar(self, programa_id):
+        """Quita un programa del índice"""
+        for entrada in self._entradas_de.pop(programa_id, ()):
+            self._restar(entrada)
+
+    def sugerir(self, prefijo, limite=8):
+        """
+        Textos cuya clave (o alguna de sus palabras) empieza por el prefijo
+
+        Van primero los que empiezan por el prefijo, después los más usados y
+        después los más cortos.
+
+        Returns:
+            Lista de (tipo, texto, número de programas)
+        """
+        prefijo = ' '.join(plegar_texto(prefijo).split())
+        if not prefijo or limite <= 0:
+            return []
+        claves = self._claves
+        vistos = {}
+        for i in range(bisect_left(claves, (prefijo,)), len(claves)):
+            clave, tipo, texto, desde_el_inicio = claves[i]
+            if not clave.startswith(prefijo):
+                break
+            vistos[(tipo, texto)] = vistos.get((tipo, texto), False) or desde_el_inicio
+        mejores = heapq.nsmallest(limite, vistos.items(), key=lambda par: (
+            not par[1], -self._usos[par[0]], len(par[0][1]), par[0][1]))
+        return [(tipo, texto, self._usos[(tipo, texto)]) for (tipo, texto), _ in mejores]
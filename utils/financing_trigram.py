@@ -0,0 +1,144 @@
+"""
+Índice de trigramas para la búsqueda tolerante a erratas
+
+Cuando una búsqueda no devuelve nada ("neotek", "cheqe inovacion"), cada
+palabra se corrige por la palabra más parecida de los nombres y organismos del
+catálogo. El parecido es el de pg_trgm: trigramas en común entre el total de
+trigramas distintos de las dos palabras (con dos espacios delante y uno
+detrás, así que el comienzo de la palabra pesa más).
+
+En lugar de comparar la palabra con todo el catálogo, el índice guarda, por
+trigrama, las palabras del vocabulario que lo contienen: solo se cuentan las
+palabras que comparten algún trigrama con la consulta.
+
+Se mantiene desde ProgramCatalog igual que FacetIndex: reconstruir() tras una
+carga completa y agregar()/eliminar() por cada programa que cambia.
+"""
+from .financing_index import terminos
+
+
+def trigramas(palabra):
+    """Conjunto de trigramas de una palabra ya plegada"""
+    relleno = f"  {palabra} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class TrigramIndex:
+    """Vocabulario de nombres y organismos con listas trigrama -> palabras"""
+
+    # Parecido mínimo para aceptar una corrección (el de pg_trgm es 0.3)
+    UMBRAL = 0.3
+
+    def __init__(self, campos):
+        """
+        Args:
+            campos: Diccionario nombre -> función(registro) que devuelve el
+                texto del que salen las palabras (o None)
+        """
+        self._campos = campos
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vacía el índice"""
+        self._palabras_de = {}     # programa_id -> palabras del programa
+        self._programas = {}       # palabra -> número de programas que la usan
+        self._tamanos = {}         # palabra -> número de trigramas
+        self._listas = {}          # trigrama -> palabras que lo contienen
+
+    def _palabras(self, registro):
+        """Palabras indexables de un programa (sin números: no tienen erratas que corregir)"""
+        palabras = set()
+        for extraer in self._campos.values():
+            texto = extraer(registro)
+            if isinstance(texto, str):
+                palabras.update(p for p in terminos(texto) if not p.isdigit())
+        return palabras
+
+    def _sumar(self, palabra):
+        """Cuenta un uso más de la palabra, dándola de alta si es nueva"""
+        usos = self._programas.get(palabra, 0)
+        self._programas[palabra] = usos + 1
+        if usos:
+            return
+        propios = trigramas(palabra)
+        self._tamanos[palabra] = len(propios)
+        for trigrama in propios:
+            self._listas.setdefault(trigrama, set()).add(palabra)
+
+    def _restar(self, palabra):
+        """Cuenta un uso menos de la palabra, dándola de baja si nadie la usa"""
+        usos = self._programas[palabra] - 1
+        if usos:
+            self._programas[palabra] = usos
+            return
+        del self._programas[palabra], self._tamanos[palabra]
+        for trigrama in trigramas(palabra):
+            lista = self._listas[trigrama]
+            lista.discard(palabra)
+            if not lista:
+                del self._listas[trigrama]
+
+    def reconstruir(self, elementos):
+        """Indexa de una vez una secuencia de (programa_id, registro)"""
+        self.reiniciar()
+        for programa_id, registro in elementos:
+            self.agregar(programa_id, registro)
+
+    def agregar(self, programa_id, registro):
+        """Indexa un programa nuevo o reemplaza uno existente"""
+        nuevas = self._palabras(registro)
+        anteriores = self._palabras_de.get(programa_id, set())
+        for palabra in anteriores - nuevas:
+            self._restar(palabra)
+        for palabra in nuevas - anteriores:
+            self._sumar(palabra)
+        self._palabras_de[programa_id] = nuevas
+
+    def eliminar(self, programa_id):
+        """Quita un programa del índice"""
+        for palabra in self._palabras_de.pop(programa_id, ()):
+            self._restar(palabra)
+
+    def parecidas(self, palabra, umbral=None, limite=5):
+        """
+        Palabras del vocabulario parecidas a una dada, de más a menos parecida
+
+        A igual parecido va primero la que usan más programas.
+
+        Returns:
+            Lista de (palabra, parecido) con parecido >= umbral
+        """
+        umbral = self.UMBRAL if umbral is None else umbral
+        propios = trigramas(palabra)
+        comunes = {}
+        for trigrama in propios:
+            for candidata in self._listas.get(trigrama, ()):
+                comunes[candidata] = comunes.get(candidata, 0) + 1
+        resultado = []
+        for candidata, n in comunes.items():
+            parecido = n / (len(propios) + self._tamanos[candidata] - n)
+            if parecido >= umbral:
+                resultado.append((candidata, parecido))
+        resultado.sort(key=lambda par: (-par[1], -self._programas[par[0]], par[0]))
+        return resultado[:limite]
+
+    def corregir(self, texto, conocida=None, umbral=None):
+        """
+        Texto con cada palabra desconocida sustituida por la más parecida
+
+        Las palabras que ya están en el vocabulario (o para las que
+        conocida(palabra) es True), los números y las que no tienen ninguna
+        parecida se dejan como están.
+
+        Returns:
+            Texto corregido (palabras plegadas), o None si no cambia nada
+        """
+        palabras = terminos(texto)
+        corregidas = []
+        for palabra in palabras:
+            if palabra.isdigit() or palabra in self._programas or (conocida and conocida(palabra)):
+                corregidas.append(palabra)
+                continue
+            candidatas = self.parecidas(palabra, umbral, limite=1)
+            corregidas.append(candidatas[0][0] if candidatas else palabra)
+        return ' '.join(corregidas) if corregidas != palabras else None